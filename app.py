@@ -1,305 +1,45 @@
 """
 OUSD OAL Middle School Sports Dashboard — Production
 Features: Batch API, Quota Retry, Full Normalization, and Professional UI.
+The scan engine lives in roster_engine.py; roster_etl.py runs it headless.
 """
 
-import json
-import re
 import time
 import streamlit as st
 import pandas as pd
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
+from roster_engine import (
+    CUBE_MEASURES, FOLDER_ID, SNAPSHOT_POLL_SECONDS, TELEMETRY_LOG_PATH, RosterHistory, SnapshotStore, Telemetry, display_school_name,
+    EXPORT_FORMATS, FLAG_RULES, SEARCH_MAX_STUDENTS, command_center_metrics, export_roster, flag_summary, header_template_inventory, rollup, scan_dead_letters, school_year_label,
+    COMMAND_CENTER_NAME, METRIC_KEYS, METRIC_SCHEMAS, join_metric,
+)
+
+@st.cache_resource
+def get_snapshot_store() -> SnapshotStore:
+    return SnapshotStore(FOLDER_ID).start()
+
+@st.cache_data(ttl=600, show_spinner=False)
+def load_history_metrics(snapshot_version: int):
+    """History aggregates, computed in SQLite. Keyed on the snapshot version: history only grows when one is published."""
+    history = RosterHistory()
+    try:
+        return history.partitions(), history.return_rates("school"), history.return_rates("sport"), history.multi_sport(), history.transfers()
+    finally:
+        history.close()
 
-# ---------------------------------------------------------------------------
-# Config & Normalization Helpers
-# ---------------------------------------------------------------------------
-FOLDER_ID = "18B2JDMzmEqmeAk8T2vwswX5T-koYUMQV"
-SERVICE_ACCOUNT_FILE = "service_account_2.json"
-# For Streamlit Cloud: set gcp_service_account in Secrets to the service account dict (no file needed)
-HEADER_SEARCH_MAX_ROWS = 15
-MAX_ROWS_PER_SHEET = 800
-DELAY_BETWEEN_SPREADSHEETS = 1.2
-
-TARGET_HEADERS = ["STUDENT ID", "Last Name", "First Name", "Gendar", "Year", "GPA", "PHYSICAL"]
-
-HEADER_ALIASES = {
-    "STUDENT ID": ["STUDENT ID", "Student ID", "Student ID #", "ID"],
-    "Last Name": ["Last Name", "Last name", "LastName", "Lname"],
-    "First Name": ["First Name", "First name", "FirstName", "Fname"],
-    "Gendar": ["Gendar", "Gender"],
-    "Year": ["Year", "Grade", "Grade Year"],
-    "GPA": ["GPA", "Gpa"],
-    "PHYSICAL": ["PHYSICAL", "Physical", "Physical Date", "Physical Clearance"],
-}
+@st.cache_data(ttl=600, show_spinner=False)
+def load_header_templates(snapshot_version: int) -> pd.DataFrame:
+    """Header template inventory from the scan cache; it only changes when a scan finishes."""
+    return header_template_inventory()
 
-def _strip_tab_prefix(s: str) -> str:
-    """Remove leading (M) etc. so tab names like '(M) FLAG FOOTBALL - BOYS YELLOW JV' parse correctly. Keeps (F)/(W)/(S) for season."""
-    s = re.sub(r"^\s*\(M\)\s*", "", s, flags=re.IGNORECASE)
-    return s.strip()
-
-def _core_sport_string(tab_name: str) -> str:
-    if not tab_name: return ""
-    s = str(tab_name).strip().upper()
-    s = _strip_tab_prefix(s)
-    s = re.sub(r"^\s*\([FWS]\)\s*", "", s, flags=re.IGNORECASE)
-    s = re.sub(r"^\s*\((?:FALL|WINTER|SPRING)\)\s*", "", s, flags=re.IGNORECASE)
-    # Strip trailing gender so core = level + sport + team only
-    s = re.sub(r"\s*[-–]\s*GIRLS?\s*$", "", s, flags=re.IGNORECASE)
-    s = re.sub(r"\s*[-–]\s*BOYS?\s*$", "", s, flags=re.IGNORECASE)
-    s = re.sub(r"\s*[-–]\s*G\s*$", "", s, flags=re.IGNORECASE)
-    s = re.sub(r"\s*[-–]\s*B\s*$", "", s, flags=re.IGNORECASE)
-    level_team_suffixes = [
-        r"\s*[-–]\s*VAR\s*$", r"\s*[-–]\s*VARSITY\s*$", r"\s*[-–]\s*JV\s*$",
-        r"\s*[-–]\s*V\s*$", r"\s*[-–]\s*JUNIOR\s+VARSITY\s*$",
-        r"\s*[-–]\s*RED\s*$", r"\s*[-–]\s*BLUE\s*$", r"\s*[-–]\s*WHITE\s*$",
-        r"\s*[-–]\s*GOLD\s*$", r"\s*[-–]\s*BLACK\s*$", r"\s*[-–]\s*ORANGE\s*$",
-        r"\s*[-–]\s*TEAM\s*\d+\s*$", r"\s*[-–]\s*#?\s*\d+\s*$",
-        r"\s*\(\s*V\s*\)\s*$", r"\s*VAR\s*$", r"\s*VARSITY\s*$", r"\s*JV\s*$",
-        r"\s*#\s*\d+\s*$", r"\s+\d+\s*$",
-    ]
-    for _ in range(5):
-        changed = False
-        for pat in level_team_suffixes:
-            next_s = re.sub(pat, "", s, flags=re.IGNORECASE)
-            if next_s != s: s = next_s.strip(); changed = True
-        if not changed: break
-    return s.strip()
-
-# Order matters: more specific first. Soccer vs Futsal: "FUTSAL SOCCER" → Futsal; "SOCCER" only → Soccer.
-SPORT_KEYWORDS_ORDERED = [
-    ("FLAG FOOTBALL", "Flag Football"), ("CROSS COUNTRY", "Cross Country"),
-    ("TRACK", "Track & Field"), ("ULTIMATE FRISBEE", "Ultimate Frisbee"),
-    ("BASKETBALL", "Basketball"), ("FUTSAL", "Futsal"), ("SOCCER", "Soccer"),
-    ("VOLLEYBALL", "Volleyball"), ("CHEER", "Cheerleading"), ("BASEBALL", "Baseball"),
-    ("SOFTBALL", "Softball"), ("WRESTLING", "Wrestling"), ("LACROSSE", "Lacrosse")
-]
-
-def normalize_sport_name(tab_name: str) -> str:
-    """Consolidated Student Roster and all charts use this. Futsal vs Soccer: tab with 'Futsal' → Futsal, else Soccer."""
-    core = _core_sport_string(tab_name)
-    if not core: return "Other"
-    # Explicit: "FUTSAL SOCCER" or any tab containing FUTSAL → Futsal (different sport from Soccer).
-    if "FUTSAL" in core:
-        return "Futsal"
-    for keyword, clean_name in SPORT_KEYWORDS_ORDERED:
-        if keyword in core: return clean_name
-    return "Other"
-
-def extract_season(tab_name: str) -> str:
-    s = str(tab_name).strip().upper()
-    s = _strip_tab_prefix(s)
-    if re.match(r"^\s*\(F\)", s): return "Fall"
-    if re.match(r"^\s*\(W\)", s): return "Winter"
-    if re.match(r"^\s*\(S\)", s): return "Spring"
-    return "Other"
-
-def normalize_gender(value) -> str:
-    s = str(value).strip().upper()
-    if s in ("M", "MALE", "BOY", "BOYS"): return "Boys"
-    if s in ("F", "FEMALE", "GIRL", "GIRLS"): return "Girls"
-    return "Other"
-
-def extract_level(tab_name: str) -> str:
-    name = str(tab_name).upper()
-    if "6TH" in name: return "6th Grade"
-    if "JV" in name or "JUNIOR VARSITY" in name: return "JV"
-    return "Varsity"
-
-# Team = color or number in tab name after stripping season, level, gender (e.g. Red, Blue, Yellow, 1, 2).
-TEAM_COLORS = ["RED", "BLUE", "WHITE", "GOLD", "BLACK", "ORANGE", "GREEN", "SILVER", "YELLOW", "MAROON", "NAVY", "PURPLE"]
-
-def extract_team(tab_name: str) -> str:
-    """After stripping season, gender, and level, last token = team if color or number. Else "—"."""
-    if not tab_name: return "—"
-    s = str(tab_name).strip().upper()
-    s = _strip_tab_prefix(s)
-    s = re.sub(r"^\s*\([FWS]\)\s*", "", s, flags=re.IGNORECASE)
-    s = re.sub(r"\s*[-–]\s*GIRLS?\s*$", "", s, flags=re.IGNORECASE)
-    s = re.sub(r"\s*[-–]\s*BOYS?\s*$", "", s, flags=re.IGNORECASE)
-    s = re.sub(r"\s*[-–]\s*G\s*$", "", s, flags=re.IGNORECASE)
-    s = re.sub(r"\s*[-–]\s*B\s*$", "", s, flags=re.IGNORECASE)
-    # Strip level from end so "FLAG FOOTBALL YELLOW JV" → last token = YELLOW not JV
-    for level_pat in [r"\s+JV\s*$", r"\s+VARSITY\s*$", r"\s+VAR\s*$", r"\s+V\s*$", r"\s+6TH\s*$", r"\s+JUNIOR\s+VARSITY\s*$"]:
-        s = re.sub(level_pat, "", s, flags=re.IGNORECASE).strip()
-    tokens = re.split(r"\s+|\s*[-–]\s*", s)
-    tokens = [t for t in tokens if t]
-    if not tokens: return "—"
-    last = tokens[-1]
-    if last in TEAM_COLORS: return last.title()
-    if last.isdigit(): return last
-    digits = re.sub(r"\D", "", last)
-    if digits and re.match(r"^(?:TEAM\s*)?#?\d+$", last.replace(" ", "")): return digits
-    return "—"
-
-def display_school_name(school: str) -> str:
-    s = str(school).strip()
-    s = re.sub(r"\s+Official\s+Sports\s+Roster\s+['\u2019]?\d{2}-\d{2}\s*$", "", s, flags=re.IGNORECASE)
-    s = re.sub(r"\s*(Official|Sports|Roster|['’]\d{2}-\d{2})\s*", " ", s, flags=re.IGNORECASE)
-    return re.sub(r"\s+", " ", s).strip()
-
-def physical_status(value) -> str:
-    """YES = physical complete (yes, approved, cleared, etc.). Otherwise NO."""
-    if value is None or (isinstance(value, float) and pd.isna(value)): return "NO"
-    s = str(value).strip().upper()
-    if not s: return "NO"
-    if s in ("YES", "Y", "APPROVED", "APPROVE", "CLEARED", "CLEAR", "COMPLETE", "DONE", "OK"): return "YES"
-    if s.startswith("APPROVED") or s.startswith("YES"): return "YES"
-    return "NO"
+@st.cache_data(ttl=600, show_spinner=False)
+def load_command_center(snapshot_version: int):
+    """Command Center fact tables from the scan cache; each scan refreshes them before publishing its snapshot."""
+    return command_center_metrics()
 
-# ---------------------------------------------------------------------------
-# Core Engine
-# ---------------------------------------------------------------------------
-
-def normalize_val(s):
-    if s is None or (isinstance(s, float) and pd.isna(s)): return ""
-    return str(s).strip()
-
-def find_header_row(rows):
-    for i, row in enumerate(rows[:HEADER_SEARCH_MAX_ROWS]):
-        if not row: continue
-        for cell in row:
-            if normalize_val(cell).upper() == "STUDENT ID": return i
-    return None
-
-def map_header_to_target(header_row):
-    result = {}
-    for target in TARGET_HEADERS:
-        aliases = HEADER_ALIASES.get(target, [target])
-        for col_idx, cell in enumerate(header_row):
-            norm = normalize_val(cell).upper().replace(" ", "")
-            for alias in aliases:
-                if norm == normalize_val(alias).upper().replace(" ", ""):
-                    result[target] = col_idx; break
-    return result
-
-def get_cell(row, col_idx, default=""):
-    if col_idx is None or col_idx >= len(row): return default
-    val = row[col_idx]
-    return str(val).strip() if val and not (isinstance(val, float) and pd.isna(val)) else default
-
-def parse_sheet_values(all_values, school_name: str, tab_name: str):
-    if not all_values: return []
-    h_idx = find_header_row(all_values)
-    if h_idx is None: return []
-    col_map = map_header_to_target(all_values[h_idx])
-    records = []
-    for row in all_values[h_idx + 1 :]:
-        sid = get_cell(row, col_map.get("STUDENT ID"))
-        fname = get_cell(row, col_map.get("First Name"))
-        lname = get_cell(row, col_map.get("Last Name"))
-        if sid.isdigit() and len(sid) >= 4 and fname and lname:
-            g_raw = get_cell(row, col_map.get("Gendar"))
-            records.append({
-                "School": school_name, "Sport": normalize_sport_name(tab_name),
-                "Level": extract_level(tab_name), "Season": extract_season(tab_name),
-                "Team": extract_team(tab_name),
-                "STUDENT ID": sid, "Last Name": lname, "First Name": fname,
-                "Gender": normalize_gender(g_raw), "GPA": get_cell(row, col_map.get("GPA")),
-                "PHYSICAL": get_cell(row, col_map.get("PHYSICAL"))
-            })
-    return records
-
-def _parse_json_with_private_key_newlines(s: str):
-    """Parse JSON when 'private_key' value contains literal newlines (invalid in strict JSON)."""
-    key = '"private_key"'
-    i = s.find(key)
-    if i == -1:
-        raise json.JSONDecodeError("No 'private_key' key found", s, 0)
-    i = s.find('"', i + len(key) + 1)  # skip to value opening quote
-    if i == -1:
-        raise json.JSONDecodeError("Malformed private_key", s, 0)
-    start = i + 1  # start of value content
-    end = start
-    while end < len(s):
-        if s[end] == "\\" and end + 1 < len(s):
-            end += 2
-            continue
-        if s[end] == '"':
-            break
-        end += 1
-    value = s[start:end]
-    fixed = value.replace("\r", "\\r").replace("\n", "\\n").replace("\t", "\\t")
-    new_s = s[:start] + fixed + s[end:]
-    return json.loads(new_s)
-
-def _get_creds():
-    """Use Streamlit secrets if set (deploy), else local service_account_2.json (local run)."""
-    scopes = ["https://www.googleapis.com/auth/drive.readonly", "https://www.googleapis.com/auth/spreadsheets.readonly"]
-
-    # 1) Try Streamlit Secrets (Cloud deploy)
-    if hasattr(st, "secrets") and st.secrets:
-        raw = None
-        for key in ("gcp_service_account", "GCP_SERVICE_ACCOUNT"):
-            try:
-                raw = st.secrets.get(key)
-                if raw is not None:
-                    break
-            except Exception:
-                continue
-        if raw is not None:
-            try:
-                if isinstance(raw, str):
-                    try:
-                        info = json.loads(raw)
-                    except json.JSONDecodeError as je:
-                        if "control character" in str(je).lower() or "line" in str(je).lower():
-                            info = _parse_json_with_private_key_newlines(raw)
-                        else:
-                            raise
-                else:
-                    info = json.loads(json.dumps(raw))  # normalize dict-like to plain dict
-                return Credentials.from_service_account_info(info, scopes=scopes)
-            except Exception as e:
-                raise RuntimeError(
-                    f"Secrets key 'gcp_service_account' is set but invalid: {e}. "
-                    "Check that the value is valid JSON or TOML with type, project_id, private_key_id, private_key, client_email."
-                ) from e
-        # Secrets exist but key missing — likely Cloud with wrong key name
-        try:
-            keys = list(st.secrets.keys()) if hasattr(st.secrets, "keys") else []
-        except Exception:
-            keys = []
-        raise FileNotFoundError(
-            "No credentials found. In Streamlit Cloud → Settings → Secrets, add a key named exactly: gcp_service_account. "
-            f"Current secret keys: {keys if keys else '(none)'}. "
-            "Value: paste your full service_account_2.json content as JSON, or use a [gcp_service_account] section with type, project_id, private_key, client_email, etc."
-        )
-
-    # 2) Local: use file
-    try:
-        return Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=scopes)
-    except FileNotFoundError:
-        raise FileNotFoundError(
-            "No credentials found. Add service_account_2.json locally or set gcp_service_account in Streamlit Secrets (Settings → Secrets)."
-        )
-
-@st.cache_data(ttl=600)
-def deep_scan(folder_id: str):
-    creds = _get_creds()
-    drive = build("drive", "v3", credentials=creds); sheets = build("sheets", "v4", credentials=creds)
-    response = drive.files().list(q=f"'{folder_id}' in parents and mimeType='application/vnd.google-apps.spreadsheet' and trashed=false", fields="files(id, name)").execute()
-    files = [(f["id"], f["name"]) for f in response.get("files", [])]
-    all_records = []
-    for i, (f_id, f_name) in enumerate(files):
-        if i > 0: time.sleep(DELAY_BETWEEN_SPREADSHEETS)
-        try:
-            meta_resp = sheets.spreadsheets().get(spreadsheetId=f_id, fields="sheets(properties(title,gridProperties(rowCount,columnCount)))").execute()
-            meta = [{"title": s["properties"]["title"], "rows": min(s["properties"]["gridProperties"].get("rowCount", 1000), MAX_ROWS_PER_SHEET), "cols": s["properties"]["gridProperties"].get("columnCount", 26)} for s in meta_resp.get("sheets", [])]
-            
-            # FIXED LINE: Replacement moved out of f-string
-            ranges = []
-            for m in meta:
-                safe_title = m['title'].replace("'", "''")
-                ranges.append(f"'{safe_title}'!A1:Z{m['rows']}")
-            
-            grids_resp = sheets.spreadsheets().values().batchGet(spreadsheetId=f_id, ranges=ranges, valueRenderOption="FORMATTED_VALUE").execute()
-            for m, grid in zip(meta, grids_resp.get("valueRanges", [])):
-                all_records.extend(parse_sheet_values(grid.get("values", []), f_name, m["title"]))
-        except: continue
-    if not all_records:
-        return pd.DataFrame(columns=["School", "Sport", "Level", "Season", "Team", "STUDENT ID", "Last Name", "First Name", "Gender", "GPA", "PHYSICAL"])
-    return pd.DataFrame(all_records)
+@st.cache_data(ttl=600, show_spinner=False)
+def load_dead_letters(snapshot_version: int) -> pd.DataFrame:
+    """Spreadsheets/tabs the scans could not load; refreshed with each published snapshot."""
+    return scan_dead_letters()
 
 # ---------------------------------------------------------------------------
 # UI Execution
@@ -323,197 +63,288 @@ div[data-testid="stMetric"] label { color: #374151 !important; }
 st.title("🏆 OUSD OAL Middle School Sports Data Center")
 st.caption("L and Q Company | Authorized Data Portal")
 
-if "roster_df" not in st.session_state: st.session_state["roster_df"] = None
+store = get_snapshot_store()
+store.load()  # adopt snapshots published by another process
+snap = store.current  # read once: filters, KPIs and every tab in this rerun see the same version
+rerun = Telemetry("rerun")
 
 with st.sidebar:
     st.header("Actions")
-    if st.button("🚀 Run Deep Scan", type="primary", use_container_width=True):
-        try:
-            with st.spinner("Processing Roster Data..."):
-                df = deep_scan(FOLDER_ID)
-            st.session_state["roster_df"] = df[~((df["First Name"].str.upper() == "LAMONT") & (df["Last Name"].str.upper() == "ROBINSON"))].copy()
-        except FileNotFoundError as e:
-            st.error(str(e))
-        except Exception as e:
-            st.error(f"Scan failed: {e}")
-
-    if st.button("🔄 Clear cache & rescan next", use_container_width=True, help="Clear cached roster so next Run Deep Scan re-parses (e.g. Futsal vs Soccer). Then click Run Deep Scan again."):
-        deep_scan.clear()
-        st.session_state["roster_df"] = None
-        st.success("Cache cleared. Click Run Deep Scan to reload.")
-
-    if st.session_state["roster_df"] is not None:
+    if st.button("🚀 Run Deep Scan", type="primary", use_container_width=True, help="Ask the background refresher to rescan the roster folder now. The dashboard keeps showing the current data until the new scan is ready."):
+        store.request_refresh()
+        st.success("Rescan started in the background.")
+
+    if st.button("🔄 Clear cache & rescan next", use_container_width=True, help="Clear cached roster (in memory and on disk) so the next scan re-parses every spreadsheet (e.g. Futsal vs Soccer)."):
+        store.request_refresh(clear_cache=True)
+        st.success("Cache cleared. Rescanning every spreadsheet in the background.")
+
+    if store.scanning:
+        done, total = store.progress
+        if total:
+            st.progress(done / total, text=f"Scanning… {done}/{total} spreadsheets")
+        else:
+            st.progress(0.0, text=f"Scanning… {done} spreadsheets so far, still listing folders" if done else "Listing roster spreadsheets…")
+    if store.error:
+        st.error(f"Scan failed: {store.error}")
+    if snap is not None:
+        st.caption(f"Data as of {snap.built_at.astimezone():%b %d, %Y %I:%M %p %Z} · v{snap.version}")
+        dead = load_dead_letters(snap.version)
+        if not dead.empty:
+            with st.expander(f"⚠️ {len(dead)} spreadsheet(s)/tab(s) not loaded", expanded=False):
+                st.caption("Spreadsheets that failed after retries keep their last good roster (if any) and are retried on every scan. "
+                           "A tab listed here could not be parsed; it is retried once its spreadsheet changes.")
+                st.dataframe(
+                    dead.assign(school=dead["school"].map(display_school_name), tab=dead["tab"].replace("", "(whole spreadsheet)"))
+                        .drop(columns="file_id").rename(columns={"school": "School", "tab": "Tab", "error": "Error", "attempts": "Attempts", "failed_at": "Last failed"}),
+                    hide_index=True, use_container_width=True,
+                )
+
+    if snap is not None:
         st.divider()
         st.header("Global Filters")
-        raw_df = st.session_state["roster_df"]
-        f_school = st.multiselect("School Site", options=sorted(raw_df["School"].unique()), default=raw_df["School"].unique())
-        f_level = st.multiselect("Level", options=sorted(raw_df["Level"].unique()), default=raw_df["Level"].unique())
+        filter_opts = snap.roster_index.options
+        f_school = st.multiselect("School Site", options=filter_opts["School"], default=filter_opts["School"])
+        f_level = st.multiselect("Level", options=filter_opts["Level"], default=filter_opts["Level"])
         f_season = st.multiselect("Season", options=["Fall", "Winter", "Spring"], default=["Fall", "Winter", "Spring"])
         f_gender = st.radio("Gender Focus", options=["All", "Boys", "Girls"])
-        team_opts = sorted(raw_df["Team"].dropna().unique().tolist()) if "Team" in raw_df.columns else []
+        team_opts = filter_opts.get("Team", [])
         # Include "—" (no sub-team) so "all selected" shows full roster; only filter when user picks a subset
         f_team = st.multiselect("Team (color/number)", options=team_opts, default=team_opts if team_opts else [], help="Filter by sub-team: Red, Blue, Yellow, 1, 2, etc. Leave all selected for full roster.") if team_opts else []
 
-df = st.session_state["roster_df"]
-if df is not None:
-    mask = (df["School"].isin(f_school)) & (df["Level"].isin(f_level)) & (df["Season"].isin(f_season))
-    if f_gender != "All": mask = mask & (df["Gender"] == f_gender)
-    if "Team" in df.columns and isinstance(f_team, list) and len(f_team) > 0: mask = mask & (df["Team"].isin(f_team))
-    
-    display_df = df[mask].copy()
-    display_df["GPA"] = pd.to_numeric(display_df["GPA"], errors="coerce")
-    df_with_gpa = display_df[display_df["GPA"].notna()]
-
-    # Summary KPI panels (styled for contrast: dark text on light background)
-    st.subheader("📈 Summary")
-    avg_gpa = df_with_gpa["GPA"].mean() if len(df_with_gpa) > 0 else 0
-    physicals_yes = (display_df["PHYSICAL"].apply(physical_status) == "YES").sum()
-    k1, k2, k3, k4 = st.columns(4)
-    k1.metric("Total Athletes", f"{len(display_df):,}")
-    k2.metric("Avg District GPA", f"{avg_gpa:.2f}" if len(df_with_gpa) > 0 else "—")
-    k3.metric("Physicals Cleared", f"{physicals_yes:,}")
-    k4.metric("Active Sports", display_df["Sport"].nunique())
-
-    # Tabs
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📊 DASHBOARD", "📋 DETAILED DATA", "🔍 SITE SPOT-CHECK", "🚩 FLAGS", "💰 Budget Request"])
-
-    with tab1:
-        st.subheader("Participation & Academic Trends")
-        c1, c2 = st.columns(2)
-        with c1:
-            st.markdown("**Participation by Sport**")
-            s_counts = display_df["Sport"].value_counts().reset_index()
-            st.bar_chart(s_counts, x="Sport", y="count", color="#ffc300")
-            
-            st.markdown("**Participation by Gender**")
-            g_counts = display_df["Gender"].value_counts().reset_index()
-            st.bar_chart(g_counts, x="Gender", y="count", color="#003566")
-
-        with c2:
-            st.markdown("**GPA average by School**")
-            gpa_s = df_with_gpa.groupby("School")["GPA"].mean().sort_values(ascending=False).reset_index()
-            gpa_s["School"] = gpa_s["School"].apply(display_school_name)
-            st.bar_chart(gpa_s, x="School", y="GPA", color="#003566")
-
-            st.markdown("**Medical Eligibility (Physicals)**")
-            p_counts = display_df["PHYSICAL"].apply(physical_status).value_counts().reset_index()
-            st.bar_chart(p_counts, x="PHYSICAL", y="count", color="#28a745")
-
-    with tab2:
-        st.subheader("Consolidated Student Roster")
-        roster_disp = display_df.copy()
-        roster_disp["School"] = roster_disp["School"].apply(display_school_name)
-        if "Team" in roster_disp.columns:
-            roster_disp = roster_disp.rename(columns={"Team": "Team Type"})
-            # Order columns so Team Type appears after Sport/Level (color or number for multiple teams per school)
-            cols = [c for c in ["School", "Sport", "Level", "Team Type", "Season", "STUDENT ID", "Last Name", "First Name", "Gender", "GPA", "PHYSICAL"] if c in roster_disp.columns]
-            roster_disp = roster_disp[[c for c in cols] + [c for c in roster_disp.columns if c not in cols]]
-        st.dataframe(roster_disp, use_container_width=True, height=500)
-        st.download_button("📥 Export CSV", roster_disp.to_csv(index=False), "roster.csv", "text/csv")
-
-    with tab3:
-        st.subheader("School-Level Deep Dive")
-        spot_df = df.copy()
-        spot_df["GPA"] = pd.to_numeric(spot_df["GPA"], errors="coerce")
-        spot_df["School_Disp"] = spot_df["School"].apply(display_school_name)
-        
-        school_sel = st.selectbox("Focus on School", options=["All schools"] + sorted(spot_df["School_Disp"].unique().tolist()))
-        
-        view_df = spot_df if school_sel == "All schools" else spot_df[spot_df["School_Disp"] == school_sel]
+    st.divider()
+    diagnostics = st.expander("🩺 Diagnostics")  # filled at the end of the rerun, once tab timings are known
+
+def _selection_key(selections: dict) -> tuple:
+    """Hashable form of the sidebar selections, for memoizing tab computations per (snapshot version, selections)."""
+    return tuple((dim, None if values is None else tuple(values)) for dim, values in selections.items())
+
+# Tab computations, memoized per snapshot version (and selections): a rerun that changes neither reuses them. The
+# snapshot itself is passed unhashed (leading underscore); its version stands in for it in the cache key.
+@st.cache_data(max_entries=16, show_spinner=False)
+def dashboard_frames(_snap, snapshot_version: int, selection_key: tuple):
+    view_cube = _snap.cube_index.view(dict(selection_key))
+    totals = view_cube[CUBE_MEASURES].sum()
+    s_counts = rollup(view_cube, "Sport").rename(columns={"athletes": "count"}).sort_values("count", ascending=False)[["Sport", "count"]]
+    g_counts = rollup(view_cube, "Gender").rename(columns={"athletes": "count"}).sort_values("count", ascending=False)[["Gender", "count"]]
+    gpa_s = rollup(view_cube, "School_Disp").loc[lambda r: r["gpa_n"] > 0]
+    gpa_s = gpa_s.assign(GPA=gpa_s["gpa_sum"] / gpa_s["gpa_n"]).sort_values("GPA", ascending=False).rename(columns={"School_Disp": "School"})[["School", "GPA"]]
+    p_counts = pd.DataFrame({"PHYSICAL": ["YES", "NO"], "count": [int(totals["cleared"]), int(totals["athletes"] - totals["cleared"])]})
+    p_counts = p_counts[p_counts["count"] > 0].sort_values("count", ascending=False)
+    return s_counts, g_counts, gpa_s, p_counts
+
+def roster_display(rows: pd.DataFrame) -> pd.DataFrame:
+    """Roster rows as the Detailed Data tab shows them."""
+    roster_disp = rows.drop(columns=["School", "physical_cleared"]).rename(columns={"School_Disp": "School"})
+    roster_disp["GPA"] = roster_disp["GPA"].astype("float64").round(4)  # float32 → float64 without the 3.2000000476… noise
+    if "Team" in roster_disp.columns:
+        roster_disp = roster_disp.rename(columns={"Team": "Team Type"})
+        # Order columns so Team Type appears after Sport/Level (color or number for multiple teams per school)
+        cols = [c for c in ["School", "Sport", "Level", "Team Type", "Season", "STUDENT ID", "Last Name", "First Name", "Gender", "GPA", "PHYSICAL"] if c in roster_disp.columns]
+        roster_disp = roster_disp[[c for c in cols] + [c for c in roster_disp.columns if c not in cols]]
+    return roster_disp
+
+ROSTER_PAGE_SIZES = [50, 100, 250, 500]
+ROSTER_SORT_COLUMNS = {"School": "School_Disp", "Team Type": "Team"}  # display name → roster column, where they differ
+ROSTER_ORDER = "Roster order"
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def roster_sort_order(_snap, snapshot_version: int, selection_key: tuple, sort_by: str, descending: bool):
+    """Row positions of the filtered roster in sort order; pages are slices of it, so only the visible page is built."""
+    column = _snap.roster_index.view(dict(selection_key))[ROSTER_SORT_COLUMNS.get(sort_by, sort_by)].reset_index(drop=True)
+    return column.sort_values(ascending=not descending, kind="stable", na_position="last").index.to_numpy()
+
+def roster_page(snap, selection_key: tuple, sort_by: str, descending: bool, start: int, page_size: int) -> pd.DataFrame:
+    view = snap.roster_index.view(dict(selection_key))
+    if sort_by == ROSTER_ORDER:
+        return roster_display(view.iloc[start : start + page_size])
+    return roster_display(view.iloc[roster_sort_order(snap, snap.version, selection_key, sort_by, descending)[start : start + page_size]])
+
+@st.cache_data(max_entries=4, show_spinner="Preparing export…")
+def roster_export(_snap, snapshot_version: int, selection_key: tuple, fmt: str) -> bytes:
+    """The whole filtered roster as a file; built when asked for, then cached per filter and format."""
+    return export_roster(roster_display(_snap.roster_index.view(dict(selection_key))), fmt)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def spot_check_stats(_snap, snapshot_version: int, school: str) -> pd.DataFrame:
+    cube = _snap.cube
+    spot_cube = cube if school == "All schools" else cube[cube["School_Disp"] == school]
+    stats = rollup(spot_cube, ["Level", "Sport"])
+    return stats.assign(Athletes=stats["athletes"], Avg_GPA=stats["gpa_sum"] / stats["gpa_n"])[["Level", "Sport", "Athletes", "Avg_GPA"]]
+
+FLAG_EMOJI = "🚩"
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def flag_tables(_snap, snapshot_version: int, selection_key: tuple):
+    """Summary table (share of athletes per rule, 🚩 over the rule's threshold), then one drill-down table per rule."""
+    flags = flag_summary(_snap.cube_index.view(dict(selection_key)), ["School_Disp", "Sport", "Level"]).rename(columns={"School_Disp": "School"})
+    summary_disp = flags[["School", "Sport", "Level"]].copy()
+    for rule in FLAG_RULES:
+        # Pad so column sort is numeric: "  0%", " 25%", "100%" then append 🚩 when over the threshold
+        pct = flags[f"{rule.key}_pct"].astype(str).str.rjust(3) + "%"
+        summary_disp[f"{rule.label} %"] = pct.where(~flags[f"{rule.key}_over"], pct + f" {FLAG_EMOJI}")
+    summary_disp = summary_disp.sort_values(["School", "Sport", "Level"])
+    drill_downs = [
+        flags.loc[flags[f"{rule.key}_n"] > 0, ["School", "Sport", "Level", f"{rule.key}_n"]]
+             .rename(columns={f"{rule.key}_n": "Athletes"}).sort_values("Athletes", ascending=False)
+        for rule in FLAG_RULES
+    ]
+    return summary_disp, drill_downs
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def command_center_tables(_snap, snapshot_version: int):
+    """(MetricFacts, schema key → fact table beside the rostered athletes for the same keys), or None before the first
+    ingest. Per snapshot version: a scan refreshes the fact tables before it publishes."""
+    metrics = load_command_center(snapshot_version)
+    if metrics is None: return None
+    tables = {}
+    for schema in METRIC_SCHEMAS:
+        joined = join_metric(metrics.tables[schema.key], _snap.cube)
+        keys = [key for key in METRIC_KEYS if key == "School" or (joined[key] != "All").any()]
+        table = joined[keys + [field.name for field in schema.fields]].copy()
+        table["athletes"] = joined["athletes"].round().astype("Int64")  # missing: no roster rows for those keys
+        tables[schema.key] = table
+    return metrics, tables
+
+def metric_column_label(name: str) -> str:
+    return "Rostered athletes" if name == "athletes" else name.replace("_pct", " %").replace("_", " ").capitalize()
+
+# Tab bodies. Each is a fragment: a widget inside one (the spot-check school picker, the export button) reruns only
+# that tab, not the KPIs or the other tabs.
+@st.fragment
+def dashboard_tab(snap, selection_key: tuple):
+    st.subheader("Participation & Academic Trends")
+    s_counts, g_counts, gpa_s, p_counts = dashboard_frames(snap, snap.version, selection_key)
+    c1, c2 = st.columns(2)
+    with c1:
+        st.markdown("**Participation by Sport**")
+        st.bar_chart(s_counts, x="Sport", y="count", color="#ffc300")
         
-        st.markdown(f"**Performance Breakdown: {school_sel}**")
-        stats = view_df.groupby(["Level", "Sport"]).agg(Athletes=("STUDENT ID", "count"), Avg_GPA=("GPA", "mean")).reset_index()
-        st.dataframe(stats.style.format({"Avg_GPA": "{:.3f}"}), use_container_width=True)
-
-    with tab4:
-        st.subheader("🚩 Data quality flags")
-        st.caption("School/sport combinations with missing or off data—e.g. athletes with no gender (shown as Other in Participation by Gender). Use this to follow up with coaches.")
-
-        # Summary: flag when missing data is >50% of athletes in each school/sport/level
-        flag_summary_df = display_df.copy()
-        flag_summary_df["School_disp"] = flag_summary_df["School"].apply(display_school_name)
-        flag_summary_df["_other_gender"] = (flag_summary_df["Gender"] == "Other").astype(int)
-        flag_summary_df["_missing_gpa"] = flag_summary_df["GPA"].isna().astype(int)
-        flag_summary_df["_incomplete_physical"] = (flag_summary_df["PHYSICAL"].apply(physical_status) != "YES").astype(int)
-        summary_grp = (
-            flag_summary_df.groupby(["School_disp", "Sport", "Level"], as_index=False)
-            .agg(
-                Total=("STUDENT ID", "count"),
-                Missing_gender_n=("_other_gender", "sum"),
-                Missing_GPA_n=("_missing_gpa", "sum"),
-                Incomplete_physical_n=("_incomplete_physical", "sum"),
-            )
-        )
-        FLAG_EMOJI = "🚩"
-        def _pct_cell(n, total, flag_emoji):
-            pct = int(round(n / total * 100, 0)) if total else 0
-            # Pad so column sort is numeric: "  0%", " 25%", "100%" then append 🚩 when >50%
-            base = f"{pct:>3}%"
-            return f"{base} {flag_emoji}" if total and (n / total > 0.5) else base
-        summary_grp["Missing gender %"] = summary_grp.apply(lambda r: _pct_cell(r["Missing_gender_n"], r["Total"], FLAG_EMOJI), axis=1)
-        summary_grp["Missing GPA %"] = summary_grp.apply(lambda r: _pct_cell(r["Missing_GPA_n"], r["Total"], FLAG_EMOJI), axis=1)
-        summary_grp["Incomplete physical %"] = summary_grp.apply(lambda r: _pct_cell(r["Incomplete_physical_n"], r["Total"], FLAG_EMOJI), axis=1)
-        summary_disp = summary_grp.rename(columns={"School_disp": "School"})[["School", "Sport", "Level", "Missing gender %", "Missing GPA %", "Incomplete physical %"]]
-        summary_disp = summary_disp.sort_values(["School", "Sport", "Level"])
-        st.markdown("**Summary: missing data &gt;50% of athletes**")
-        st.dataframe(summary_disp, use_container_width=True, hide_index=True)
-        st.caption("Percentages shown; 🚩 and red = more than half of athletes in that school/sport/level have that type of missing data.")
-
-        st.divider()
-        # Flag: Gender = Other (missing gender from coach)
-        other_gender = display_df[display_df["Gender"] == "Other"]
-        if len(other_gender) == 0:
-            st.success("No missing-gender flags in the current data. Every athlete has Boys/Girls recorded.")
+        st.markdown("**Participation by Gender**")
+        st.bar_chart(g_counts, x="Gender", y="count", color="#003566")
+
+    with c2:
+        st.markdown("**GPA average by School**")
+        st.bar_chart(gpa_s, x="School", y="GPA", color="#003566")
+
+        st.markdown("**Medical Eligibility (Physicals)**")
+        st.bar_chart(p_counts, x="PHYSICAL", y="count", color="#28a745")
+
+@st.fragment
+def detailed_data_tab(snap, selection_key: tuple):
+    st.subheader("Consolidated Student Roster")
+    query = st.text_input("🔎 Find a student", placeholder="Student ID or name, e.g. 1023 or Nguyen Mai", help="Searches every school, sport and team (ignores the sidebar filters). Each match lists every team the student is on.")
+    if query.strip():
+        matches = snap.search.search(query)
+        if matches.empty:
+            st.info(f"No student matches “{query.strip()}”.")
         else:
-            other_gender = other_gender.copy()
-            other_gender["School_disp"] = other_gender["School"].apply(display_school_name)
-            flag_school_sport = (
-                other_gender.groupby(["School_disp", "Sport", "Level"], as_index=False)
-                .agg(Other_gender_count=("STUDENT ID", "count"))
-            )
-            flag_school_sport = flag_school_sport.rename(columns={"School_disp": "School"})
-            flag_school_sport = flag_school_sport.sort_values("Other_gender_count", ascending=False)
-            st.markdown("**Missing gender (Other)** — coach did not record gender for these athletes:")
-            st.dataframe(flag_school_sport, use_container_width=True, hide_index=True)
-            st.caption(f"Total athletes with missing gender in current view: **{len(other_gender)}**")
-
+            students = matches["STUDENT ID"].nunique()
+            more = f" (first {SEARCH_MAX_STUDENTS} students; refine the search to narrow it)" if students >= SEARCH_MAX_STUDENTS else ""
+            st.caption(f"{students:,} student(s), {len(matches):,} roster row(s){more}")
+            st.dataframe(roster_display(matches), use_container_width=True, hide_index=True)
         st.divider()
-        # Flag: Missing GPA
-        missing_gpa = display_df[display_df["GPA"].isna()]
-        if len(missing_gpa) == 0:
-            st.success("No missing-GPA flags in the current data. Every athlete has a GPA recorded.")
-        else:
-            missing_gpa = missing_gpa.copy()
-            missing_gpa["School_disp"] = missing_gpa["School"].apply(display_school_name)
-            flag_gpa = (
-                missing_gpa.groupby(["School_disp", "Sport", "Level"], as_index=False)
-                .agg(Missing_GPA_count=("STUDENT ID", "count"))
-            )
-            flag_gpa = flag_gpa.rename(columns={"School_disp": "School"}).sort_values("Missing_GPA_count", ascending=False)
-            st.markdown("**Missing GPA** — coach did not record GPA for these athletes:")
-            st.dataframe(flag_gpa, use_container_width=True, hide_index=True)
-            st.caption(f"Total athletes with missing GPA in current view: **{len(missing_gpa)}**")
-
+    # Server-side paging: only the visible page goes to the browser, however large the filtered roster is.
+    total = len(snap.roster_index.view(dict(selection_key)))
+    sort_col, order_col, size_col, page_col = st.columns([2, 1, 1, 1])
+    sort_by = sort_col.selectbox("Sort by", [ROSTER_ORDER] + list(roster_display(snap.roster.iloc[:0]).columns))
+    descending = order_col.selectbox("Order", ["Ascending", "Descending"], disabled=sort_by == ROSTER_ORDER) == "Descending"
+    page_size = size_col.selectbox("Rows per page", ROSTER_PAGE_SIZES, index=ROSTER_PAGE_SIZES.index(100))
+    pages = max(1, -(-total // page_size))
+    page = int(page_col.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, step=1))
+    start = (min(page, pages) - 1) * page_size
+    st.dataframe(roster_page(snap, selection_key, sort_by, descending, start, page_size), use_container_width=True, height=500)
+    st.caption(f"Rows {min(start + 1, total):,}–{min(start + page_size, total):,} of {total:,}")
+
+    # Exports are built only on request (not on every rerun), cached per filter and format.
+    fmt_col, export_col = st.columns([1, 3])
+    fmt = fmt_col.selectbox("Export format", list(EXPORT_FORMATS), label_visibility="collapsed")
+    export_key = (snap.version, selection_key, fmt)
+    if st.session_state.get("roster_export_key") == export_key:
+        extension, mime = EXPORT_FORMATS[fmt]
+        data = roster_export(snap, *export_key)
+        export_col.download_button(f"📥 Export {fmt} ({len(data) / 1024:,.0f} KB)", data, f"roster.{extension}", mime)
+    else:
+        export_col.button(f"📦 Prepare {fmt} export", on_click=lambda: st.session_state.update(roster_export_key=export_key))
+
+@st.fragment
+def spot_check_tab(snap):
+    st.subheader("School-Level Deep Dive")
+    school_sel = st.selectbox("Focus on School", options=["All schools"] + sorted(snap.cube["School_Disp"].unique().tolist()))
+    
+    st.markdown(f"**Performance Breakdown: {school_sel}**")
+    stats = spot_check_stats(snap, snap.version, school_sel)
+    st.dataframe(stats.style.format({"Avg_GPA": "{:.3f}"}), use_container_width=True)
+
+@st.fragment
+def flags_tab(snap, selection_key: tuple):
+    st.subheader("🚩 Data quality flags")
+    st.caption("School/sport combinations with missing or off data—e.g. athletes with no gender (shown as Other in Participation by Gender). Use this to follow up with coaches.")
+    summary_disp, drill_downs = flag_tables(snap, snap.version, selection_key)
+    st.markdown("**Summary: missing data &gt;50% of athletes**")
+    st.dataframe(summary_disp, use_container_width=True, hide_index=True)
+    st.caption("Percentages shown; 🚩 and red = more than half of athletes in that school/sport/level have that type of missing data.")
+
+    # One drill-down per rule in FLAG_RULES (roster_engine.register_flag_rule adds more)
+    for rule, flagged in zip(FLAG_RULES, drill_downs):
         st.divider()
-        # Flag: Missing or incomplete physicals (anything other than Yes / Approved)
-        incomplete_physical = display_df[display_df["PHYSICAL"].apply(physical_status) != "YES"]
-        if len(incomplete_physical) == 0:
-            st.success("No missing/incomplete physical flags. Every athlete has a physical marked Yes or Approved.")
+        if len(flagged) == 0:
+            st.success(rule.all_clear)
         else:
-            incomplete_physical = incomplete_physical.copy()
-            incomplete_physical["School_disp"] = incomplete_physical["School"].apply(display_school_name)
-            flag_physical = (
-                incomplete_physical.groupby(["School_disp", "Sport", "Level"], as_index=False)
-                .agg(Incomplete_physical_count=("STUDENT ID", "count"))
-            )
-            flag_physical = flag_physical.rename(columns={"School_disp": "School"}).sort_values("Incomplete_physical_count", ascending=False)
-            st.markdown("**Missing or incomplete physicals** — anything other than Yes / Approved (e.g. blank, pending, no date):")
-            st.dataframe(flag_physical, use_container_width=True, hide_index=True)
-            st.caption(f"Total athletes with missing/incomplete physical in current view: **{len(incomplete_physical)}**")
-
-    with tab5:
-        st.subheader("Budget Request")
-        st.markdown("""
+            st.markdown(rule.heading)
+            st.dataframe(flagged, use_container_width=True, hide_index=True)
+            st.caption(f"Total athletes flagged ({rule.label}) in current view: **{int(flagged['Athletes'].sum())}**")
+
+@st.fragment
+def history_tab(snap):
+    st.subheader("Season-over-Season History")
+    st.caption("Every complete scan is recorded by school year. Returning athletes are matched by Student ID in the following school year, at any school.")
+    partitions, returns_school, returns_sport, multi, moves = load_history_metrics(snap.version)
+    if partitions.empty:
+        st.info("No history yet: the first complete scan starts it.")
+    else:
+        years = sorted(partitions["year_start"].unique())
+        st.caption("School years on record: " + ", ".join(school_year_label(y) for y in years) + f" · last recorded {partitions['scanned_on'].max()}")
+        if returns_school.empty:
+            st.info("Return rates need rosters from two consecutive school years.")
+        else:
+            def _with_rate(frame):
+                return frame.assign(**{"School Year": frame["year_start"].map(school_year_label), "Return rate": (frame["returned"] / frame["athletes"]).map("{:.0%}".format)}).drop(columns="year_start")
+            h1, h2 = st.columns(2)
+            with h1:
+                st.markdown("**Student return rate by school**")
+                st.dataframe(_with_rate(returns_school), use_container_width=True, hide_index=True)
+            with h2:
+                st.markdown("**Student return rate by sport**")
+                st.dataframe(_with_rate(returns_sport), use_container_width=True, hide_index=True)
+            st.markdown(f"**School transfers** — {len(moves):,} athletes rostered at a different school the next year")
+            st.dataframe(moves.assign(year_start=moves["year_start"].map(school_year_label)).rename(columns={"year_start": "From year", "student_id": "STUDENT ID", "from_school": "From", "to_school": "To"}), use_container_width=True, hide_index=True)
+        st.markdown("**Multi-sport participation**")
+        st.dataframe(multi.assign(year_start=multi["year_start"].map(school_year_label), **{"Multi-sport %": (multi["multi_sport"] / multi["athletes"]).map("{:.0%}".format)}).rename(columns={"year_start": "School Year", "school": "School"}), use_container_width=True, hide_index=True)
+
+@st.fragment
+def command_center_tab(snap):
+    st.subheader("Command Center Metrics")
+    command_center = command_center_tables(snap, snap.version)
+    if command_center is None:
+        st.info(f"“{COMMAND_CENTER_NAME}” has not been read yet. It is fetched after each scan once the sheet is shared with the service account.")
+        return
+    metrics, tables = command_center
+    st.caption(f"From “{COMMAND_CENTER_NAME}”, edited {metrics.modified_time[:16].replace('T', ' ')} UTC. Rostered athletes are counted from the "
+               "current roster for the same school, and sport / season where the tab breaks down by them (all athletes; the sidebar filters do not apply).")
+    for schema in METRIC_SCHEMAS:
+        st.divider()
+        tab, table = metrics.tabs[schema.key], tables[schema.key]
+        st.markdown(f"**{schema.label}** · tab “{tab}”" if tab else f"**{schema.label}**")
+        if table.empty:
+            st.info("No rows reported yet." if tab else "No tab for this metric in the Command Center sheet.")
+            continue
+        st.caption(f"{int(table[schema.value].notna().sum())} of {len(table)} rows report a value.")
+        st.dataframe(table.rename(columns=metric_column_label), use_container_width=True, hide_index=True)
+
+@st.fragment
+def budget_request_tab():
+    st.subheader("Budget Request")
+    st.markdown("""
 **OUSD OAL Middle School Athletics Data Center**  
 *District-Wide Eligibility + Compliance + Retention Metrics (17 Middle Schools)*
 
@@ -639,5 +470,84 @@ A working internal dashboard was built to provide district-wide visibility and e
 Approve funding to initiate a consultant services engagement with L and Q Company to productionize the existing district-wide dashboard and integrate the commissioner’s Command Center 2026 compliance and retention metrics for reporting across 17 middle schools.
 """)
 
+def lazy_tabs(labels):
+    """st.tabs that runs only the selected tab's body: (container, is_open) pairs. Switching tabs reruns the script
+    with the new tab open."""
+    return [(tab, tab.open) for tab in st.tabs(labels, key="main_tabs", on_change="rerun")]
+
+if snap is not None:
+    if snap.partial:
+        of_total = f" of {snap.total}" if snap.total is not None else ""
+        st.warning(f"Loading rosters: showing {snap.done}{of_total} spreadsheets so far. This page updates as schools land.")
+    selections = {
+        "School": f_school, "Level": f_level, "Season": f_season,
+        "Gender": None if f_gender == "All" else [f_gender],
+        "Team": f_team if isinstance(f_team, list) and len(f_team) > 0 else None,
+    }
+    selection_key = _selection_key(selections)
+    with rerun.span("filter_views"):
+        view_cube = snap.cube_index.view(selections)
+        totals = view_cube[CUBE_MEASURES].sum()
+
+    # Summary KPI panels (styled for contrast: dark text on light background)
+    st.subheader("📈 Summary")
+    avg_gpa = totals["gpa_sum"] / totals["gpa_n"] if totals["gpa_n"] > 0 else 0
+    k1, k2, k3, k4 = st.columns(4)
+    k1.metric("Total Athletes", f"{int(totals['athletes']):,}")
+    k2.metric("Avg District GPA", f"{avg_gpa:.2f}" if totals["gpa_n"] > 0 else "—")
+    k3.metric("Physicals Cleared", f"{int(totals['cleared']):,}")
+    k4.metric("Active Sports", view_cube["Sport"].nunique())
+
+    # Tabs: only the open one is computed
+    (tab1, open1), (tab2, open2), (tab3, open3), (tab4, open4), (tab5, open5), (tab6, open6), (tab7, open7) = lazy_tabs(
+        ["📊 DASHBOARD", "📋 DETAILED DATA", "🔍 SITE SPOT-CHECK", "🚩 FLAGS", "📆 HISTORY", "🏛️ COMMAND CENTER", "💰 Budget Request"])
+    if open1:
+        with tab1, rerun.span("tab.dashboard"): dashboard_tab(snap, selection_key)
+    if open2:
+        with tab2, rerun.span("tab.detailed_data"): detailed_data_tab(snap, selection_key)
+    if open3:
+        with tab3, rerun.span("tab.spot_check"): spot_check_tab(snap)
+    if open4:
+        with tab4, rerun.span("tab.flags"): flags_tab(snap, selection_key)
+    if open5:
+        with tab5, rerun.span("tab.history"): history_tab(snap)
+    if open6:
+        with tab6, rerun.span("tab.command_center"): command_center_tab(snap)
+    if open7:
+        with tab7, rerun.span("tab.budget_request"): budget_request_tab()
+
+elif store.scanning:
+    st.info("⏳ Loading rosters in the background… the dashboard appears as the first schools land.")
 else:
-    st.info("👈 Run Deep Scan from the sidebar to begin.")
\ No newline at end of file
+    st.info("👈 Run Deep Scan from the sidebar to begin.")
+
+rerun.finish()
+with diagnostics:
+    st.caption(f"This rerun: {rerun.summary()['ms']:,.0f} ms")
+    st.dataframe(rerun.span_frame(), hide_index=True, use_container_width=True)
+    scan = store.last_scan
+    if scan is None:
+        st.caption("No scan has finished yet.")
+    else:
+        scan_summary = scan.summary()
+        st.caption(f"Last scan: {scan_summary['ms'] / 1000:,.1f} s, started {scan.started_at.astimezone():%b %d %I:%M %p}")
+        st.dataframe(pd.DataFrame(sorted(scan_summary["counters"].items()), columns=["Counter", "Value"]), hide_index=True, use_container_width=True)
+        st.dataframe(scan.span_frame(), hide_index=True, use_container_width=True)
+        skipped = [e for e in scan.events if e.get("event") == "spreadsheet_skipped"]
+        for e in skipped:
+            st.warning(f"Skipped {display_school_name(e['school'])}: {e['error']}")
+    if snap is not None:
+        templates = load_header_templates(snap.version)
+        if not templates.empty:
+            st.caption(f"Roster header templates in use: {len(templates)}")
+            st.dataframe(templates, hide_index=True, use_container_width=True)
+        metrics = load_command_center(snap.version)
+        if metrics is not None:
+            st.caption(f"Command Center metrics: sheet edited {metrics.modified_time[:16].replace('T', ' ')} UTC, fetched {metrics.fetched_at.astimezone():%b %d %I:%M %p}")
+            st.dataframe(metrics.freshness().drop(columns=["sheet edited", "fetched"]), hide_index=True, use_container_width=True)
+    if TELEMETRY_LOG_PATH: st.caption(f"Scans are logged as JSON lines to `{TELEMETRY_LOG_PATH}`.")
+
+# Until the first complete snapshot exists, poll so partial snapshots show up without a click.
+if store.scanning and (snap is None or snap.partial):
+    time.sleep(SNAPSHOT_POLL_SECONDS)
+    st.rerun()
\ No newline at end of file
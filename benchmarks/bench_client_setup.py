@@ -0,0 +1,65 @@
+"""
+Per-scan Google client setup: rebuilding credentials and discovery services every scan vs the cached GoogleClients.
+
+Uses a throwaway service-account key and the discovery documents bundled with google-api-python-client, so it runs
+offline. The old path parsed the key and built one Drive service plus one Sheets service per fetch worker on every
+scan; the cached path pays that once per process (per worker thread) and then only looks services up. Connection
+reuse (TLS handshakes per spreadsheet) needs the live API: see the http_connections counter under Diagnostics.
+
+Run from the repo root:  python benchmarks/bench_client_setup.py [--scans 20]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import roster_engine  # noqa: E402
+
+def throwaway_service_account() -> str:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()).decode()
+    return json.dumps({
+        "type": "service_account", "project_id": "bench", "private_key_id": "bench", "private_key": pem,
+        "client_email": "bench@bench.iam.gserviceaccount.com", "client_id": "1", "token_uri": "https://oauth2.googleapis.com/token",
+    })
+
+def setup_per_scan():
+    creds = roster_engine._get_creds()
+    roster_engine.build("drive", "v3", credentials=creds)
+    for _ in range(roster_engine.FETCH_WORKERS):
+        roster_engine.build("sheets", "v4", credentials=creds)
+
+def setup_cached():
+    clients = roster_engine.get_google_clients()
+    clients.service("drive", "v3")
+    for _ in range(roster_engine.FETCH_WORKERS):
+        clients.service("sheets", "v4")  # same thread here; each fetch worker thread builds its own once
+
+def ms_per_scan(fn, scans: int) -> float:
+    start = time.perf_counter()
+    for _ in range(scans): fn()
+    return (time.perf_counter() - start) / scans * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scans", type=int, default=20, help="setups timed per path")
+    scans = parser.parse_args().scans
+    os.environ["GCP_SERVICE_ACCOUNT"] = throwaway_service_account()
+    before = ms_per_scan(setup_per_scan, scans)
+    start = time.perf_counter()
+    setup_cached()
+    first = (time.perf_counter() - start) * 1000
+    after = ms_per_scan(setup_cached, scans)
+    print(f"{scans} scans, {roster_engine.FETCH_WORKERS} fetch workers")
+    print(f"rebuilt every scan:  {before:8.2f} ms/scan")
+    print(f"cached, first scan:  {first:8.2f} ms")
+    print(f"cached, later scans: {after:8.4f} ms/scan  ({before / max(after, 1e-6):,.0f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Command Center ingest: one request per metric tab vs the shared batched path, against the local Google API stand-in.
+
+"Per tab" is what wiring each metric up on its own would cost: for each of the five metric tabs, the tab titles and
+then that tab's values (two Sheets reads each, one after the other). "Batched" is ingest_command_center on a cold
+cache: one Drive lookup, the tab titles and one batchGet of every metric tab. "Unchanged" is the same ingest when the
+spreadsheet's modifiedTime has not moved: the Drive lookup only, the fact tables come from the scan cache. The fact
+tables are checked to be the same.
+
+Run from the repo root:  python benchmarks/bench_command_center.py [--schools 17] [--latency 0.15]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import roster_engine  # noqa: E402
+import google_standin  # noqa: E402
+
+def per_tab() -> dict:
+    sheets = roster_engine.get_google_clients().service("sheets", "v4")
+    limiter, tables = roster_engine.get_sheets_limiter(), {}
+    for schema in roster_engine.METRIC_SCHEMAS:
+        grids = roster_engine.fetch_metric_tabs(sheets, "synthetic-command-center", limiter, schemas=[schema])
+        _, rows = grids[schema.key]
+        tables[schema.key] = roster_engine.parse_metric_tab(schema, rows)
+    return tables
+
+def timed(backend, fn):
+    calls, start = backend.calls, time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start, backend.calls - calls
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--schools", type=int, default=17)
+    parser.add_argument("--latency", type=float, default=0.15, help="seconds added to every API call")
+    args = parser.parse_args()
+
+    dataset = google_standin.generate(args.schools, 1, command_center=True)
+    backend = google_standin.install(roster_engine, google_standin.ReplayBackend(dataset, latency=args.latency))
+    roster_engine.SHEETS_READS_PER_MINUTE, roster_engine.SHEETS_READ_BURST = 60_000, 1_000
+    os.chdir(tempfile.mkdtemp(prefix="bench_command_center_"))  # the scan cache lives at a relative path
+
+    separate, separate_s, separate_calls = timed(backend, per_tab)
+    batched, batched_s, batched_calls = timed(backend, roster_engine.ingest_command_center)
+    cached, cached_s, cached_calls = timed(backend, roster_engine.ingest_command_center)
+    for key, table in separate.items():
+        pd.testing.assert_frame_equal(table, batched.tables[key])
+        pd.testing.assert_frame_equal(table, cached.tables[key])
+    rows = sum(len(t) for t in batched.tables.values())
+    print(f"{len(batched.tables)} metric tabs, {args.schools} schools, {rows:,} fact rows, latency {args.latency}s (fact tables identical)")
+    print(f"per tab:              {separate_calls:>3} API calls  {separate_s:6.2f} s")
+    print(f"batched, cold cache:  {batched_calls:>3} API calls  {batched_s:6.2f} s")
+    print(f"batched, unchanged:   {cached_calls:>3} API calls  {cached_s:6.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Roster parser cost at the real tab-size distribution: per-row dicts vs per-tab column operations vs parse_roster_tabs.
+
+The district is google_standin's synthetic one, fetched through fetch_roster_tabs as a scan would: by default 40
+schools of 4-8 roster tabs with 15-25 rows each, the shape of the live folder. "Per-row dicts" is the original
+builder (one dict per athlete, get_cell per cell); "column ops per tab" is parse_roster_frame on one frame per tab,
+where the fixed cost of each column operation is paid per 20-row tab; "parse_roster_tabs" is what the scan runs:
+the mapped columns pulled out as lists, then cell by cell. The three are checked to produce the same roster.
+Raise --athletes for long tabs (the fetch caps a tab at MAX_ROWS_PER_SHEET rows).
+
+Run from the repo root:  python benchmarks/bench_grid_parser.py [--schools 40] [--athletes 94]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import roster_engine  # noqa: E402
+import google_standin  # noqa: E402
+
+REPEATS = 5
+
+def stitched_rows(tab):
+    """A fetched tab as the full-width rows the per-row builder reads, plus its column map into them."""
+    cells, n_rows = roster_engine._tab_columns(tab.run_values, tab.runs, tab.col_map)
+    targets = list(cells)
+    return [[cells[t][i] for t in targets] for i in range(n_rows)], {t: k for k, t in enumerate(targets)}
+
+def per_row_dicts(name, tabs):
+    records = []
+    for tab in tabs:
+        rows, col_map = stitched_rows(tab)
+        for row in rows:
+            sid = roster_engine.get_cell(row, col_map.get("STUDENT ID"))
+            fname = roster_engine.get_cell(row, col_map.get("First Name"))
+            lname = roster_engine.get_cell(row, col_map.get("Last Name"))
+            if sid.isdigit() and len(sid) >= 4 and fname and lname:
+                records.append({
+                    "School": name, "Sport": roster_engine.normalize_sport_name(tab.title), "Level": roster_engine.extract_level(tab.title),
+                    "Season": roster_engine.extract_season(tab.title), "Team": roster_engine.extract_team(tab.title),
+                    "STUDENT ID": sid, "Last Name": lname, "First Name": fname,
+                    "Gender": roster_engine.normalize_gender(roster_engine.get_cell(row, col_map.get("Gendar"))),
+                    "GPA": roster_engine.get_cell(row, col_map.get("GPA")), "PHYSICAL": roster_engine.get_cell(row, col_map.get("PHYSICAL")),
+                })
+    return pd.DataFrame(records, columns=roster_engine.ROSTER_COLUMNS)
+
+def column_ops_per_tab(name, tabs):
+    frames = []
+    for tab in tabs:
+        rows, col_map = stitched_rows(tab)
+        frames.append(roster_engine.parse_roster_frame(pd.DataFrame(rows, dtype=object), col_map, name, tab.title))
+    return roster_engine.concat_rosters(frames)
+
+def parse_roster_tabs(name, tabs):
+    return roster_engine.parse_roster_tabs(name, tabs)[0]
+
+def timed(parse, books):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = [parse(name, tabs) for name, tabs in books]
+        best = min(best, time.perf_counter() - start)
+    return best, roster_engine.concat_rosters(result)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--schools", type=int, default=40)
+    parser.add_argument("--athletes", type=int, default=94, help="athletes per school, spread over its 4-8 roster tabs")
+    args = parser.parse_args()
+
+    dataset = google_standin.generate(args.schools, args.athletes, seed=3)
+    google_standin.install(roster_engine, google_standin.ReplayBackend(dataset))
+    sheets = roster_engine.get_google_clients().service("sheets", "v4")
+    limiter = roster_engine.TokenBucket(60_000, 1_000)
+    books = [(f["name"], roster_engine.fetch_roster_tabs(sheets, f["id"], f["name"], limiter)) for f in dataset["files"]["files"]]
+    tab_rows = [len(tab.run_values[0]) for _, tabs in books for tab in tabs if tab.run_values]
+
+    results = {label: timed(parse, books) for label, parse in
+               (("per-row dicts", per_row_dicts), ("column ops per tab", column_ops_per_tab), ("parse_roster_tabs", parse_roster_tabs))}
+    expected = results["per-row dicts"][1]
+    for label, (_, roster) in results.items():
+        pd.testing.assert_frame_equal(roster.astype(object), expected.astype(object), obj=label)
+    print(f"{len(books)} spreadsheets, {len(tab_rows)} roster tabs of {min(tab_rows)}-{max(tab_rows)} rows, "
+          f"{sum(tab_rows):,} grid rows → {len(expected):,} athletes (outputs identical)")
+    for label, (seconds, _) in results.items():
+        print(f"{label + ':':<20} {seconds * 1000:8.1f} ms  {sum(tab_rows) / seconds:12,.0f} rows/s")
+
+if __name__ == "__main__":
+    main()
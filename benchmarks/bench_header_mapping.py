@@ -0,0 +1,67 @@
+"""
+Header row → column map: the old targets × columns × aliases loop vs the precomputed alias map vs the template cache.
+
+"Before" re-normalizes every alias for every header cell of every tab (the old map_header_to_target); "alias map"
+is the current map_header_to_target (one dict lookup per column); "templates" resolves through HeaderTemplates,
+where a tab whose header matches a template already seen costs one fingerprint and one lookup. The headers are a few
+templates repeated across tabs, with occasional one-off edits, as coaches' copies are.
+
+Run from the repo root:  python benchmarks/bench_header_mapping.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import roster_engine  # noqa: E402
+
+TEMPLATES = [
+    ["#", "STUDENT ID", "Last Name", "First Name", "Gender", "Grade", "GPA", "Physical"],
+    ["Student ID", "Last name", "First name", "Gendar", "Year", "Gpa", "Physical Clearance", "Parent Phone", "Notes"],
+    ["#", "student id", "Lname", "Fname", "Gender", "Grade Year", "GPA", "Physical Date", "Emergency Contact", "Uniform #"],
+]
+TABS = 20_000
+
+def map_header_per_alias(header_row):
+    result = {}
+    for target in roster_engine.TARGET_HEADERS:
+        aliases = roster_engine.HEADER_ALIASES.get(target, [target])
+        for col_idx, cell in enumerate(header_row):
+            norm = roster_engine.normalize_val(cell).upper().replace(" ", "")
+            for alias in aliases:
+                if norm == roster_engine.normalize_val(alias).upper().replace(" ", ""):
+                    result[target] = col_idx; break
+    return result
+
+def make_headers(n: int, seed: int = 1):
+    rng = random.Random(seed)
+    headers = []
+    for _ in range(n):
+        header = list(rng.choice(TEMPLATES))
+        if rng.random() < 0.02: header.append(f"Extra {rng.randrange(5)}")  # a coach added a column
+        headers.append(header)
+    return headers
+
+def tabs_per_second(fn, headers) -> float:
+    start = time.perf_counter()
+    for header in headers: fn(header)
+    return len(headers) / (time.perf_counter() - start)
+
+def main():
+    headers = make_headers(TABS)
+    templates = roster_engine.HeaderTemplates()
+    maps = [map_header_per_alias(h) for h in headers]
+    assert maps == [roster_engine.map_header_to_target(h) for h in headers] == [templates.resolve(h, "bench") for h in headers]
+    templates = roster_engine.HeaderTemplates()
+    before = tabs_per_second(map_header_per_alias, headers)
+    alias_map = tabs_per_second(roster_engine.map_header_to_target, headers)
+    cached = tabs_per_second(lambda h: templates.resolve(h, "bench"), headers)
+    print(f"{TABS:,} header rows, {len(templates.templates)} distinct templates (column maps identical)")
+    print(f"per-alias loop:   {before:>10,.0f} tabs/s")
+    print(f"alias map:        {alias_map:>10,.0f} tabs/s  ({alias_map / before:.1f}x)")
+    print(f"template cache:   {cached:>10,.0f} tabs/s  ({cached / before:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Detailed Data tab rerun cost: the whole filtered roster plus an eager CSV vs one sorted page, and the exports on demand.
+
+"Before" is what every rerun of the tab used to do: build the display frame for every filtered row, serialize it to
+Arrow for st.dataframe (the browser payload), and to_csv it to arm the download button. "Page" sorts once (the sort
+order is cached per filter and column, so that is paid on the first rerun only), then builds and serializes just one
+page. The exports are timed separately: they now run only when someone asks for one.
+
+Run from the repo root:  python benchmarks/bench_roster_page.py [--athletes 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pyarrow as pa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import roster_engine  # noqa: E402
+from bench_student_search import synthetic_roster  # noqa: E402
+
+PAGE_SIZE = 100
+REPEATS = 5
+
+def display(rows):
+    """The Detailed Data tab's column layout (app.roster_display without importing streamlit)."""
+    rows = rows.drop(columns=["School", "physical_cleared"]).rename(columns={"School_Disp": "School", "Team": "Team Type"})
+    return rows.assign(GPA=rows["GPA"].astype("float64").round(4))
+
+def arrow_bytes(frame) -> int:
+    sink = pa.BufferOutputStream()
+    table = pa.Table.from_pandas(frame)
+    with pa.ipc.new_stream(sink, table.schema) as writer: writer.write_table(table)
+    return sink.getvalue().size
+
+def whole_roster(view):
+    frame = display(view)
+    return arrow_bytes(frame), frame.to_csv(index=False)
+
+def one_page(view, order, page: int):
+    return arrow_bytes(display(view.iloc[order[page * PAGE_SIZE : (page + 1) * PAGE_SIZE]]))
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(REPEATS): result = fn()
+    return (time.perf_counter() - start) / REPEATS * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--athletes", type=int, default=100_000, help="roster rows")
+    n = parser.parse_args().athletes
+    view = synthetic_roster(n)
+    before_ms, (before_bytes, _) = timed(lambda: whole_roster(view))
+    sort_ms, order = timed(lambda: view["GPA"].reset_index(drop=True).sort_values(ascending=False, kind="stable").index.to_numpy())
+    page_ms, page_bytes = timed(lambda: one_page(view, order, 3))
+    print(f"{n:,} filtered roster rows, {PAGE_SIZE} rows per page")
+    print(f"whole roster + eager CSV, every rerun: {before_ms:8.1f} ms  {before_bytes / 1e6:8.2f} MB to the browser")
+    print(f"one page sorted by GPA,   every rerun: {page_ms:8.1f} ms  {page_bytes / 1e6:8.2f} MB to the browser")
+    print(f"  sort order (first rerun per filter and column): {sort_ms:.1f} ms")
+    for fmt in roster_engine.EXPORT_FORMATS:
+        export_ms, data = timed(lambda: roster_engine.export_roster(display(view), fmt))
+        print(f"{fmt + ' export, on demand:':<39}{export_ms:8.1f} ms  {len(data) / 1e6:8.2f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Scan pipeline: cold scans against the local Google API stand-in, inline (one fetch thread: download a spreadsheet,
+parse it, then the next) vs pipelined over several fetch threads, at a fixed per-call latency.
+
+For each fetch-thread count it reports wall time, the speedup over the inline scan, and the summed parse time (the
+"parse_tab" spans) with its share of the inline wall time. The speedup is what overlapping the stages buys: while one
+thread parses, the others keep requests in flight, and the crawl streams spreadsheets in as it lists them. The parse
+share bounds what moving parsing off the fetch threads (e.g. to worker processes) could still save; it is reported as
+seconds, not as a ratio to parse time, so a tiny parse total does not turn wall-clock jitter into a big percentage.
+Use --latency to model the live API's round trips.
+
+Run from the repo root:
+    python benchmarks/bench_scan_pipeline.py [--schools 60] [--athletes 400] [--latency 0.05] [--fetch-workers 1 2 4 8]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import roster_engine  # noqa: E402
+import google_standin  # noqa: E402
+
+def configure(fetch_workers: int):
+    """Resize the long-lived fetch pool: it reads FETCH_WORKERS when first created."""
+    if roster_engine._fetch_pool is not None:
+        roster_engine._fetch_pool.shutdown()
+        roster_engine._fetch_pool = None
+    roster_engine.FETCH_WORKERS = fetch_workers
+
+def cold_scan():
+    roster_engine.clear_scan_cache()
+    telemetry = roster_engine.Telemetry("scan")
+    start = time.perf_counter()
+    roster = roster_engine.deep_scan(roster_engine.FOLDER_ID, telemetry)
+    wall = time.perf_counter() - start
+    spans = telemetry.summary()["spans"]
+    return len(roster), wall, spans.get("parse_tab", {}).get("total_ms", 0.0) / 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--schools", type=int, default=60)
+    parser.add_argument("--athletes", type=int, default=400, help="athletes per school")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every API call")
+    parser.add_argument("--fetch-workers", type=int, nargs="+", default=[1, 2, 4, 8], help="the first is the baseline (1 = inline)")
+    args = parser.parse_args()
+
+    dataset = google_standin.generate(args.schools, args.athletes)
+    backend = google_standin.install(roster_engine, google_standin.ReplayBackend(dataset, latency=args.latency))
+    roster_engine.SHEETS_READS_PER_MINUTE, roster_engine.SHEETS_READ_BURST = 60_000, 1_000
+    os.chdir(tempfile.mkdtemp(prefix="bench_scan_pipeline_"))  # the scan cache lives at a relative path
+    print(f"{len(dataset['spreadsheets'])} spreadsheets, {backend.rows:,} grid rows, latency {args.latency}s, {os.cpu_count()} CPUs")
+
+    print(f"{'fetch':>5}{'wall s':>9}{'speedup':>9}{'parse s':>9}{'rows':>9}")
+    baseline = None
+    for fetch_workers in args.fetch_workers:
+        configure(fetch_workers)
+        rows, wall, parsing = cold_scan()
+        baseline = baseline or wall
+        print(f"{fetch_workers:>5}{wall:>9.2f}{baseline / wall:>8.1f}x{parsing:>9.2f}{rows:>9,}")
+        if fetch_workers == args.fetch_workers[0]:
+            print(f"      parsing: {parsing:.2f} s of {wall:.2f} s ({parsing / wall:.1%}); at most that is left to hide behind fetching")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Student search: scanning the roster frame on every query vs the per-snapshot RosterSearchIndex.
+
+"Scan" is what a search box without an index would do per keystroke: str.startswith / str.contains over every row's
+ID and names. "Index" is RosterSearchIndex.search (ID prefix binary search, name trigrams). Both return every roster
+row of the matched students; the results are checked to be the same rows.
+
+Run from the repo root:  python benchmarks/bench_student_search.py [--athletes 50000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import roster_engine  # noqa: E402
+
+LAST = ["Nguyen", "Tran", "Garcia", "Lee", "Smith", "Johnson", "Lopez", "Ng", "Wu", "O'Brien", "De La Cruz", "Martinez", "Kim", "Park"]
+FIRST = ["Ann", "Anna", "Jose", "Maria", "Kevin", "Li", "Al", "Tuan", "Mai", "Jo", "Rosa", "Ahmed", "Imani", "Diego"]
+QUERIES = ["1234", "56", "nguy", "tran mai", "ez", "de la", "o'b", "rosa 7"]
+REPEATS = 5
+
+def synthetic_roster(n: int, seed: int = 1) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    raw = pd.DataFrame({
+        "School": [f"School {i:02d} Middle Official Sports Roster '24-25" for i in rng.integers(0, 17, n)],
+        "Sport": rng.choice(["Soccer", "Basketball", "Volleyball", "Flag Football", "Track", "Futsal", "Softball"], n),
+        "Level": rng.choice(["6th Grade", "7th/8th Grade", "Open"], n), "Season": rng.choice(["Fall", "Winter", "Spring"], n),
+        "Team": rng.choice(["—", "Red", "Blue", "1", "2"], n), "STUDENT ID": rng.integers(100000, 999999, n).astype(str),
+        "Last Name": "Lee", "First Name": "Ann", "Gender": rng.choice(["Boys", "Girls", "Other"], n, p=[0.48, 0.48, 0.04]),
+        "GPA": np.where(rng.random(n) < 0.1, "", rng.uniform(1.5, 4.0, n).round(2).astype(str)),
+        "PHYSICAL": rng.choice(["Yes", "Approved", "", "Pending"], n),
+    })
+    return roster_engine.type_roster(raw)
+
+def with_names(roster, seed: int = 2):
+    rng = np.random.default_rng(seed)
+    n = len(roster)
+    roster["Last Name"] = rng.choice(LAST, n) + rng.choice(["", "", "son", "ez", "i"], n)
+    roster["First Name"] = rng.choice(FIRST, n)
+    return roster
+
+def scan_search(roster, query: str, limit: int = roster_engine.SEARCH_MAX_STUDENTS):
+    ids = roster["STUDENT ID"].astype(str)
+    last, first = roster["Last Name"].str.upper(), roster["First Name"].str.upper()
+    words = (last + " " + first).str.split()
+    keep = np.ones(len(roster), dtype=bool)
+    for word in query.upper().replace(",", " ").split():
+        if word.isdigit(): keep &= ids.str.startswith(word).to_numpy()
+        elif len(word) < 3: keep &= words.map(lambda ws: any(w.startswith(word) for w in ws)).to_numpy()
+        else: keep &= (last.str.contains(word, regex=False) | first.str.contains(word, regex=False)).to_numpy()
+    students = roster[keep].sort_values(["Last Name", "First Name", "STUDENT ID"])["STUDENT ID"].astype(str).unique()[:limit]
+    return roster[ids.isin(students)]
+
+def ms(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        for q in QUERIES: fn(q)
+    return (time.perf_counter() - start) / REPEATS / len(QUERIES) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--athletes", type=int, default=50_000, help="roster rows")
+    n = parser.parse_args().athletes
+    roster = with_names(synthetic_roster(n))
+    start = time.perf_counter()
+    index = roster_engine.RosterSearchIndex(roster)
+    build = (time.perf_counter() - start) * 1000
+    for q in QUERIES:
+        assert set(index.search(q).index) == set(scan_search(roster, q).index), q
+    print(f"{n:,} roster rows, {len(QUERIES)} queries (same rows from both)")
+    print(f"index build (once per snapshot): {build:8.1f} ms")
+    print(f"scan the frame per query:        {ms(lambda q: scan_search(roster, q)):8.2f} ms")
+    print(f"indexed search per query:        {ms(index.search):8.2f} ms")
+
+if __name__ == "__main__":
+    main()
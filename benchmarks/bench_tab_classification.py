@@ -0,0 +1,65 @@
+"""
+Per-row parsing cost before/after tab classification memoization.
+
+"Before" re-derives sport/level/season/team from the tab name for every student row (the old parse_sheet_values);
+"after" is the current parse_sheet_values, which classifies each tab once via classify_tab.
+
+Run from the repo root:  python benchmarks/bench_tab_classification.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import roster_engine  # noqa: E402
+import pandas as pd  # noqa: E402
+
+TAB_NAMES = ["(M) (F) FLAG FOOTBALL - BOYS YELLOW JV", "(W) FUTSAL SOCCER - GIRLS", "(S) TRACK #2", "(W) 6TH BASKETBALL - BOYS RED"]
+ROWS_PER_TAB = 2000
+REPEATS = 5
+
+def make_grid(n_rows: int):
+    header = ["#", "STUDENT ID", "Last Name", "First Name", "Gender", "Grade", "GPA", "Physical"]
+    return [["Roster"], [], header] + [[str(i), str(100000 + i), "Lee", "Ann", "F", "7", "3.5", "Yes"] for i in range(n_rows)]
+
+def parse_per_row_classification(all_values, school_name: str, tab_name: str):
+    h_idx = roster_engine.find_header_row(all_values)
+    col_map = roster_engine.map_header_to_target(all_values[h_idx])
+    records = []
+    for row in all_values[h_idx + 1 :]:
+        sid = roster_engine.get_cell(row, col_map.get("STUDENT ID"))
+        fname = roster_engine.get_cell(row, col_map.get("First Name"))
+        lname = roster_engine.get_cell(row, col_map.get("Last Name"))
+        if sid.isdigit() and len(sid) >= 4 and fname and lname:
+            records.append({
+                "School": school_name, "Sport": roster_engine.normalize_sport_name(tab_name),
+                "Level": roster_engine.extract_level(tab_name), "Season": roster_engine.extract_season(tab_name),
+                "Team": roster_engine.extract_team(tab_name),
+                "STUDENT ID": sid, "Last Name": lname, "First Name": fname,
+                "Gender": roster_engine.normalize_gender(roster_engine.get_cell(row, col_map.get("Gendar"))),
+                "GPA": roster_engine.get_cell(row, col_map.get("GPA")), "PHYSICAL": roster_engine.get_cell(row, col_map.get("PHYSICAL")),
+            })
+    return records
+
+def per_row_us(parse, grids) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        roster_engine.classify_tab.cache_clear()  # each repeat is a cold scan for the memoized path too
+        t0 = time.perf_counter()
+        n = sum(len(parse(grid, "Bench Middle", tab)) for tab, grid in grids)
+        best = min(best, time.perf_counter() - t0)
+    return best / n * 1e6
+
+def main():
+    grids = [(tab, make_grid(ROWS_PER_TAB)) for tab in TAB_NAMES]
+    for tab, grid in grids:
+        assert pd.DataFrame(parse_per_row_classification(grid, "Bench Middle", tab)).equals(roster_engine.parse_sheet_values(grid, "Bench Middle", tab))
+    before = per_row_us(parse_per_row_classification, grids)
+    after = per_row_us(roster_engine.parse_sheet_values, grids)
+    print(f"{len(TAB_NAMES)} tabs x {ROWS_PER_TAB} rows")
+    print(f"before (classify every row): {before:8.2f} us/row")
+    print(f"after  (classify_tab once):  {after:8.2f} us/row  ({before / after:.1f}x)")
+
+if __name__ == "__main__":
+    main()
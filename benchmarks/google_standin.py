@@ -0,0 +1,337 @@
+"""
+Local stand-in for the Drive and Sheets APIs, so scans can be run and measured without credentials.
+
+A fixture directory holds one roster folder:
+
+    files.json         the Drive file entries: spreadsheets, plus optional subfolders and shortcuts (entries
+                       with "parents" sit in that subfolder, the rest in the root)
+    <file_id>.json     {"spreadsheet": spreadsheets().get response (sheet properties),
+                        "values": values().batchGet response covering every tab in full}
+
+`record` captures a live folder into that layout (needs the usual service account); `generate` writes a synthetic
+district of any size. `ReplayBackend` answers files().list / spreadsheets().get / values().batchGet from the
+fixtures (folder queries paged, name queries, files().get for shortcut targets, whatever A1 ranges the scanner asks for), with optional per-call latency and 429 injection, and
+`install(roster_engine, backend)` plugs it in where roster_engine.py calls build("drive"/"sheets", ...).
+
+Run from the repo root:
+    python benchmarks/google_standin.py generate OUT_DIR [--schools 300] [--athletes 120] [--seed 1] [--subfolders 0] [--command-center]
+    python benchmarks/google_standin.py record OUT_DIR [--folder FOLDER_ID]
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import roster_engine  # noqa: E402
+
+SHEET_MIME = "application/vnd.google-apps.spreadsheet"
+FOLDER_MIME = "application/vnd.google-apps.folder"
+SHORTCUT_MIME = "application/vnd.google-apps.shortcut"
+_A1_RE = re.compile(r"^'((?:[^']|'')*)'!([A-Z]+)(\d*)(?::([A-Z]+)(\d*))?$")
+
+def _col_number(letters: str) -> int:
+    n = 0
+    for ch in letters: n = n * 26 + ord(ch) - 64
+    return n
+
+def parse_a1(a1: str):
+    """'Tab'!B3:D800 -> (tab, first_row, last_row, first_col, last_col), 1-based and inclusive."""
+    m = _A1_RE.match(a1)
+    if m is None: raise ValueError(f"Unsupported A1 range: {a1!r}")
+    first_col = _col_number(m.group(2))
+    last_col = _col_number(m.group(4)) if m.group(4) else first_col
+    first_row = int(m.group(3) or 1)
+    last_row = int(m.group(5)) if m.group(5) else sys.maxsize
+    return m.group(1).replace("''", "'"), first_row, last_row, first_col, last_col
+
+def _quote_tab(title: str) -> str:
+    return "'" + title.replace("'", "''") + "'"
+
+# ---------------------------------------------------------------------------
+# Fixture datasets: {"files": [...], "spreadsheets": {file_id: {"spreadsheet": ..., "grids": {tab: rows}}}}
+# ---------------------------------------------------------------------------
+def load_fixtures(directory: str) -> dict:
+    with open(os.path.join(directory, "files.json")) as f:
+        files = json.load(f)
+    spreadsheets = {}
+    for file in files["files"]:
+        if file.get("mimeType", SHEET_MIME) != SHEET_MIME: continue
+        with open(os.path.join(directory, f"{file['id']}.json")) as f:
+            recorded = json.load(f)
+        grids = {}
+        for value_range in recorded["values"].get("valueRanges", []):
+            tab = parse_a1(value_range["range"])[0]
+            grids[tab] = value_range.get("values", [])
+        spreadsheets[file["id"]] = {"spreadsheet": recorded["spreadsheet"], "grids": grids}
+    return {"files": files, "spreadsheets": spreadsheets}
+
+def write_fixtures(dataset: dict, directory: str):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "files.json"), "w") as f:
+        json.dump(dataset["files"], f)
+    for file_id, book in dataset["spreadsheets"].items():
+        values = {"valueRanges": [{"range": f"{_quote_tab(tab)}!A1:Z{max(len(rows), 1)}", "values": rows} for tab, rows in book["grids"].items()]}
+        with open(os.path.join(directory, f"{file_id}.json"), "w") as f:
+            json.dump({"spreadsheet": book["spreadsheet"], "values": values}, f)
+
+def record(directory: str, folder_id: str):
+    """Snapshot a live roster folder: every spreadsheet the crawler finds (subfolders and shortcuts included, stored
+    flat), each one's sheet properties and a full values().batchGet of every tab."""
+    found = list(roster_engine.crawl_folder(folder_id, roster_engine.TokenBucket(roster_engine.DRIVE_REQUESTS_PER_MINUTE, roster_engine.DRIVE_REQUEST_BURST)))
+    limiter = roster_engine.TokenBucket(roster_engine.SHEETS_READS_PER_MINUTE, roster_engine.SHEETS_READ_BURST)
+    files = {"files": [{"id": f.id, "name": f.name, "modifiedTime": f.modified_time} for f in found]}
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "files.json"), "w") as f:
+        json.dump(files, f)
+    sheets = roster_engine.get_google_clients().service("sheets", "v4")
+    for file in files["files"]:
+        meta = roster_engine.execute_with_retry(sheets.spreadsheets().get(spreadsheetId=file["id"], fields="sheets(properties(title,gridProperties(rowCount,columnCount)))"), limiter)
+        ranges = [_quote_tab(s["properties"]["title"]) for s in meta.get("sheets", [])]
+        values = roster_engine.execute_with_retry(sheets.spreadsheets().values().batchGet(spreadsheetId=file["id"], ranges=ranges, valueRenderOption="FORMATTED_VALUE"), limiter) if ranges else {"valueRanges": []}
+        for value_range, tab in zip(values.get("valueRanges", []), ranges):
+            value_range["range"] = f"{tab}!A1:Z{max(len(value_range.get('values', [])), 1)}"
+        with open(os.path.join(directory, f"{file['id']}.json"), "w") as f:
+            json.dump({"spreadsheet": meta, "values": values}, f)
+        print(f"recorded {file['name']} ({len(ranges)} tabs)")
+
+# Tab names as coaches actually write them, plus the non-roster tabs every workbook carries.
+SYNTHETIC_TABS = [
+    "(F) FLAG FOOTBALL - BOYS", "(F) VOLLEYBALL - GIRLS JV", "(F) VOLLEYBALL - GIRLS VAR", "(F) CROSS COUNTRY",
+    "(W) BASKETBALL - BOYS VAR", "(W) BASKETBALL - BOYS JV", "(W) BASKETBALL - GIRLS 2", "(W) FUTSAL SOCCER",
+    "(W) SOCCER - GIRLS", "(M) (W) WRESTLING", "(S) TRACK", "(S) SOFTBALL RED", "(S) BASEBALL - BOYS BLUE",
+    "(S) FLAG FOOTBALL - GIRLS",
+]
+# Header rows as (cell text, field) pairs: the spellings HEADER_ALIASES accepts, plus columns the scanner ignores.
+SYNTHETIC_HEADER_VARIANTS = [
+    [("#", "#"), ("STUDENT ID", "id"), ("Last Name", "last"), ("First Name", "first"), ("Gender", "gender"), ("Grade", "grade"), ("GPA", "gpa"), ("Physical", "physical")],
+    [("Student ID", "id"), ("Last name", "last"), ("First name", "first"), ("Gendar", "gender"), ("Year", "grade"), ("Gpa", "gpa"), ("Physical Clearance", "physical"), ("Parent Phone", None), ("Notes", None)],
+    [("#", "#"), (" student id ", "id"), ("Lname", "last"), ("Fname", "first"), ("Gender", "gender"), ("Grade Year", "grade"), ("GPA", "gpa"), ("Physical Date", "physical"), ("Emergency Contact", None), ("Uniform #", None)],
+]
+_LAST_NAMES = ["Nguyen", "Garcia", "Smith", "Lee", "Johnson", "Hernandez", "Tran", "Williams", "Lopez", "Brown"]
+_FIRST_NAMES = ["Ana", "Bao", "Carlos", "Dee", "Eli", "Fatima", "Gus", "Hana", "Isaiah", "Jada", "Kai", "Luz"]
+
+def generate(n_schools: int = 300, athletes_per_school: int = 120, seed: int = 1, subfolders: int = 0, command_center: bool = False) -> dict:
+    """Synthetic district: each school has a handful of sport tabs (athletes_per_school rows spread across them),
+    a Notes and a Schedule tab, varied header spellings and offsets, and the usual junk rows and ragged cells.
+    With subfolders > 0 the spreadsheets are spread over that many subfolders, and the root also holds a folder
+    shortcut and spreadsheet shortcuts that point back at already-listed files (the crawler must not double count).
+    With command_center, the Command Center metrics spreadsheet is added outside the roster folder (found by name)."""
+    rnd = random.Random(seed)
+    files, spreadsheets = [], {}
+    for k in range(subfolders):
+        files.append({"id": f"synthetic-folder-{k:02d}", "name": f"Region {k + 1}", "mimeType": FOLDER_MIME})
+    if subfolders:
+        files.append({"id": "synthetic-shortcut-folder", "name": "Region 1 (shortcut)", "mimeType": SHORTCUT_MIME,
+                      "shortcutDetails": {"targetId": "synthetic-folder-00", "targetMimeType": FOLDER_MIME}})
+        for s in range(min(3, n_schools)):
+            files.append({"id": f"synthetic-shortcut-{s:04d}", "name": f"School {s:03d} (shortcut)", "mimeType": SHORTCUT_MIME,
+                          "shortcutDetails": {"targetId": f"synthetic-{s:04d}", "targetMimeType": SHEET_MIME}})
+    for s in range(n_schools):
+        file_id = f"synthetic-{s:04d}"
+        name = f"School {s:03d} Middle Official Sports Roster '24-25"
+        files.append({"id": file_id, "name": name, "modifiedTime": f"2024-09-{1 + s % 28:02d}T12:00:00.000Z"})
+        if subfolders: files[-1]["parents"] = [f"synthetic-folder-{s % subfolders:02d}"]
+        tabs = rnd.sample(SYNTHETIC_TABS, rnd.randint(4, 8))
+        per_tab = max(1, athletes_per_school // len(tabs))
+        grids = {"Notes": [["Coach notes"], ["Bus leaves at 3:15"]],
+                 "Schedule": [["Date", "Opponent", "Location", "Time"]] + [[f"9/{d}", f"School {rnd.randrange(n_schools):03d}", "Home", "3:30 PM"] for d in range(1, 31)]}
+        for tab in tabs:
+            header = rnd.choice(SYNTHETIC_HEADER_VARIANTS)
+            grid = [[f"{tab} Roster 24-25"]] + [[] for _ in range(rnd.randint(0, 4))] + [[cell for cell, _ in header]]
+            for r in range(per_tab):
+                fields = {
+                    "#": str(r + 1),
+                    "id": str(rnd.randint(100000, 999999)) if rnd.random() < 0.95 else rnd.choice(["", "N/A", "TBD"]),
+                    "last": rnd.choice(_LAST_NAMES), "first": rnd.choice(_FIRST_NAMES),
+                    "gender": rnd.choice(["M", "F", "Boy", "Girl", "f", " m ", ""]), "grade": rnd.choice(["6", "7", "8"]),
+                    "gpa": rnd.choice(["", "n/a"]) if rnd.random() < 0.1 else f"{rnd.uniform(1.5, 4.0):.2f}",
+                    "physical": rnd.choice(["Yes", "Y", "APPROVED 9/1", "", "pending", "Cleared"]),
+                    None: "x",
+                }
+                row = [fields[field] for _, field in header]
+                while row and row[-1] == "": row.pop()  # the API drops trailing empty cells
+                grid.append(row)
+            grids[tab] = grid
+        spreadsheet = {"sheets": [{"properties": {"title": tab, "gridProperties": {"rowCount": max(1000, len(rows)), "columnCount": 26}}} for tab, rows in grids.items()]}
+        spreadsheets[file_id] = {"spreadsheet": spreadsheet, "grids": grids}
+    if command_center:
+        files.append({"id": "synthetic-command-center", "name": roster_engine.COMMAND_CENTER_NAME, "modifiedTime": "2025-01-15T12:00:00.000Z",
+                      "parents": ["synthetic-commissioner-folder"]})
+        spreadsheets["synthetic-command-center"] = _command_center_book(rnd, n_schools)
+    return {"files": {"files": files}, "spreadsheets": spreadsheets}
+
+def _command_center_book(rnd: random.Random, n_schools: int) -> dict:
+    """The five metric tabs as a commissioner keeps them: percentages typed as "85%" or 85 (or as a 0.85 fraction
+    under a "Ratio" header), counts with blanks for schools that have not reported, a district total row, and a tab
+    that only has the counts."""
+    schools = [f"School {s:03d} Middle" for s in range(n_schools)]
+    sports = ["Flag Football", "Volleyball", "Basketball", "Soccer", "Track", "Softball"]
+    maybe = lambda value: value if rnd.random() < 0.9 else ""
+    pct = lambda: rnd.choice([f"{rnd.randint(40, 100)}%", str(rnd.randint(40, 100))])
+    grids = {
+        "Notes": [["Commissioner notes"], ["Update by Friday"]],
+        "Certification Completion": [["Certification completion by season"], [], ["School", "Season", "Certification %", "Coaches"]]
+            + [[school, season, maybe(pct()), str(rnd.randint(2, 9))] for school in schools for season in ("Fall", "Winter", "Spring")],
+        "Forfeits": [["School Site", "Sport", "Forfeits"]] + [[school, sport, maybe(str(rnd.randint(0, 3)))] for school in schools for sport in rnd.sample(sports, 3)]
+            + [["TOTAL", "", "99"]],
+        "Game Compliance": [["School", "Sport", "Season", "Games", "Compliant Games", "Compliance Rate"]]
+            + [[school, sport, "Spring", str(games), str(rnd.randint(games // 2, games)), ""] for school in schools for sport in rnd.sample(sports, 2) for games in [rnd.randint(4, 10)]],
+        "Coach Retention": [["School", "Coaches Last Year", "Returning Coaches"]] + [[school, str(prior), maybe(str(rnd.randint(0, prior)))] for school in schools for prior in [rnd.randint(3, 10)]],
+        "Student Return Rate": [["School", "Return Ratio"]] + [[school, maybe(f"{rnd.uniform(0.4, 1):.2f}")] for school in schools] + [["District Total", "0.71"]],
+    }
+    spreadsheet = {"sheets": [{"properties": {"title": tab, "gridProperties": {"rowCount": max(1000, len(rows)), "columnCount": 26}}} for tab, rows in grids.items()]}
+    return {"spreadsheet": spreadsheet, "grids": grids}
+
+# ---------------------------------------------------------------------------
+# Replay backend
+# ---------------------------------------------------------------------------
+class _Request:
+    def __init__(self, backend, respond):
+        self.backend = backend
+        self.respond = respond
+        self.postproc = lambda resp, content: json.loads(content)  # same hook as googleapiclient's HttpRequest
+
+    def execute(self, num_retries: int = 0):
+        backend = self.backend
+        if backend.latency: time.sleep(backend.latency)
+        with backend.lock:
+            backend.calls += 1
+            throttled = backend.fail_rate and backend.rng.random() < backend.fail_rate
+            if throttled: backend.quota_hits += 1
+        if throttled:
+            raise HttpError(httplib2.Response({"status": 429}), b'{"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}}')
+        content = json.dumps(self.respond()).encode()
+        with backend.lock:
+            backend.bytes_received += len(content)
+        return self.postproc(None, content)
+
+_PARENT_RE = re.compile(r"'([^']+)' in parents")
+_NAME_RE = re.compile(r"name = '((?:[^'\\]|\\.)*)'")
+_LISTED_FIELDS = ("id", "name", "mimeType", "modifiedTime", "size", "shortcutDetails")
+
+class _DriveFiles:
+    """files().list (folder query, paging) and files().get over the dataset's file entries. Entries without
+    "parents" sit in the root folder, whatever id the scanner lists it by."""
+    def __init__(self, backend):
+        self.backend = backend
+        entries = backend.dataset["files"]["files"]
+        self.by_id = {f["id"]: f for f in entries}
+        self.folder_ids = {f["id"] for f in entries if f.get("mimeType") == FOLDER_MIME}
+
+    @staticmethod
+    def _listed(entry: dict) -> dict:
+        return {"mimeType": SHEET_MIME, **{k: entry[k] for k in _LISTED_FIELDS if k in entry}}
+
+    def list(self, q: str = "", pageSize: int = 100, pageToken=None, **kwargs):
+        m = _PARENT_RE.search(q)
+        folder = m.group(1) if m else None
+        in_root = folder not in self.folder_ids
+        matches = [f for f in self.backend.dataset["files"]["files"] if (folder in f["parents"] if "parents" in f else in_root)]
+        named = _NAME_RE.search(q)
+        if named:  # a search by name, in any folder
+            name = re.sub(r"\\(.)", r"\1", named.group(1))
+            matches = [f for f in self.backend.dataset["files"]["files"] if f["name"] == name and f.get("mimeType", SHEET_MIME) == SHEET_MIME]
+        offset = int(pageToken or 0)
+        def respond():
+            page = {"files": [self._listed(f) for f in matches[offset:offset + pageSize]]}
+            if offset + pageSize < len(matches): page["nextPageToken"] = str(offset + pageSize)
+            return page
+        return _Request(self.backend, respond)
+
+    def get(self, fileId: str, **kwargs):
+        def respond():
+            if fileId not in self.by_id:  # e.g. a shortcut whose target was deleted
+                raise HttpError(httplib2.Response({"status": 404}), f'{{"error": {{"code": 404, "message": "File not found: {fileId}."}}}}'.encode())
+            return self._listed(self.by_id[fileId])
+        return _Request(self.backend, respond)
+
+class _Spreadsheets:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def values(self):
+        return self
+
+    def get(self, spreadsheetId: str, **kwargs):
+        return _Request(self.backend, lambda: self.backend.dataset["spreadsheets"][spreadsheetId]["spreadsheet"])
+
+    def batchGet(self, spreadsheetId: str, ranges, **kwargs):
+        grids = self.backend.dataset["spreadsheets"][spreadsheetId]["grids"]
+        def respond():
+            value_ranges = []
+            for a1 in ([ranges] if isinstance(ranges, str) else ranges):
+                tab, first_row, last_row, first_col, last_col = parse_a1(a1)
+                rows = []
+                for row in grids[tab][first_row - 1:last_row]:
+                    row = row[first_col - 1:last_col]
+                    while row and row[-1] == "": row.pop()
+                    rows.append(row)
+                while rows and not rows[-1]: rows.pop()
+                value_ranges.append({"range": a1, "values": rows} if rows else {"range": a1})
+            return {"valueRanges": value_ranges}
+        return _Request(self.backend, respond)
+
+class ReplayBackend:
+    """Serves one dataset as both the Drive and the Sheets service. Counters are totals across every call."""
+    def __init__(self, dataset: dict, latency: float = 0.0, fail_rate: float = 0.0, seed: int = 0):
+        self.dataset = dataset
+        self.latency = latency      # seconds added to every execute()
+        self.fail_rate = fail_rate  # probability an execute() raises a 429
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.quota_hits = 0
+        self.bytes_received = 0
+        self._files = _DriveFiles(self)
+        self._spreadsheets = _Spreadsheets(self)
+
+    def files(self):
+        return self._files
+
+    def spreadsheets(self):
+        return self._spreadsheets
+
+    @property
+    def rows(self) -> int:
+        return sum(len(rows) for book in self.dataset["spreadsheets"].values() for rows in book["grids"].values())
+
+def install(app_module, backend: ReplayBackend) -> ReplayBackend:
+    """Route roster_engine.py's build("drive"/"sheets", ...) and credential loading to the stand-in."""
+    app_module.build = lambda service_name, version, credentials=None, **kwargs: backend
+    app_module._get_creds = lambda: None
+    return backend
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    gen = commands.add_parser("generate", help="write a synthetic district")
+    gen.add_argument("out")
+    gen.add_argument("--schools", type=int, default=300)
+    gen.add_argument("--athletes", type=int, default=120, help="athletes per school")
+    gen.add_argument("--seed", type=int, default=1)
+    gen.add_argument("--subfolders", type=int, default=0, help="spread the spreadsheets over this many subfolders")
+    gen.add_argument("--command-center", action="store_true", help="add the Command Center metrics spreadsheet")
+    rec = commands.add_parser("record", help="snapshot a live Drive folder")
+    rec.add_argument("out")
+    rec.add_argument("--folder", default=None, help="Drive folder id (default: roster_engine.FOLDER_ID)")
+    args = parser.parse_args()
+    if args.command == "generate":
+        write_fixtures(generate(args.schools, args.athletes, args.seed, args.subfolders, args.command_center), args.out)
+        print(f"wrote {args.schools} spreadsheets to {args.out}")
+    else:
+        if args.folder is None:
+            import roster_engine
+            args.folder = roster_engine.FOLDER_ID
+        record(args.out, args.folder)
+
+if __name__ == "__main__":
+    main()
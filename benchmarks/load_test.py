@@ -0,0 +1,246 @@
+"""
+Multi-session load test: N concurrent dashboard sessions against the local Google API stand-in, in one process as
+on a Streamlit server (the snapshot store, the scan thread and the st.cache_data caches are shared; each session has
+its own session state).
+
+Each session is a Streamlit AppTest driven from its own thread through a random mix of tab switches, sidebar filter
+changes and "Run Deep Scan" clicks. Per stage (one session count) it reports:
+
+    p50 / p95      rerun latency over every action, and over the reruns that ran while a scan was in progress
+    RSS / session  process resident memory growth over the stage divided by its sessions (AppTest's own element
+                   tree is included, so this is an upper bound for a browser session)
+    scans          "Run Deep Scan" clicks vs the scans the background refresher actually ran (clicks made during a
+                   scan coalesce), and their median time under load (the idle first scan is printed up front; it
+                   is cold, later scans reuse the scan cache)
+
+Every run appends one JSON line (git commit, configuration, per-stage results) to the results file and prints the
+change against the last run there with the same configuration, so a regression between versions shows up as a
+jump in p95 or RSS per session.
+
+Run from the repo root:
+    python benchmarks/load_test.py [--sessions 1 5 10] [--actions 20] [--scan-rate 0.05]
+                                   [--schools 40] [--athletes 120] [--latency 0.01] [--results PATH]
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import roster_engine  # noqa: E402
+import google_standin  # noqa: E402
+import streamlit.logger  # noqa: E402
+import streamlit.testing.v1.app_test as app_test  # noqa: E402
+import streamlit.testing.v1.local_script_runner as local_script_runner  # noqa: E402
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+APP = os.path.join(REPO, "app.py")
+TABS = ["📊 DASHBOARD", "📋 DETAILED DATA", "🔍 SITE SPOT-CHECK", "🚩 FLAGS", "📆 HISTORY", "🏛️ COMMAND CENTER", "💰 Budget Request"]
+RERUN_TIMEOUT = 120
+REGRESSION = 1.2  # flag a stage whose p95 or RSS per session grew by more than 20% since the last comparable run
+
+def share_script_cache():
+    """A Streamlit server compiles app.py once for every session; AppTest compiles it on every run, which is not the
+    cost being measured (and concurrent compiles can fail on CPython 3.11). Give every run the server's one cache."""
+    shared = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: shared
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):  # no procfs (macOS): peak RSS, in bytes there
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e6
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+class ScanLog:
+    """Wraps SnapshotStore to catch the store the app starts (its st.cache_resource, shared by every session) and to
+    time every scan its background refresher runs."""
+    def __init__(self):
+        self.store = None
+        self.scans = []  # (started, seconds)
+        self.lock = threading.Lock()
+        refresh, start = roster_engine.SnapshotStore.refresh, roster_engine.SnapshotStore.start
+        def start_store(store):
+            self.store = store
+            return start(store)
+        def timed_refresh(store):
+            start = time.perf_counter()
+            try:
+                refresh(store)
+            finally:
+                with self.lock: self.scans.append((start, time.perf_counter() - start))
+        roster_engine.SnapshotStore.refresh, roster_engine.SnapshotStore.start = timed_refresh, start_store
+
+class Session:
+    """One dashboard user: an AppTest and the actions it has taken."""
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.at = AppTest.from_file(APP, default_timeout=RERUN_TIMEOUT)
+        self.samples = []  # (action, seconds, scanning when it started)
+        self.errors = []
+        self.scan_clicks = 0
+
+    def run(self, action: str, store):
+        scanning = store.scanning
+        start = time.perf_counter()
+        self.at.run()
+        self.samples.append((action, time.perf_counter() - start, scanning))
+        self.errors.extend(f"{action}: {e.value}"[:300] for e in self.at.exception)
+
+    def step(self, store, scan_rate: float):
+        at, roll = self.at, self.rng.random()
+        if roll < scan_rate:
+            self.scan_clicks += 1
+            next(b for b in at.sidebar.button if "Run Deep Scan" in b.label).click()
+            return self.run("scan", store)
+        if roll < 0.55:
+            at.session_state["main_tabs"] = self.rng.choice(TABS)
+            return self.run("tab", store)
+        widget = self.rng.choice(["gender", "level", "school"])
+        if widget == "gender":
+            at.sidebar.radio[0].set_value(self.rng.choice(["All", "Boys", "Girls"]))
+        else:
+            picker = at.sidebar.multiselect[0 if widget == "school" else 1]
+            options = list(picker.options)
+            picker.set_value(self.rng.sample(options, self.rng.randint(1, len(options))) if options else [])
+        return self.run("filter", store)
+
+def wait_for_snapshot(scan_log: ScanLog) -> float:
+    """First session: starts the store (and its first scan) and waits until the complete roster renders."""
+    start = time.perf_counter()
+    at = AppTest.from_file(APP, default_timeout=RERUN_TIMEOUT)
+    at.run()
+    while not at.metric or scan_log.store.current.partial:
+        time.sleep(0.5)
+        at.run()
+    while scan_log.store.scanning: time.sleep(0.1)
+    return time.perf_counter() - start
+
+def percentiles(seconds) -> dict:
+    if not seconds: return {"p50_ms": None, "p95_ms": None}
+    p50, p95 = np.percentile(np.array(seconds) * 1000, [50, 95])
+    return {"p50_ms": round(float(p50), 1), "p95_ms": round(float(p95), 1)}
+
+def run_stage(n_sessions: int, actions: int, scan_rate: float, store, scan_log: ScanLog, seed: int) -> dict:
+    sessions = [Session(random.Random(seed * 1000 + i)) for i in range(n_sessions)]
+    rss_before, scans_before = rss_mb(), len(scan_log.scans)
+
+    def drive(session: Session):
+        try:
+            session.run("open", store)
+            for _ in range(actions): session.step(store, scan_rate)
+        except Exception as e:  # a broken session is a result, not a harness crash
+            session.errors.append(f"{type(e).__name__}: {e}"[:300])
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=drive, args=(s,), name=f"session-{i}") for i, s in enumerate(sessions)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    wall = time.perf_counter() - start
+    while store.scanning: time.sleep(0.1)  # count the scans the clicks started
+    rss_after = rss_mb()
+
+    samples = [s for session in sessions for s in session.samples]
+    stage_scans = [seconds for _, seconds in scan_log.scans[scans_before:]]
+    errors = [e for session in sessions for e in session.errors]
+    return {
+        "sessions": n_sessions,
+        "reruns": len(samples),
+        "wall_s": round(wall, 2),
+        **percentiles([seconds for _, seconds, _ in samples]),
+        **{f"scanning_{k}": v for k, v in percentiles([seconds for _, seconds, scanning in samples if scanning]).items()},
+        "scanning_reruns": sum(1 for _, _, scanning in samples if scanning),
+        "rss_mb": round(rss_after, 1),
+        "rss_mb_per_session": round((rss_after - rss_before) / n_sessions, 2),
+        "scan_clicks": sum(s.scan_clicks for s in sessions),
+        "scans_run": len(stage_scans),
+        "scan_median_s": round(float(np.median(stage_scans)), 2) if stage_scans else None,
+        "errors": len(errors),
+        "first_errors": errors[:3],
+    }
+
+def load_previous(path: str, config: dict):
+    try:
+        with open(path) as f:
+            runs = [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return None
+    return next((run for run in reversed(runs) if run["config"] == config), None)
+
+def compare(stage: dict, previous_run) -> str:
+    if previous_run is None: return ""
+    before = next((s for s in previous_run["stages"] if s["sessions"] == stage["sessions"]), None)
+    if before is None: return ""
+    notes = []
+    for key, label in (("p95_ms", "p95"), ("rss_mb_per_session", "RSS/session")):
+        old, new = before.get(key), stage.get(key)
+        if not old or new is None: continue
+        notes.append(f"{label} {new / old - 1:+.0%}{' REGRESSION?' if new > old * REGRESSION else ''}")
+    return f"  vs {previous_run['commit']}: " + ", ".join(notes) if notes else ""
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10], help="concurrent sessions per stage")
+    parser.add_argument("--actions", type=int, default=20, help="actions per session after opening the app")
+    parser.add_argument("--scan-rate", type=float, default=0.05, help="share of actions that click Run Deep Scan")
+    parser.add_argument("--schools", type=int, default=40)
+    parser.add_argument("--athletes", type=int, default=120, help="athletes per school")
+    parser.add_argument("--latency", type=float, default=0.01, help="seconds added to every API call")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--results", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "load_test_results.jsonl"))
+    args = parser.parse_args()
+    results = os.path.abspath(args.results)
+    config = {k: getattr(args, k) for k in ("sessions", "actions", "scan_rate", "schools", "athletes", "latency", "seed")}
+
+    dataset = google_standin.generate(args.schools, args.athletes, args.seed)
+    google_standin.install(roster_engine, google_standin.ReplayBackend(dataset, latency=args.latency))
+    roster_engine.SHEETS_READS_PER_MINUTE, roster_engine.SHEETS_READ_BURST = 60_000, 1_000
+    scan_log = ScanLog()
+    share_script_cache()
+    os.chdir(tempfile.mkdtemp(prefix="load_test_"))  # scan cache, snapshots, history and telemetry are relative paths
+
+    first_scan = wait_for_snapshot(scan_log)
+    streamlit.logger.set_log_level("error")  # after the first run has loaded Streamlit's config, which sets it too
+    store = scan_log.store
+    print(f"{len(dataset['spreadsheets'])} spreadsheets, {len(store.current.roster):,} roster rows, latency {args.latency}s, "
+          f"{os.cpu_count()} CPUs; first scan + first render {first_scan:.1f} s, idle scan {scan_log.scans[0][1]:.1f} s")
+
+    previous = load_previous(results, config)
+    stages = []
+    print(f"{'sessions':>8}{'reruns':>8}{'p50 ms':>9}{'p95 ms':>9}{'scan p95':>10}{'RSS MB':>9}{'MB/sess':>9}{'clicks':>8}{'scans':>7}{'scan s':>8}{'errors':>8}")
+    for n in args.sessions:
+        stage = run_stage(n, args.actions, args.scan_rate, store, scan_log, args.seed + n)
+        stages.append(stage)
+        fmt = lambda v, spec: f"{v:{spec}}" if v is not None else f"{'—':>{spec.split('.')[0].lstrip(',')}}"
+        print(f"{n:>8}{stage['reruns']:>8}{fmt(stage['p50_ms'], '9.0f')}{fmt(stage['p95_ms'], '9.0f')}{fmt(stage['scanning_p95_ms'], '10.0f')}"
+              f"{stage['rss_mb']:>9.0f}{stage['rss_mb_per_session']:>9.2f}{stage['scan_clicks']:>8}{stage['scans_run']:>7}"
+              f"{fmt(stage['scan_median_s'], '8.1f')}{stage['errors']:>8}{compare(stage, previous)}")
+        for error in stage["first_errors"]: print(f"    {error}")
+
+    run = {"at": datetime.now(timezone.utc).isoformat(timespec="seconds"), "commit": git_commit(), "config": config,
+           "idle_scan_s": round(scan_log.scans[0][1], 2), "stages": stages}
+    with open(results, "a") as f:
+        f.write(json.dumps(run) + "\n")
+    print(f"appended to {results}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1995 @@
+"""
+OUSD OAL Middle School Sports — roster scan engine.
+Drive/Sheets fetching, normalization, parsing, the roster cube and filter indexes, and the published snapshot store.
+Imports no Streamlit: the dashboard (app.py) and the headless scan (roster_etl.py) both build on it.
+"""
+
+import hashlib
+import io
+import json
+import os
+import queue
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from typing import Callable, NamedTuple, Optional
+import numpy as np
+import pandas as pd
+import httplib2
+import pyarrow as pa
+import pyarrow.parquet as pq
+from google.oauth2.service_account import Credentials
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+
+# ---------------------------------------------------------------------------
+# Config & Normalization Helpers
+# ---------------------------------------------------------------------------
+FOLDER_ID = "18B2JDMzmEqmeAk8T2vwswX5T-koYUMQV"
+SERVICE_ACCOUNT_FILE = "service_account_2.json"
+# For Streamlit Cloud: set gcp_service_account in Secrets to the service account dict (no file needed)
+HEADER_SEARCH_MAX_ROWS = 15
+MAX_ROWS_PER_SHEET = 800
+# Sheets API read quota is 60 requests/minute per user (the service account); each spreadsheet costs 3 reads. One
+# process-wide bucket per API (get_sheets_limiter / get_drive_limiter) is shared by the roster scan and the Command
+# Center ingest, since they spend the same quota.
+SHEETS_READS_PER_MINUTE = 60
+SHEETS_READ_BURST = 10
+# Drive listing has its own (much larger) quota; the folder crawl is throttled separately so it never eats Sheets reads.
+DRIVE_REQUESTS_PER_MINUTE = 600
+DRIVE_REQUEST_BURST = 20
+# Fetch threads: each downloads a spreadsheet and parses it, while the others keep their requests in flight. Parsing
+# is a small share of a scan (benchmarks/bench_scan_pipeline.py), so it stays on the fetch thread.
+FETCH_WORKERS = 4
+LIST_WORKERS = 4  # concurrent Drive folder listings while crawling subfolders
+DRIVE_PAGE_SIZE = 1000
+HTTP_TIMEOUT_SECONDS = 60
+QUOTA_MAX_RETRIES = 5
+QUOTA_BACKOFF_BASE = 1.0
+QUOTA_BACKOFF_MAX = 32.0
+# Parsed records per spreadsheet persist here across restarts; only spreadsheets whose Drive modifiedTime changed are re-fetched.
+SCAN_CACHE_PATH = ".roster_cache.sqlite3"
+SCAN_CACHE_VERSION = 2  # bump when parsing/normalization rules change so cached records are re-parsed
+SCAN_PREVIEW_INTERVAL = 0.5  # seconds between partial-roster refreshes while a scan streams in
+# A spreadsheet whose fetch still fails after the per-request retries is queued for up to SCAN_RETRY_ATTEMPTS more
+# tries later in the same scan (SCAN_RETRY_DELAY seconds × attempt apart, at most SCAN_RETRY_QUEUE_MAX waiting at
+# once), then dead-lettered in the scan cache; the dashboard lists dead letters with their errors.
+SCAN_RETRY_ATTEMPTS = 2
+SCAN_RETRY_DELAY = 5.0
+SCAN_RETRY_QUEUE_MAX = 25
+# Background refresher: one scan per process on this schedule; sessions share the published snapshot.
+REFRESH_INTERVAL_SECONDS = 600
+SNAPSHOT_DIR = ".roster_snapshots"
+SNAPSHOT_POLL_SECONDS = 2  # how often a session waiting on the first scan reruns to pick up partial snapshots
+# Every complete scan is also appended here (one partition per scan date and school year) for season-over-season metrics.
+HISTORY_DB_PATH = "roster_history.sqlite3"
+# Scan timings/counters are appended here as JSON lines (None disables). Past the size cap the file is rotated to
+# <path>.1 (replacing the previous one), so at most twice the cap stays on disk.
+TELEMETRY_LOG_PATH = "roster_telemetry.jsonl"
+TELEMETRY_LOG_MAX_BYTES = 5 * 1024 * 1024
+# The commissioner's metrics spreadsheet (one tab per metric), found by name wherever the service account can see it.
+COMMAND_CENTER_NAME = "OAL Middle School Sports Command Center 2026"
+
+TARGET_HEADERS = ["STUDENT ID", "Last Name", "First Name", "Gendar", "Year", "GPA", "PHYSICAL"]
+ROSTER_COLUMNS = ["School", "Sport", "Level", "Season", "Team", "STUDENT ID", "Last Name", "First Name", "Gender", "GPA", "PHYSICAL"]
+
+HEADER_ALIASES = {
+    "STUDENT ID": ["STUDENT ID", "Student ID", "Student ID #", "ID"],
+    "Last Name": ["Last Name", "Last name", "LastName", "Lname"],
+    "First Name": ["First Name", "First name", "FirstName", "Fname"],
+    "Gendar": ["Gendar", "Gender"],
+    "Year": ["Year", "Grade", "Grade Year"],
+    "GPA": ["GPA", "Gpa"],
+    "PHYSICAL": ["PHYSICAL", "Physical", "Physical Date", "Physical Clearance"],
+}
+
+# Tab-name patterns, compiled once (tab names are upper-cased before matching).
+_M_PREFIX_RE = re.compile(r"^\s*\(M\)\s*", re.IGNORECASE)
+_SEASON_CODE_PREFIX_RE = re.compile(r"^\s*\([FWS]\)\s*", re.IGNORECASE)
+_SEASON_WORD_PREFIX_RE = re.compile(r"^\s*\((?:FALL|WINTER|SPRING)\)\s*", re.IGNORECASE)
+_GENDER_SUFFIX_RES = [re.compile(p, re.IGNORECASE) for p in (
+    r"\s*[-–]\s*GIRLS?\s*$", r"\s*[-–]\s*BOYS?\s*$", r"\s*[-–]\s*G\s*$", r"\s*[-–]\s*B\s*$",
+)]
+_LEVEL_TEAM_SUFFIX_RES = [re.compile(p, re.IGNORECASE) for p in (
+    r"\s*[-–]\s*VAR\s*$", r"\s*[-–]\s*VARSITY\s*$", r"\s*[-–]\s*JV\s*$",
+    r"\s*[-–]\s*V\s*$", r"\s*[-–]\s*JUNIOR\s+VARSITY\s*$",
+    r"\s*[-–]\s*RED\s*$", r"\s*[-–]\s*BLUE\s*$", r"\s*[-–]\s*WHITE\s*$",
+    r"\s*[-–]\s*GOLD\s*$", r"\s*[-–]\s*BLACK\s*$", r"\s*[-–]\s*ORANGE\s*$",
+    r"\s*[-–]\s*TEAM\s*\d+\s*$", r"\s*[-–]\s*#?\s*\d+\s*$",
+    r"\s*\(\s*V\s*\)\s*$", r"\s*VAR\s*$", r"\s*VARSITY\s*$", r"\s*JV\s*$",
+    r"\s*#\s*\d+\s*$", r"\s+\d+\s*$",
+)]
+_TEAM_LEVEL_SUFFIX_RES = [re.compile(p, re.IGNORECASE) for p in (
+    r"\s+JV\s*$", r"\s+VARSITY\s*$", r"\s+VAR\s*$", r"\s+V\s*$", r"\s+6TH\s*$", r"\s+JUNIOR\s+VARSITY\s*$",
+)]
+_SEASON_PREFIXES = [(re.compile(r"^\s*\(F\)"), "Fall"), (re.compile(r"^\s*\(W\)"), "Winter"), (re.compile(r"^\s*\(S\)"), "Spring")]
+_TEAM_TOKEN_SPLIT_RE = re.compile(r"\s+|\s*[-–]\s*")
+_NON_DIGIT_RE = re.compile(r"\D")
+_TEAM_NUMBER_RE = re.compile(r"^(?:TEAM\s*)?#?\d+$")
+
+def _strip_tab_prefix(s: str) -> str:
+    """Remove leading (M) etc. so tab names like '(M) FLAG FOOTBALL - BOYS YELLOW JV' parse correctly. Keeps (F)/(W)/(S) for season."""
+    return _M_PREFIX_RE.sub("", s).strip()
+
+def _prep_tab_name(tab_name) -> str:
+    return _strip_tab_prefix(str(tab_name).strip().upper())
+
+def _strip_gender_suffix(s: str) -> str:
+    for pat in _GENDER_SUFFIX_RES:
+        s = pat.sub("", s)
+    return s
+
+def _core_from_prepped(s: str) -> str:
+    s = _SEASON_CODE_PREFIX_RE.sub("", s)
+    s = _SEASON_WORD_PREFIX_RE.sub("", s)
+    # Strip trailing gender so core = level + sport + team only
+    s = _strip_gender_suffix(s)
+    for _ in range(5):
+        changed = False
+        for pat in _LEVEL_TEAM_SUFFIX_RES:
+            next_s = pat.sub("", s)
+            if next_s != s: s = next_s.strip(); changed = True
+        if not changed: break
+    return s.strip()
+
+def _core_sport_string(tab_name: str) -> str:
+    if not tab_name: return ""
+    return _core_from_prepped(_prep_tab_name(tab_name))
+
+# Order matters: more specific first. Soccer vs Futsal: "FUTSAL SOCCER" → Futsal; "SOCCER" only → Soccer.
+SPORT_KEYWORDS_ORDERED = [
+    ("FLAG FOOTBALL", "Flag Football"), ("CROSS COUNTRY", "Cross Country"),
+    ("TRACK", "Track & Field"), ("ULTIMATE FRISBEE", "Ultimate Frisbee"),
+    ("BASKETBALL", "Basketball"), ("FUTSAL", "Futsal"), ("SOCCER", "Soccer"),
+    ("VOLLEYBALL", "Volleyball"), ("CHEER", "Cheerleading"), ("BASEBALL", "Baseball"),
+    ("SOFTBALL", "Softball"), ("WRESTLING", "Wrestling"), ("LACROSSE", "Lacrosse")
+]
+
+def _sport_from_core(core: str) -> str:
+    if not core: return "Other"
+    # Explicit: "FUTSAL SOCCER" or any tab containing FUTSAL → Futsal (different sport from Soccer).
+    if "FUTSAL" in core:
+        return "Futsal"
+    for keyword, clean_name in SPORT_KEYWORDS_ORDERED:
+        if keyword in core: return clean_name
+    return "Other"
+
+def normalize_sport_name(tab_name: str) -> str:
+    """Consolidated Student Roster and all charts use this. Futsal vs Soccer: tab with 'Futsal' → Futsal, else Soccer."""
+    return _sport_from_core(_core_sport_string(tab_name))
+
+def _season_from_prepped(s: str) -> str:
+    for pat, season in _SEASON_PREFIXES:
+        if pat.match(s): return season
+    return "Other"
+
+def extract_season(tab_name: str) -> str:
+    return _season_from_prepped(_prep_tab_name(tab_name))
+
+GENDER_LOOKUP = {
+    **{k: "Boys" for k in ("M", "MALE", "BOY", "BOYS")},
+    **{k: "Girls" for k in ("F", "FEMALE", "GIRL", "GIRLS")},
+}
+
+def normalize_gender(value) -> str:
+    return GENDER_LOOKUP.get(str(value).strip().upper(), "Other")
+
+def extract_level(tab_name: str) -> str:
+    name = str(tab_name).upper()
+    if "6TH" in name: return "6th Grade"
+    if "JV" in name or "JUNIOR VARSITY" in name: return "JV"
+    return "Varsity"
+
+# Team = color or number in tab name after stripping season, level, gender (e.g. Red, Blue, Yellow, 1, 2).
+TEAM_COLORS = ["RED", "BLUE", "WHITE", "GOLD", "BLACK", "ORANGE", "GREEN", "SILVER", "YELLOW", "MAROON", "NAVY", "PURPLE"]
+
+def _team_from_prepped(s: str) -> str:
+    s = _SEASON_CODE_PREFIX_RE.sub("", s)
+    s = _strip_gender_suffix(s)
+    # Strip level from end so "FLAG FOOTBALL YELLOW JV" → last token = YELLOW not JV
+    for pat in _TEAM_LEVEL_SUFFIX_RES:
+        s = pat.sub("", s).strip()
+    tokens = [t for t in _TEAM_TOKEN_SPLIT_RE.split(s) if t]
+    if not tokens: return "—"
+    last = tokens[-1]
+    if last in TEAM_COLORS: return last.title()
+    if last.isdigit(): return last
+    digits = _NON_DIGIT_RE.sub("", last)
+    if digits and _TEAM_NUMBER_RE.match(last.replace(" ", "")): return digits
+    return "—"
+
+def extract_team(tab_name: str) -> str:
+    """After stripping season, gender, and level, last token = team if color or number. Else "—"."""
+    if not tab_name: return "—"
+    return _team_from_prepped(_prep_tab_name(tab_name))
+
+class TabClass(NamedTuple):
+    sport: str
+    level: str
+    season: str
+    team: str
+
+@lru_cache(maxsize=4096)
+def classify_tab(tab_name: str) -> TabClass:
+    """Sport/level/season/team for a tab in one pass. Depends only on the tab name, so memoized across scans."""
+    if not tab_name: return TabClass("Other", "Varsity", "Other", "—")
+    s = _prep_tab_name(tab_name)
+    return TabClass(
+        sport=_sport_from_core(_core_from_prepped(s)), level=extract_level(s),
+        season=_season_from_prepped(s), team=_team_from_prepped(s),
+    )
+
+_SCHOOL_YEAR_RE = re.compile(r"(?:20)?(\d{2})\s*[-–/]\s*(?:20)?(\d{2})\b")
+
+def school_year_start(name: str, scanned_on: date) -> int:
+    """Fall calendar year of the roster's school year: from the spreadsheet name ("... Roster '24-25" → 2024),
+    else from the scan date (August onward belongs to the year starting then)."""
+    m = _SCHOOL_YEAR_RE.search(str(name))
+    if m and int(m.group(2)) == (int(m.group(1)) + 1) % 100: return 2000 + int(m.group(1))
+    return scanned_on.year if scanned_on.month >= 8 else scanned_on.year - 1
+
+def school_year_label(year_start: int) -> str:
+    return f"{year_start}-{(year_start + 1) % 100:02d}"
+
+def display_school_name(school: str) -> str:
+    s = str(school).strip()
+    s = re.sub(r"\s+Official\s+Sports\s+Roster\s+['\u2019]?\d{2}-\d{2}\s*$", "", s, flags=re.IGNORECASE)
+    s = re.sub(r"\s*(Official|Sports|Roster|['’]\d{2}-\d{2})\s*", " ", s, flags=re.IGNORECASE)
+    return re.sub(r"\s+", " ", s).strip()
+
+PHYSICAL_YES_VALUES = ("YES", "Y", "APPROVED", "APPROVE", "CLEARED", "CLEAR", "COMPLETE", "DONE", "OK")
+
+def physical_status(value) -> str:
+    """YES = physical complete (yes, approved, cleared, etc.). Otherwise NO."""
+    if value is None or (isinstance(value, float) and pd.isna(value)): return "NO"
+    s = str(value).strip().upper()
+    if not s: return "NO"
+    if s in PHYSICAL_YES_VALUES: return "YES"
+    if s.startswith("APPROVED") or s.startswith("YES"): return "YES"
+    return "NO"
+
+def physical_cleared(values: pd.Series) -> pd.Series:
+    """physical_status(...) == "YES" for a whole column."""
+    s = values.fillna("").astype(str).str.strip().str.upper()
+    return (s.isin(PHYSICAL_YES_VALUES) | s.str.startswith("APPROVED") | s.str.startswith("YES")).astype(bool)
+
+# ---------------------------------------------------------------------------
+# Core Engine
+# ---------------------------------------------------------------------------
+
+def normalize_val(s):
+    if s is None or (isinstance(s, float) and pd.isna(s)): return ""
+    return str(s).strip()
+
+def find_header_row(rows):
+    for i, row in enumerate(rows[:HEADER_SEARCH_MAX_ROWS]):
+        if not row: continue
+        for cell in row:
+            if normalize_val(cell).upper() == "STUDENT ID": return i
+    return None
+
+def _header_key(cell) -> str:
+    """Header cell → the form aliases are compared in (trimmed, upper-case, no spaces)."""
+    return normalize_val(cell).upper().replace(" ", "")
+
+# Normalized alias → target header, built once (aliases of different targets never collide).
+_ALIAS_TO_TARGET = {_header_key(alias): target for target in TARGET_HEADERS for alias in HEADER_ALIASES.get(target, [target])}
+# Changes whenever the alias rules do, so persisted header templates resolved under older rules are ignored.
+HEADER_RULES_DIGEST = hashlib.sha1(json.dumps([TARGET_HEADERS, HEADER_ALIASES], sort_keys=True).encode()).hexdigest()[:12]
+
+def _map_header_keys(keys) -> dict:
+    found = {}
+    for col_idx, key in enumerate(keys):
+        target = _ALIAS_TO_TARGET.get(key)
+        if target is not None: found[target] = col_idx  # rightmost matching column wins
+    return {t: found[t] for t in TARGET_HEADERS if t in found}
+
+def map_header_to_target(header_row):
+    return _map_header_keys([_header_key(cell) for cell in header_row])
+
+def header_fingerprint(header_row) -> str:
+    """Identifies a header template: the normalized header cells, ignoring trailing blanks."""
+    keys = [_header_key(cell) for cell in header_row]
+    while keys and not keys[-1]: keys.pop()
+    return hashlib.sha1("\x1f".join(keys).encode()).hexdigest()[:16]
+
+class HeaderTemplates:
+    """Header fingerprint → resolved column map, shared by the fetch workers of one scan. Coaches copy a handful of
+    templates, so most tabs resolve with one fingerprint lookup; new fingerprints are mapped once and remembered.
+    Loaded from and saved to the scan cache (ScanCache.header_templates / save_header_templates), which also keeps
+    which schools use which template."""
+    def __init__(self, templates: Optional[dict] = None):
+        self.templates = dict(templates or {})  # fingerprint → (header cells, col_map)
+        self.new = set()
+        self.uses = Counter()  # (fingerprint, school) → tabs this scan
+        self.by_cells = {}  # exact header cells → fingerprint, so a repeated header skips normalizing and hashing
+        self.lock = threading.Lock()
+
+    def resolve(self, header_row, school: str, telemetry: Optional["Telemetry"] = None) -> dict:
+        cells = tuple(header_row)
+        fp = self.by_cells.get(cells)
+        if fp is None: fp = self.by_cells.setdefault(cells, header_fingerprint(header_row))
+        with self.lock:
+            known = self.templates.get(fp)
+            hit = known is not None
+            if not hit:
+                headers = [normalize_val(cell) for cell in header_row]
+                while headers and not headers[-1]: headers.pop()
+                known = self.templates[fp] = (headers, map_header_to_target(header_row))
+                self.new.add(fp)
+            self.uses[fp, school] += 1
+        if telemetry is not None: telemetry.count("header_template_hits" if hit else "header_template_misses")
+        return dict(known[1])
+
+def get_cell(row, col_idx, default=""):
+    if col_idx is None or col_idx >= len(row): return default
+    val = row[col_idx]
+    return str(val).strip() if val and not (isinstance(val, float) and pd.isna(val)) else default
+
+def _cell_text(val) -> str:
+    """get_cell for one cell value (missing/blank → "")."""
+    return str(val).strip() if val and not (isinstance(val, float) and pd.isna(val)) else ""
+
+def _cell_column(frame: pd.DataFrame, col_idx) -> pd.Series:
+    """get_cell for a whole column: missing/blank cells → "", everything else stripped."""
+    if col_idx is None or col_idx not in frame.columns: return pd.Series("", index=frame.index, dtype=object)
+    col = frame[col_idx]
+    if pd.api.types.infer_dtype(col, skipna=True) not in ("string", "empty"):
+        col = col.map(_cell_text)  # non-string cells (not returned by FORMATTED_VALUE reads)
+    return col.fillna("").astype(str).str.strip()
+
+def parse_roster_frame(frame: pd.DataFrame, col_map: dict, school_name: str, tab_name: str) -> pd.DataFrame:
+    """Student rows of one roster tab, column-at-a-time. frame = data rows below the header (object dtype), columns =
+    positions that col_map (target header → column) points into. Same rules as the per-cell get_cell path."""
+    sid = _cell_column(frame, col_map.get("STUDENT ID"))
+    lname = _cell_column(frame, col_map.get("Last Name"))
+    fname = _cell_column(frame, col_map.get("First Name"))
+    keep = sid.str.isdigit() & (sid.str.len() >= 4) & (fname != "") & (lname != "")
+    if not keep.any(): return pd.DataFrame(columns=ROSTER_COLUMNS)
+    rows = frame[keep]  # remaining columns are only cleaned for valid athletes
+    tab = classify_tab(tab_name)
+    out = pd.DataFrame({
+        "School": school_name, "Sport": tab.sport, "Level": tab.level, "Season": tab.season, "Team": tab.team,
+        "STUDENT ID": sid[keep], "Last Name": lname[keep], "First Name": fname[keep],
+        "Gender": _cell_column(rows, col_map.get("Gendar")).str.upper().map(GENDER_LOOKUP).fillna("Other"),
+        "GPA": _cell_column(rows, col_map.get("GPA")),
+        "PHYSICAL": _cell_column(rows, col_map.get("PHYSICAL")),
+    }, columns=ROSTER_COLUMNS)
+    return out.astype(str).reset_index(drop=True)
+
+def parse_sheet_values(all_values, school_name: str, tab_name: str, templates: Optional[HeaderTemplates] = None) -> pd.DataFrame:
+    if not all_values: return pd.DataFrame(columns=ROSTER_COLUMNS)
+    h_idx = find_header_row(all_values)
+    if h_idx is None: return pd.DataFrame(columns=ROSTER_COLUMNS)
+    col_map = templates.resolve(all_values[h_idx], school_name) if templates is not None else map_header_to_target(all_values[h_idx])
+    return parse_roster_frame(pd.DataFrame(all_values[h_idx + 1 :], dtype=object), col_map, school_name, tab_name)
+
+def concat_rosters(frames) -> pd.DataFrame:
+    frames = [f for f in frames if len(f)]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=ROSTER_COLUMNS)
+
+ROSTER_CATEGORY_COLUMNS = ["School", "Sport", "Level", "Season", "Team", "Gender"]
+
+def type_roster(raw: pd.DataFrame) -> pd.DataFrame:
+    """The frame the UI reads: low-cardinality columns as categoricals, School_Disp (display_school_name per school,
+    computed once per category), float32 GPA and a physical_cleared flag. PHYSICAL keeps the coach's text for display."""
+    df = raw[ROSTER_COLUMNS].copy()
+    for col in ROSTER_CATEGORY_COLUMNS:
+        df[col] = df[col].astype("category")
+    df["School_Disp"] = df["School"].map({s: display_school_name(s) for s in df["School"].cat.categories}).astype("category")
+    df["GPA"] = pd.to_numeric(df["GPA"], errors="coerce").astype("float32")
+    df["physical_cleared"] = physical_cleared(df["PHYSICAL"])
+    return df
+
+# Data-quality flags: a registry of athlete-level rules, each a vectorized predicate over the typed roster. All rules
+# are evaluated in one pass into a bitmask per athlete; the cube carries one flag_<key> count per rule, so every
+# flag summary (counts, shares, over-threshold groups for all rules) is one rollup.
+class FlagRule(NamedTuple):
+    key: str
+    label: str  # column label in the summary ("Missing GPA" → "Missing GPA %")
+    predicate: Callable  # typed roster frame → one bool per athlete, whole column at a time (no row-wise apply)
+    heading: str  # markdown above the rule's drill-down table
+    all_clear: str  # shown when no athlete in view is flagged
+    threshold: float = 0.5  # a group is flagged when more than this share of its athletes are
+
+    @property
+    def measure(self) -> str:
+        return f"flag_{self.key}"
+
+FLAG_RULES = [
+    FlagRule("missing_gender", "Missing gender", lambda r: r["Gender"] == "Other",
+             "**Missing gender (Other)** — coach did not record gender for these athletes:",
+             "No missing-gender flags in the current data. Every athlete has Boys/Girls recorded."),
+    FlagRule("missing_gpa", "Missing GPA", lambda r: r["GPA"].isna(),
+             "**Missing GPA** — coach did not record GPA for these athletes:",
+             "No missing-GPA flags in the current data. Every athlete has a GPA recorded."),
+    FlagRule("incomplete_physical", "Incomplete physical", lambda r: ~r["physical_cleared"],
+             "**Missing or incomplete physicals** — anything other than Yes / Approved (e.g. blank, pending, no date):",
+             "No missing/incomplete physical flags. Every athlete has a physical marked Yes or Approved."),
+]
+MAX_FLAG_RULES = 64  # bits in the per-athlete mask
+
+def flag_mask(roster: pd.DataFrame, rules=None) -> np.ndarray:
+    """Bit i set where rules[i] (default FLAG_RULES) flags the athlete: one vectorized predicate per rule."""
+    rules = FLAG_RULES if rules is None else rules
+    mask = np.zeros(len(roster), dtype=np.uint64)
+    for bit, rule in enumerate(rules):
+        mask |= np.asarray(rule.predicate(roster), dtype=bool).astype(np.uint64) << np.uint64(bit)
+    return mask
+
+# Aggregate cube: one row per populated School × Sport × Level × Season × Gender × Team cell (School_Disp rides along,
+# it is a function of School). Every measure is additive, so any chart/KPI/flag is a filter + groupby-sum over the cube.
+CUBE_DIMENSIONS = ["School", "Sport", "Level", "Season", "Gender", "Team"]
+CUBE_MEASURES = ["athletes", "gpa_sum", "gpa_n", "cleared"] + [rule.measure for rule in FLAG_RULES]
+
+def register_flag_rule(rule: FlagRule):
+    """Add a flag rule (or replace the one with the same key). Snapshots built afterwards carry its counts."""
+    for i, existing in enumerate(FLAG_RULES):
+        if existing.key == rule.key:
+            FLAG_RULES[i] = rule
+            return
+    if len(FLAG_RULES) >= MAX_FLAG_RULES: raise ValueError(f"at most {MAX_FLAG_RULES} flag rules")
+    FLAG_RULES.append(rule)
+    CUBE_MEASURES.append(rule.measure)
+
+def build_roster_cube(df: pd.DataFrame) -> pd.DataFrame:
+    gpa = df["GPA"].astype("float64")
+    measures = {
+        "athletes": 1, "gpa_sum": gpa.fillna(0.0), "gpa_n": gpa.notna().astype("int64"),
+        "cleared": df["physical_cleared"].astype("int64"),
+    }
+    mask = flag_mask(df)
+    for bit, rule in enumerate(FLAG_RULES):
+        measures[rule.measure] = ((mask >> np.uint64(bit)) & np.uint64(1)).astype("int64")
+    keys = CUBE_DIMENSIONS + ["School_Disp"]
+    return pd.concat([df[keys], pd.DataFrame(measures, index=df.index)], axis=1).groupby(keys, observed=True, as_index=False).sum()
+
+def rollup(cube: pd.DataFrame, by) -> pd.DataFrame:
+    """Sum the cube's measures up to the `by` columns (only populated combinations)."""
+    return cube.groupby(by, observed=True, as_index=False)[[m for m in CUBE_MEASURES if m in cube.columns]].sum()
+
+def flag_summary(cube: pd.DataFrame, by, rules=None) -> pd.DataFrame:
+    """One rollup of the cube to `by`, then for every rule: athletes flagged (<key>_n), their share as a whole percent
+    (<key>_pct) and whether the share is over the rule's threshold (<key>_over). Rules without counts in this cube
+    (registered after it was built) are left out."""
+    rules = [r for r in (FLAG_RULES if rules is None else rules) if r.measure in cube.columns]
+    grouped = rollup(cube, by)
+    total = grouped["athletes"].to_numpy(dtype="float64")
+    out = {col: grouped[col] for col in ([by] if isinstance(by, str) else by)}
+    out["athletes"] = grouped["athletes"]
+    for rule in rules:
+        n = grouped[rule.measure].to_numpy()
+        share = np.divide(n, total, out=np.zeros(len(total)), where=total > 0)
+        out[f"{rule.key}_n"] = n
+        out[f"{rule.key}_pct"] = np.round(share * 100).astype("int64")
+        out[f"{rule.key}_over"] = share > rule.threshold
+    return pd.DataFrame(out)
+
+FILTER_DIMENSIONS = ["School", "Level", "Season", "Gender", "Team"]
+FILTER_VIEW_CACHE_SIZE = 8
+
+class FilterIndex:
+    """Packed bitmaps (np.packbits, 1 bit per row) per value of each sidebar filter dimension, built once per scan.
+    A filter selection resolves by OR-ing bitmaps within a dimension and AND-ing across dimensions; the resulting
+    views are memoized per selection in a small LRU. Works on the roster rows and on the cube alike."""
+    def __init__(self, frame: pd.DataFrame, dimensions=FILTER_DIMENSIONS, cache_size: int = FILTER_VIEW_CACHE_SIZE):
+        self.frame = frame
+        self.n = len(frame)
+        self.bitmaps = {}
+        self.options = {}
+        for dim in dimensions:
+            if dim not in frame.columns: continue
+            codes, uniques = pd.factorize(frame[dim])
+            self.bitmaps[dim] = {value: np.packbits(codes == i) for i, value in enumerate(uniques)}
+            self.options[dim] = sorted(self.bitmaps[dim])
+        self.cache_size = cache_size
+        self._views = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _select(self, selections: dict):
+        """AND of per-dimension ORs; None when no dimension actually narrows the frame."""
+        result = None
+        for dim, values in selections.items():
+            if values is None or dim not in self.bitmaps: continue
+            bitmaps = self.bitmaps[dim]
+            if set(values) >= bitmaps.keys(): continue  # every present value selected
+            dim_bits = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+            for value in values:
+                if value in bitmaps: dim_bits |= bitmaps[value]
+            result = dim_bits if result is None else result & dim_bits
+        return result
+
+    def view(self, selections: dict) -> pd.DataFrame:
+        """Rows matching selections (dimension → selected values, None = no filter). Shared: callers must not mutate it."""
+        key = tuple((dim, None if values is None else tuple(sorted(values))) for dim, values in sorted(selections.items()))
+        with self._lock:
+            if key in self._views:
+                self._views.move_to_end(key)
+                return self._views[key]
+        bits = self._select(selections)
+        view = self.frame if bits is None else self.frame.iloc[np.flatnonzero(np.unpackbits(bits, count=self.n))]
+        with self._lock:
+            self._views[key] = view
+            while len(self._views) > self.cache_size: self._views.popitem(last=False)
+        return view
+
+SEARCH_MAX_STUDENTS = 50  # students (with every roster row of each) returned per search
+
+class RosterSearchIndex:
+    """Student lookup over the whole roster (not the sidebar filters), built once per snapshot. STUDENT ID prefixes
+    resolve by binary search over the sorted IDs. Names are indexed per distinct (last, first) pair: a trigram →
+    name-ids posting list for substring matches of 3+ characters, and the sorted name words for shorter prefixes.
+    A query's words must all match (a name word in the last or first name, a digit word as an ID prefix); results
+    expand to every row of each matched student, so all their teams show up."""
+    def __init__(self, roster: pd.DataFrame):
+        self.roster = roster
+        ids = roster["STUDENT ID"].astype(str).to_numpy(dtype=object)
+        self._id_order = np.argsort(ids, kind="stable")
+        self._ids = ids[self._id_order]
+        last = roster["Last Name"].astype(str).str.strip().str.upper()
+        first = roster["First Name"].astype(str).str.strip().str.upper()
+        codes, names = pd.factorize(last + "\x1f" + first)
+        self._last, self._first = zip(*(n.split("\x1f", 1) for n in names)) if len(names) else ((), ())
+        # Rows of each distinct name: CSR over rows sorted by name id.
+        self._name_order = np.argsort(codes, kind="stable")
+        self._name_bounds = np.searchsorted(codes[self._name_order], np.arange(len(names) + 1))
+        trigrams = {}
+        for name_id, (l, f) in enumerate(zip(self._last, self._first)):
+            for part in (l, f):
+                for k in range(len(part) - 2):
+                    trigrams.setdefault(part[k : k + 3], set()).add(name_id)
+        self._trigrams = {t: np.fromiter(sorted(ids_), dtype=np.int64) for t, ids_ in trigrams.items()}
+        # Every word of every name ("DE LA CRUZ" → DE, LA, CRUZ), sorted, for short prefixes.
+        words = sorted({(w, name_id) for name_id, (l, f) in enumerate(zip(self._last, self._first)) for w in (l + " " + f).split()})
+        self._words = [w for w, _ in words]
+        self._word_names = [name_id for _, name_id in words]
+
+    def _id_prefix_rows(self, prefix: str) -> np.ndarray:
+        lo = np.searchsorted(self._ids, prefix, side="left")
+        hi = np.searchsorted(self._ids, prefix + "\uffff", side="left")
+        return self._id_order[lo:hi]
+
+    def _name_ids(self, word: str) -> np.ndarray:
+        if len(word) < 3:  # too short for trigrams: prefix of any word of the last or first name
+            lo, hi = bisect_left(self._words, word), bisect_left(self._words, word + "\uffff")
+            return np.fromiter(sorted(set(self._word_names[lo:hi])), dtype=np.int64)
+        candidates = None
+        for k in range(len(word) - 2):
+            posting = self._trigrams.get(word[k : k + 3])
+            if posting is None: return np.empty(0, dtype=np.int64)
+            candidates = posting if candidates is None else np.intersect1d(candidates, posting, assume_unique=True)
+        # Trigrams can match out of order: confirm the substring on the (few) candidates.
+        return np.fromiter((i for i in candidates if word in self._last[i] or word in self._first[i]), dtype=np.int64)
+
+    def _name_rows(self, name_ids: np.ndarray) -> np.ndarray:
+        if not len(name_ids): return np.empty(0, dtype=np.int64)
+        return np.concatenate([self._name_order[self._name_bounds[i] : self._name_bounds[i + 1]] for i in name_ids])
+
+    def search(self, query: str, limit: int = SEARCH_MAX_STUDENTS) -> pd.DataFrame:
+        """Roster rows of the students matching `query` (at most `limit` students), sorted by name."""
+        words = [w for w in re.split(r"[\s,]+", str(query).strip().upper()) if w]
+        if not words: return self.roster.iloc[:0]
+        rows = None
+        for word in words:
+            matched = self._id_prefix_rows(word) if word.isdigit() else self._name_rows(self._name_ids(word))
+            rows = matched if rows is None else np.intersect1d(rows, matched)
+            if not len(rows): return self.roster.iloc[:0]
+        hits = self.roster.iloc[rows]
+        students = hits.sort_values(["Last Name", "First Name", "STUDENT ID"])["STUDENT ID"].astype(str).unique()[:limit]
+        all_rows = np.concatenate([self._id_order[np.searchsorted(self._ids, sid, "left") : np.searchsorted(self._ids, sid, "right")] for sid in students])
+        return self.roster.iloc[all_rows].sort_values(["Last Name", "First Name", "STUDENT ID", "School", "Sport"])
+
+EXPORT_CHUNK_ROWS = 10_000  # rows serialized at a time, so an export never holds a second full-size text copy
+
+def _xlsx_engine() -> Optional[str]:
+    """openpyxl / xlsxwriter are optional: without either, Excel is left out of EXPORT_FORMATS."""
+    for engine in ("xlsxwriter", "openpyxl"):
+        try:
+            __import__(engine)
+            return engine
+        except ImportError:
+            continue
+    return None
+
+_XLSX_ENGINE = _xlsx_engine()
+
+# Label → (file extension, MIME type) for the roster exports available in this environment.
+EXPORT_FORMATS = {"CSV": ("csv", "text/csv"), "Parquet": ("parquet", "application/vnd.apache.parquet")}
+if _XLSX_ENGINE:
+    EXPORT_FORMATS["Excel"] = ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+def export_roster(frame: pd.DataFrame, fmt: str) -> bytes:
+    """`frame` as a downloadable file in one of EXPORT_FORMATS, written EXPORT_CHUNK_ROWS rows at a time (CSV chunks,
+    Parquet row groups) into one buffer."""
+    buf = io.BytesIO()
+    if fmt == "CSV":
+        for start in range(0, max(len(frame), 1), EXPORT_CHUNK_ROWS):
+            buf.write(frame.iloc[start : start + EXPORT_CHUNK_ROWS].to_csv(index=False, header=start == 0).encode("utf-8"))
+    elif fmt == "Parquet":
+        with pq.ParquetWriter(buf, pa.Schema.from_pandas(frame, preserve_index=False)) as writer:
+            for start in range(0, max(len(frame), 1), EXPORT_CHUNK_ROWS):
+                writer.write_table(pa.Table.from_pandas(frame.iloc[start : start + EXPORT_CHUNK_ROWS], preserve_index=False))
+    elif fmt == "Excel" and _XLSX_ENGINE:
+        # Excel workbooks are written whole; categoricals as plain text so the sheet holds values, not codes
+        frame.astype({c: "object" for c in frame.columns if isinstance(frame[c].dtype, pd.CategoricalDtype)}).to_excel(buf, index=False, sheet_name="Roster", engine=_XLSX_ENGINE)
+    else:
+        raise ValueError(f"unknown export format {fmt!r} (available: {', '.join(EXPORT_FORMATS)})")
+    return buf.getvalue()
+
+class Telemetry:
+    """Timing spans and counters for one scan or one rerun. Thread-safe: fetch workers share the scan's instance.
+    Spans aggregate by name (count / total / max); spans opened with labels are also kept as individual events
+    (one per spreadsheet, one per tab) for the JSON-lines log."""
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.finished = None
+        self.spans = {}  # name -> [count, total seconds, max seconds]
+        self.counters = Counter()
+        self.events = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **labels):
+        """Time the block. Labels (and anything the block adds to the yielded dict) become a span event."""
+        start = time.perf_counter()
+        try:
+            yield labels
+        finally:
+            self.record(name, time.perf_counter() - start, **labels)
+
+    def record(self, name: str, elapsed: float, **labels):
+        """A span timed elsewhere (e.g. per tab inside parse_roster_tabs)."""
+        with self.lock:
+            agg = self.spans.setdefault(name, [0, 0.0, 0.0])
+            agg[0] += 1
+            agg[1] += elapsed
+            agg[2] = max(agg[2], elapsed)
+            if labels: self.events.append({"span": name, "ms": round(elapsed * 1000, 2), **labels})
+
+    def count(self, name: str, n: int = 1):
+        with self.lock:
+            self.counters[name] += n
+
+    def event(self, **fields):
+        with self.lock:
+            self.events.append(fields)
+
+    def finish(self):
+        self.finished = time.perf_counter()
+        return self
+
+    def summary(self) -> dict:
+        with self.lock:
+            return {
+                "kind": self.kind, "started_at": self.started_at.isoformat(),
+                "ms": round(((self.finished or time.perf_counter()) - self.started) * 1000, 2),
+                "spans": {name: {"count": n, "total_ms": round(total * 1000, 2), "max_ms": round(worst * 1000, 2)} for name, (n, total, worst) in self.spans.items()},
+                "counters": dict(self.counters),
+            }
+
+    def span_frame(self) -> pd.DataFrame:
+        rows = [{"Stage": name, **stats} for name, stats in self.summary()["spans"].items()]
+        return pd.DataFrame(rows, columns=["Stage", "count", "total_ms", "max_ms"]).sort_values("total_ms", ascending=False)
+
+    def write_jsonl(self, path: Optional[str] = TELEMETRY_LOG_PATH):
+        """Append the span events and a closing summary line (all tagged with kind and started_at), first rotating the
+        file to <path>.1 if it has reached TELEMETRY_LOG_MAX_BYTES."""
+        if not path: return
+        tag = {"kind": self.kind, "started_at": self.started_at.isoformat()}
+        with self.lock:
+            events = list(self.events)
+        lines = [json.dumps({"type": "event", **tag, **e}, default=str) for e in events]
+        lines.append(json.dumps({"type": "summary", **self.summary()}, default=str))
+        try:
+            if os.path.exists(path) and os.path.getsize(path) >= TELEMETRY_LOG_MAX_BYTES:
+                os.replace(path, path + ".1")
+            with open(path, "a") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError:
+            pass  # diagnostics must never break a scan or a rerun
+
+class NullTelemetry(Telemetry):
+    """Discards everything: the default when a caller does not collect diagnostics."""
+    def __init__(self):
+        super().__init__("null")
+
+    @contextmanager
+    def span(self, name: str, **labels):
+        yield labels
+
+    def record(self, name: str, elapsed: float, **labels):
+        pass
+
+    def count(self, name: str, n: int = 1):
+        pass
+
+    def event(self, **fields):
+        pass
+
+NO_TELEMETRY = NullTelemetry()
+
+def _parse_json_with_private_key_newlines(s: str):
+    """Parse JSON when 'private_key' value contains literal newlines (invalid in strict JSON)."""
+    key = '"private_key"'
+    i = s.find(key)
+    if i == -1:
+        raise json.JSONDecodeError("No 'private_key' key found", s, 0)
+    i = s.find('"', i + len(key) + 1)  # skip to value opening quote
+    if i == -1:
+        raise json.JSONDecodeError("Malformed private_key", s, 0)
+    start = i + 1  # start of value content
+    end = start
+    while end < len(s):
+        if s[end] == "\\" and end + 1 < len(s):
+            end += 2
+            continue
+        if s[end] == '"':
+            break
+        end += 1
+    value = s[start:end]
+    fixed = value.replace("\r", "\\r").replace("\n", "\\n").replace("\t", "\\t")
+    new_s = s[:start] + fixed + s[end:]
+    return json.loads(new_s)
+
+def _service_account_info(raw) -> dict:
+    """Service-account JSON string (pasted private keys may carry raw newlines) or dict-like → plain dict."""
+    if isinstance(raw, str):
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError as je:
+            if "control character" in str(je).lower() or "line" in str(je).lower():
+                return _parse_json_with_private_key_newlines(raw)
+            raise
+    return json.loads(json.dumps(raw))  # normalize dict-like to plain dict
+
+def _get_creds():
+    """Use Streamlit secrets if set (deploy), else the GCP_SERVICE_ACCOUNT environment variable (cron / roster_etl.py),
+    else local service_account_2.json (local run)."""
+    scopes = ["https://www.googleapis.com/auth/drive.readonly", "https://www.googleapis.com/auth/spreadsheets.readonly"]
+
+    # 1) Try Streamlit Secrets (Cloud deploy). Only consulted when the dashboard has already imported Streamlit.
+    st = sys.modules.get("streamlit")
+    if st is not None and hasattr(st, "secrets") and st.secrets:
+        raw = None
+        for key in ("gcp_service_account", "GCP_SERVICE_ACCOUNT"):
+            try:
+                raw = st.secrets.get(key)
+                if raw is not None:
+                    break
+            except Exception:
+                continue
+        if raw is not None:
+            try:
+                return Credentials.from_service_account_info(_service_account_info(raw), scopes=scopes)
+            except Exception as e:
+                raise RuntimeError(
+                    f"Secrets key 'gcp_service_account' is set but invalid: {e}. "
+                    "Check that the value is valid JSON or TOML with type, project_id, private_key_id, private_key, client_email."
+                ) from e
+        # Secrets exist but key missing — likely Cloud with wrong key name
+        try:
+            keys = list(st.secrets.keys()) if hasattr(st.secrets, "keys") else []
+        except Exception:
+            keys = []
+        raise FileNotFoundError(
+            "No credentials found. In Streamlit Cloud → Settings → Secrets, add a key named exactly: gcp_service_account. "
+            f"Current secret keys: {keys if keys else '(none)'}. "
+            "Value: paste your full service_account_2.json content as JSON, or use a [gcp_service_account] section with type, project_id, private_key, client_email, etc."
+        )
+
+    # 2) Headless runs: service-account JSON in the environment
+    raw = os.environ.get("GCP_SERVICE_ACCOUNT")
+    if raw:
+        try:
+            return Credentials.from_service_account_info(_service_account_info(raw), scopes=scopes)
+        except Exception as e:
+            raise RuntimeError(f"GCP_SERVICE_ACCOUNT is set but invalid: {e}.") from e
+
+    # 3) Local: use file
+    try:
+        return Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=scopes)
+    except FileNotFoundError:
+        raise FileNotFoundError(
+            "No credentials found. Add service_account_2.json locally, set GCP_SERVICE_ACCOUNT, or set gcp_service_account in Streamlit Secrets (Settings → Secrets)."
+        )
+
+class _CountingConnections(dict):
+    """httplib2.Http.connections stand-in that counts every new connection (one TLS handshake each)."""
+    def __init__(self, clients: "GoogleClients"):
+        super().__init__()
+        self.clients = clients
+
+    def __setitem__(self, key, conn):
+        with self.clients.lock:
+            self.clients.connections_opened += 1
+        super().__setitem__(key, conn)
+
+class GoogleClients:
+    """Process-wide Google API resources, reused by every scan: credentials are loaded once, and each thread gets one
+    keep-alive authorized HTTP connection pool plus the discovery-built services bound to it (httplib2.Http is not
+    thread-safe). Expired service-account tokens are refreshed transparently by AuthorizedHttp."""
+    def __init__(self):
+        self.creds = _get_creds()
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.connections_opened = 0
+        self.services_built = 0
+
+    def http(self) -> AuthorizedHttp:
+        if not hasattr(self.local, "http"):
+            http = httplib2.Http(timeout=HTTP_TIMEOUT_SECONDS)
+            http.connections = _CountingConnections(self)
+            self.local.http = AuthorizedHttp(self.creds, http=http)
+        return self.local.http
+
+    def service(self, name: str, version: str):
+        services = self.local.__dict__.setdefault("services", {})
+        if (name, version) not in services:
+            services[(name, version)] = build(name, version, http=self.http(), cache_discovery=False)
+            with self.lock:
+                self.services_built += 1
+        return services[(name, version)]
+
+_clients: Optional[GoogleClients] = None
+_fetch_pool: Optional[ThreadPoolExecutor] = None
+_list_pool: Optional[ThreadPoolExecutor] = None
+_sheets_limiter: Optional["TokenBucket"] = None
+_drive_limiter: Optional["TokenBucket"] = None
+_resources_lock = threading.Lock()
+
+def get_google_clients() -> GoogleClients:
+    global _clients
+    with _resources_lock:
+        if _clients is None: _clients = GoogleClients()
+        return _clients
+
+def reset_google_clients():
+    """Drop cached credentials and connections (e.g. after the service-account secret changed), and the rate limiters
+    (quota is per credential)."""
+    global _clients, _sheets_limiter, _drive_limiter
+    with _resources_lock:
+        _clients = _sheets_limiter = _drive_limiter = None
+
+def get_sheets_limiter() -> "TokenBucket":
+    """The process's Sheets read budget: every scan and ingest draws from it, so together they stay under quota."""
+    global _sheets_limiter
+    with _resources_lock:
+        if _sheets_limiter is None: _sheets_limiter = TokenBucket(SHEETS_READS_PER_MINUTE, SHEETS_READ_BURST)
+        return _sheets_limiter
+
+def get_drive_limiter() -> "TokenBucket":
+    global _drive_limiter
+    with _resources_lock:
+        if _drive_limiter is None: _drive_limiter = TokenBucket(DRIVE_REQUESTS_PER_MINUTE, DRIVE_REQUEST_BURST)
+        return _drive_limiter
+
+def get_list_pool() -> ThreadPoolExecutor:
+    """Long-lived Drive listing workers (folder crawl), kept apart from the fetch pool so listing never waits behind fetches."""
+    global _list_pool
+    with _resources_lock:
+        if _list_pool is None: _list_pool = ThreadPoolExecutor(max_workers=LIST_WORKERS, thread_name_prefix="roster-list")
+        return _list_pool
+
+def get_fetch_pool() -> ThreadPoolExecutor:
+    """Long-lived fetch workers: their threads (and so their connections and services) outlive a single scan."""
+    global _fetch_pool
+    with _resources_lock:
+        if _fetch_pool is None: _fetch_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="roster-fetch")
+        return _fetch_pool
+
+class TokenBucket:
+    """Thread-safe token bucket for API reads. Halves its refill rate on quota errors, creeps back up on success."""
+    def __init__(self, per_minute: float, burst: int):
+        self.max_rate = per_minute / 60.0
+        self.rate = self.max_rate
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_quota_hit(self):
+        with self.lock:
+            self.rate = max(self.max_rate / 8, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+
+    def on_success(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+def _is_quota_error(e: Exception) -> bool:
+    if isinstance(e, HttpError):
+        if e.resp.status == 429: return True
+        body = e.content.decode("utf-8", "replace") if isinstance(e.content, bytes) else str(e.content)
+        return e.resp.status == 403 and any(r in body for r in ("RESOURCE_EXHAUSTED", "rateLimitExceeded", "userRateLimitExceeded"))
+    return "RESOURCE_EXHAUSTED" in str(e)
+
+def _is_retryable(e: Exception) -> bool:
+    """Quota errors, 5xx, and connections that timed out or dropped mid-request."""
+    if isinstance(e, (TimeoutError, ConnectionError, httplib2.ServerNotFoundError)): return True
+    return _is_quota_error(e) or (isinstance(e, HttpError) and e.resp.status in (500, 502, 503, 504))
+
+def _count_response_bytes(request, telemetry: Telemetry):
+    """Wrap the request's response post-processor so the raw body size is counted before JSON decoding."""
+    postproc = getattr(request, "postproc", None)
+    if postproc is None or isinstance(telemetry, NullTelemetry): return
+    def counted(resp, content):
+        telemetry.count("bytes_received", len(content or b""))
+        return postproc(resp, content)
+    request.postproc = counted
+
+def execute_with_retry(request, limiter: TokenBucket, telemetry: Telemetry = NO_TELEMETRY):
+    """Run a googleapiclient request under the rate limiter; 429/RESOURCE_EXHAUSTED and 5xx retry with full-jitter exponential backoff."""
+    _count_response_bytes(request, telemetry)
+    for attempt in range(QUOTA_MAX_RETRIES + 1):
+        with telemetry.span("rate_limit_wait"):
+            limiter.acquire()
+        telemetry.count("api_calls")
+        try:
+            resp = request.execute()
+        except Exception as e:
+            if attempt == QUOTA_MAX_RETRIES or not _is_retryable(e): raise
+            telemetry.count("retries")
+            if _is_quota_error(e):
+                telemetry.count("quota_hits")
+                limiter.on_quota_hit()
+            with telemetry.span("retry_backoff"):
+                time.sleep(random.uniform(0, min(QUOTA_BACKOFF_MAX, QUOTA_BACKOFF_BASE * 2 ** attempt)))
+            continue
+        limiter.on_success()
+        return resp
+
+def _col_letter(idx: int) -> str:
+    """0-based column index → A1 column letters (0 → A, 26 → AA)."""
+    letters = ""
+    idx += 1
+    while idx:
+        idx, rem = divmod(idx - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+def _column_runs(cols):
+    """Sorted column indices → contiguous (first, last) runs, so adjacent columns share one range."""
+    runs = []
+    for c in sorted(set(cols)):
+        if runs and c == runs[-1][1] + 1: runs[-1][1] = c
+        else: runs.append([c, c])
+    return [tuple(r) for r in runs]
+
+def _tab_columns(run_values, runs, col_map: dict):
+    """Per-run value grids → (target header → that column's cells, row count). Plain lists, padded with None to the
+    longest run (the API drops trailing empty rows per range)."""
+    starts, width = [], 0
+    for first, last in runs:
+        starts.append(width)
+        width += last - first + 1
+    n_rows = max((len(values) for values in run_values), default=0)
+    columns = {}
+    for target, col in col_map.items():
+        k = bisect_right(starts, col) - 1
+        offset, values = col - starts[k], run_values[k]
+        cells = [row[offset] if offset < len(row) else None for row in values]
+        columns[target] = cells + [None] * (n_rows - len(cells))
+    return columns, n_rows
+
+class RosterTab(NamedTuple):
+    """One roster tab as fetched: the mapped columns' value grids (one per contiguous run of columns), not yet parsed."""
+    title: str
+    run_values: list
+    runs: list
+    col_map: dict  # target header → column in the stitched frame
+
+def fetch_roster_tabs(sheets, f_id: str, f_name: str, limiter: TokenBucket, telemetry: Telemetry = NO_TELEMETRY,
+                      templates: Optional[HeaderTemplates] = None) -> list:
+    """Metadata get, then a header-probe batchGet of the top rows of every tab, then one batchGet of only the
+    roster columns of roster tabs → RosterTabs, ready for parse_roster_tabs. Non-roster tabs (notes, schedules) never
+    get past the probe. Header rows resolve through `templates` when given (known templates skip the alias mapping)."""
+    with telemetry.span("sheets.get"):
+        meta_resp = execute_with_retry(sheets.spreadsheets().get(spreadsheetId=f_id, fields="sheets(properties(title,gridProperties(rowCount,columnCount)))"), limiter, telemetry)
+    meta = [{"title": s["properties"]["title"], "rows": min(s["properties"]["gridProperties"].get("rowCount", 1000), MAX_ROWS_PER_SHEET), "cols": min(s["properties"]["gridProperties"].get("columnCount", 26), 26)} for s in meta_resp.get("sheets", [])]
+    if not meta: return []
+
+    # FIXED LINE: Replacement moved out of f-string
+    for m in meta:
+        m["safe_title"] = m["title"].replace("'", "''")
+
+    # Phase 1: header probe (A1:Z15 at most) decides which tabs are rosters and where the TARGET_HEADERS columns are.
+    probe_ranges = [f"'{m['safe_title']}'!A1:{_col_letter(m['cols'] - 1)}{min(HEADER_SEARCH_MAX_ROWS, m['rows'])}" for m in meta]
+    with telemetry.span("sheets.probe_batchGet"):
+        probe_resp = execute_with_retry(sheets.spreadsheets().values().batchGet(spreadsheetId=f_id, ranges=probe_ranges, valueRenderOption="FORMATTED_VALUE"), limiter, telemetry)
+    rosters = []
+    for m, grid in zip(meta, probe_resp.get("valueRanges", [])):
+        values = grid.get("values", [])
+        h_idx = find_header_row(values)
+        if h_idx is None or h_idx + 2 > m["rows"]:
+            telemetry.count("tabs_skipped")
+            continue
+        col_map = templates.resolve(values[h_idx], f_name, telemetry) if templates is not None else map_header_to_target(values[h_idx])
+        runs = _column_runs(col_map.values())
+        ranges = [f"'{m['safe_title']}'!{_col_letter(first)}{h_idx + 2}:{_col_letter(last)}{m['rows']}" for first, last in runs]
+        # Column indices in the stitched frame: position of each mapped column within the concatenated runs.
+        stitched = [c for first, last in runs for c in range(first, last + 1)]
+        rosters.append((m["title"], ranges, runs, {t: stitched.index(c) for t, c in col_map.items()}))
+    if not rosters: return []
+
+    # Phase 2: only the mapped columns, from the row under the header to the last row.
+    data_ranges = [r for _, ranges, _, _ in rosters for r in ranges]
+    with telemetry.span("sheets.data_batchGet"):
+        data_resp = execute_with_retry(sheets.spreadsheets().values().batchGet(spreadsheetId=f_id, ranges=data_ranges, valueRenderOption="FORMATTED_VALUE"), limiter, telemetry)
+    value_ranges = iter(data_resp.get("valueRanges", []))
+    return [RosterTab(title, [next(value_ranges, {}).get("values", []) for _ in ranges], runs, col_map) for title, ranges, runs, col_map in rosters]
+
+def _parse_roster_cells(cells: dict, n_rows: int, school_name: str, tab_name: str) -> list:
+    """parse_roster_frame for one small tab in plain Python, cell by cell → rows of ROSTER_COLUMNS values.
+    cells = target header → that column's cells (_tab_columns)."""
+    tab = classify_tab(tab_name)
+    blank = [None] * n_rows
+    rows = []
+    for sid, lname, fname, gender, gpa, physical in zip(*(cells.get(t, blank) for t in ("STUDENT ID", "Last Name", "First Name", "Gendar", "GPA", "PHYSICAL"))):
+        sid, lname, fname = _cell_text(sid), _cell_text(lname), _cell_text(fname)
+        if not (sid.isdigit() and len(sid) >= 4 and fname and lname): continue
+        rows.append((school_name, tab.sport, tab.level, tab.season, tab.team, sid, lname, fname,
+                     GENDER_LOOKUP.get(_cell_text(gender).upper(), "Other"), _cell_text(gpa), _cell_text(physical)))
+    return rows
+
+def parse_roster_tabs(f_name: str, tabs: list):
+    """RosterTabs of one spreadsheet → (parsed roster frame, per-tab (title, rows_kept, rows_rejected, seconds, error)).
+    Parsed cell by cell in plain Python (_parse_roster_cells): roster tabs run 15-25 rows, where the fixed cost of
+    column operations outweighs the rows, and with the cells already pulled out as lists it stays ahead at any size
+    the fetch allows (benchmarks/bench_grid_parser.py). A tab that fails to parse is left out with its error; the other
+    tabs still count. Pure CPU: the fetch thread that downloaded the spreadsheet runs it."""
+    rows, stats = [], []
+    for tab in tabs:
+        start = time.perf_counter()
+        try:
+            cells, n_rows = _tab_columns(tab.run_values, tab.runs, tab.col_map)
+            kept = _parse_roster_cells(cells, n_rows, f_name, tab.title)
+        except Exception as e:
+            stats.append((tab.title, 0, 0, time.perf_counter() - start, f"{type(e).__name__}: {e}"))
+            continue
+        stats.append((tab.title, len(kept), n_rows - len(kept), time.perf_counter() - start, None))
+        rows.extend(kept)
+    return (pd.DataFrame(rows, columns=ROSTER_COLUMNS) if rows else pd.DataFrame(columns=ROSTER_COLUMNS)), stats
+
+def _record_parse(telemetry: Telemetry, f_name: str, stats):
+    for title, kept, rejected, elapsed, error in stats:
+        if error is not None:
+            telemetry.count("tabs_failed")
+            telemetry.event(event="tab_failed", school=f_name, tab=title, error=error)
+            continue
+        telemetry.record("parse_tab", elapsed, school=f_name, tab=title, rows_kept=kept, rows_rejected=rejected)
+        telemetry.count("tabs_parsed")
+        telemetry.count("rows_kept", kept)
+        telemetry.count("rows_rejected", rejected)
+
+class ScanCache:
+    """SQLite store of the parsed roster frame per spreadsheet, valid while (name, modifiedTime, SCAN_CACHE_VERSION) match."""
+    def __init__(self, path: str = SCAN_CACHE_PATH):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS spreadsheets (file_id TEXT PRIMARY KEY, name TEXT NOT NULL, "
+            "modified_time TEXT NOT NULL, version INTEGER NOT NULL, records TEXT NOT NULL)"
+        )
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS header_templates (
+                fingerprint TEXT NOT NULL, rules TEXT NOT NULL, headers TEXT NOT NULL, col_map TEXT NOT NULL,
+                first_seen TEXT NOT NULL, PRIMARY KEY (fingerprint, rules));
+            CREATE TABLE IF NOT EXISTS header_template_uses (
+                school TEXT NOT NULL, fingerprint TEXT NOT NULL, tabs INTEGER NOT NULL, PRIMARY KEY (school, fingerprint));
+            CREATE TABLE IF NOT EXISTS dead_letters (
+                file_id TEXT NOT NULL, tab TEXT NOT NULL, name TEXT NOT NULL, modified_time TEXT NOT NULL,
+                error TEXT NOT NULL, attempts INTEGER NOT NULL, failed_at TEXT NOT NULL, PRIMARY KEY (file_id, tab));
+            CREATE TABLE IF NOT EXISTS metric_facts (
+                metric TEXT PRIMARY KEY, file_id TEXT NOT NULL, modified_time TEXT NOT NULL, rules TEXT NOT NULL,
+                tab TEXT NOT NULL, fetched_at TEXT NOT NULL, records TEXT NOT NULL);
+        """)
+
+    def get(self, file_id: str, name: str, modified_time: str):
+        row = self.conn.execute(
+            "SELECT records FROM spreadsheets WHERE file_id = ? AND name = ? AND modified_time = ? AND version = ?",
+            (file_id, name, modified_time, SCAN_CACHE_VERSION),
+        ).fetchone()
+        return pd.DataFrame(json.loads(row[0]), columns=ROSTER_COLUMNS) if row else None
+
+    def get_previous(self, file_id: str):
+        """The last roster parsed from this spreadsheet under the current rules, whatever its modified time: what the
+        dashboard keeps showing for a school whose current copy could not be fetched."""
+        row = self.conn.execute("SELECT records FROM spreadsheets WHERE file_id = ? AND version = ?", (file_id, SCAN_CACHE_VERSION)).fetchone()
+        return pd.DataFrame(json.loads(row[0]), columns=ROSTER_COLUMNS) if row else None
+
+    def put(self, file_id: str, name: str, modified_time: str, roster: pd.DataFrame):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO spreadsheets VALUES (?, ?, ?, ?, ?)",
+                (file_id, name, modified_time, SCAN_CACHE_VERSION, json.dumps(roster[ROSTER_COLUMNS].values.tolist())),
+            )
+
+    def dead_letter(self, file_id: str, name: str, modified_time: str, error: str, attempts: int = 1, tab: str = ""):
+        """Record a spreadsheet (tab "") or one of its tabs that could not be loaded. A spreadsheet-level dead letter
+        is retried on every scan; a tab-level one (a parse error) when the spreadsheet changes."""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO dead_letters VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (file_id, tab, name, modified_time, error, attempts, datetime.now(timezone.utc).isoformat(timespec="seconds")),
+            )
+
+    def clear_dead_letters(self, file_id: str):
+        with self.conn:
+            self.conn.execute("DELETE FROM dead_letters WHERE file_id = ?", (file_id,))
+
+    def prune_dead_letters(self, file_ids):
+        """Forget dead letters of spreadsheets no longer in the folder (after a complete listing)."""
+        keep = set(file_ids)
+        gone = [(f,) for (f,) in self.conn.execute("SELECT DISTINCT file_id FROM dead_letters") if f not in keep]
+        with self.conn:
+            self.conn.executemany("DELETE FROM dead_letters WHERE file_id = ?", gone)
+
+    def dead_letters(self) -> pd.DataFrame:
+        return pd.read_sql_query(
+            "SELECT name AS school, tab, error, attempts, failed_at, file_id FROM dead_letters ORDER BY name, tab", self.conn
+        )
+
+    def metric_facts(self, file_id: Optional[str] = None, modified_time: Optional[str] = None) -> Optional["MetricFacts"]:
+        """The Command Center fact tables parsed under the current METRIC_SCHEMAS, or None unless every schema has
+        one. With file_id/modified_time, only if they were parsed from that copy of the spreadsheet."""
+        rows = {metric: row for metric, *row in self.conn.execute(
+            "SELECT metric, file_id, modified_time, tab, fetched_at, records FROM metric_facts WHERE rules = ?", (METRIC_RULES_DIGEST,))}
+        if any(schema.key not in rows for schema in METRIC_SCHEMAS): return None
+        if file_id is not None and any(rows[schema.key][:2] != [file_id, modified_time] for schema in METRIC_SCHEMAS): return None
+        tables = {schema.key: _type_metric_facts(schema, pd.DataFrame(json.loads(rows[schema.key][4]), columns=schema.columns))
+                  for schema in METRIC_SCHEMAS}
+        tabs = {schema.key: rows[schema.key][2] for schema in METRIC_SCHEMAS}
+        _, modified, _, fetched_at, _ = rows[METRIC_SCHEMAS[0].key]
+        return MetricFacts(tables, tabs, modified, datetime.fromisoformat(fetched_at))
+
+    def put_metric_facts(self, file_id: str, facts: "MetricFacts"):
+        with self.conn:
+            self.conn.execute("DELETE FROM metric_facts")
+            self.conn.executemany("INSERT INTO metric_facts VALUES (?, ?, ?, ?, ?, ?, ?)", (
+                (key, file_id, facts.modified_time, METRIC_RULES_DIGEST, facts.tabs[key], facts.fetched_at.isoformat(timespec="seconds"),
+                 json.dumps(table.astype(object).where(table.notna(), None).values.tolist()))
+                for key, table in facts.tables.items()))
+
+    def header_templates(self) -> HeaderTemplates:
+        rows = self.conn.execute("SELECT fingerprint, headers, col_map FROM header_templates WHERE rules = ?", (HEADER_RULES_DIGEST,))
+        return HeaderTemplates({fp: (json.loads(headers), json.loads(col_map)) for fp, headers, col_map in rows})
+
+    def save_header_templates(self, templates: HeaderTemplates):
+        """Store templates first seen this scan, and replace the template usage of every school parsed this scan
+        (schools answered from the cache keep their recorded usage)."""
+        today = date.today().isoformat()
+        with templates.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO header_templates VALUES (?, ?, ?, ?, ?)",
+                ((fp, HEADER_RULES_DIGEST, json.dumps(templates.templates[fp][0]), json.dumps(templates.templates[fp][1]), today) for fp in templates.new),
+            )
+            schools = {school for _, school in templates.uses}
+            self.conn.executemany("DELETE FROM header_template_uses WHERE school = ?", ((school,) for school in schools))
+            self.conn.executemany("INSERT INTO header_template_uses VALUES (?, ?, ?)", ((school, fp, n) for (fp, school), n in templates.uses.items()))
+
+    def header_template_inventory(self) -> pd.DataFrame:
+        """One row per header template in use: which targets it maps, which it lacks, and how many schools/tabs use it."""
+        known = {fp: (json.loads(headers), json.loads(col_map)) for fp, headers, col_map in
+                 self.conn.execute("SELECT fingerprint, headers, col_map FROM header_templates WHERE rules = ?", (HEADER_RULES_DIGEST,))}
+        uses = pd.read_sql_query("SELECT fingerprint, school, tabs FROM header_template_uses", self.conn)
+        uses = uses[uses["fingerprint"].isin(known)]
+        rows = []
+        for fp, group in uses.groupby("fingerprint"):
+            headers, col_map = known[fp]
+            rows.append({
+                "template": fp, "schools": group["school"].nunique(), "tabs": int(group["tabs"].sum()),
+                "missing": ", ".join(t for t in TARGET_HEADERS if t not in col_map),
+                "headers": " | ".join(h for h in headers if h), "example school": group["school"].min(),
+            })
+        columns = ["template", "schools", "tabs", "missing", "headers", "example school"]
+        return pd.DataFrame(rows, columns=columns).sort_values(["schools", "tabs"], ascending=False, ignore_index=True)
+
+    def close(self):
+        self.conn.close()
+
+def header_template_inventory(path: str = SCAN_CACHE_PATH) -> pd.DataFrame:
+    """Header templates seen across schools, from the scan cache (empty before the first scan or after a cache clear)."""
+    cache = ScanCache(path)
+    try:
+        return cache.header_template_inventory()
+    finally:
+        cache.close()
+
+def scan_dead_letters(path: str = SCAN_CACHE_PATH) -> pd.DataFrame:
+    """Spreadsheets and tabs the last scans could not load, with their errors (empty before the first scan)."""
+    cache = ScanCache(path)
+    try:
+        return cache.dead_letters()
+    finally:
+        cache.close()
+
+def clear_scan_cache(path: str = SCAN_CACHE_PATH):
+    if os.path.exists(path): os.remove(path)
+
+class RosterHistory:
+    """Append-only SQLite history of complete scans for return-rate, multi-sport and transfer metrics.
+    One partition per (scan date, school year); rescanning on the same day replaces only that day's partition.
+    Queries read the latest partition of each school year and run as indexed joins inside SQLite, so the dashboard
+    only ever holds the small aggregate results, never the history itself."""
+    def __init__(self, path: str = HISTORY_DB_PATH):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS partitions (
+                    partition_id INTEGER PRIMARY KEY, scanned_on TEXT NOT NULL, year_start INTEGER NOT NULL,
+                    athletes INTEGER NOT NULL, UNIQUE (scanned_on, year_start));
+                CREATE TABLE IF NOT EXISTS athletes (
+                    partition_id INTEGER NOT NULL REFERENCES partitions, year_start INTEGER NOT NULL,
+                    student_id TEXT NOT NULL, school TEXT NOT NULL, sport TEXT NOT NULL, level TEXT, season TEXT,
+                    team TEXT, gender TEXT, gpa REAL, physical_cleared INTEGER);
+                CREATE INDEX IF NOT EXISTS athletes_student ON athletes (student_id, partition_id, school);
+                CREATE INDEX IF NOT EXISTS athletes_school ON athletes (partition_id, school, student_id, sport);
+                CREATE INDEX IF NOT EXISTS athletes_sport ON athletes (partition_id, sport, student_id);
+                CREATE VIEW IF NOT EXISTS latest AS
+                    SELECT year_start, MAX(partition_id) AS partition_id FROM partitions GROUP BY year_start;
+            """)
+
+    def append(self, roster: pd.DataFrame, scanned_on: date):
+        """Record a typed, complete roster (School_Disp as the school) under today's partition(s)."""
+        if roster.empty: return
+        year_by_school = {school: school_year_start(school, scanned_on) for school in roster["School"].unique()}
+        years = roster["School"].map(year_by_school).astype(int)
+        rows = pd.DataFrame({
+            "year_start": years, "student_id": roster["STUDENT ID"].astype(str), "school": roster["School_Disp"].astype(str),
+            "sport": roster["Sport"].astype(str), "level": roster["Level"].astype(str), "season": roster["Season"].astype(str),
+            "team": roster["Team"].astype(str), "gender": roster["Gender"].astype(str),
+            "gpa": roster["GPA"].astype("float64"), "physical_cleared": roster["physical_cleared"].astype(int),
+        })
+        with self.lock, self.conn:
+            for year, part in rows.groupby("year_start"):
+                self.conn.execute("DELETE FROM athletes WHERE partition_id IN (SELECT partition_id FROM partitions WHERE scanned_on = ? AND year_start = ?)", (scanned_on.isoformat(), int(year)))
+                self.conn.execute("DELETE FROM partitions WHERE scanned_on = ? AND year_start = ?", (scanned_on.isoformat(), int(year)))
+                partition_id = self.conn.execute("INSERT INTO partitions (scanned_on, year_start, athletes) VALUES (?, ?, ?)", (scanned_on.isoformat(), int(year), len(part))).lastrowid
+                # SQLite stores a NaN GPA as NULL.
+                self.conn.executemany("INSERT INTO athletes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", ((partition_id, *row) for row in part.itertuples(index=False, name=None)))
+
+    def _query(self, sql: str, params=()) -> pd.DataFrame:
+        with self.lock:
+            return pd.read_sql_query(sql, self.conn, params=params)
+
+    def partitions(self) -> pd.DataFrame:
+        return self._query("SELECT partition_id, scanned_on, year_start, athletes FROM partitions ORDER BY partition_id")
+
+    def return_rates(self, by: str = "school") -> pd.DataFrame:
+        """Share of each school year's athletes (grouped by `by`: school or sport) who play again the next school year, anywhere."""
+        if by not in ("school", "sport"): raise ValueError(f"return_rates by must be 'school' or 'sport', not {by!r}")
+        return self._query(f"""
+            SELECT cur.year_start, cur.{by} AS grp, COUNT(DISTINCT cur.student_id) AS athletes,
+                   COUNT(DISTINCT nxt.student_id) AS returned
+            FROM latest l
+            JOIN athletes cur ON cur.partition_id = l.partition_id
+            JOIN latest ln ON ln.year_start = l.year_start + 1
+            LEFT JOIN athletes nxt ON nxt.student_id = cur.student_id AND nxt.partition_id = ln.partition_id
+            GROUP BY cur.year_start, cur.{by}
+            ORDER BY cur.year_start, grp
+        """).rename(columns={"grp": by.title()})
+
+    def multi_sport(self) -> pd.DataFrame:
+        """Per school year and school: distinct athletes and how many played two or more sports."""
+        return self._query("""
+            SELECT year_start, school, COUNT(*) AS athletes, SUM(sports >= 2) AS multi_sport
+            FROM (SELECT a.year_start, a.school, a.student_id, COUNT(DISTINCT a.sport) AS sports
+                  FROM latest l JOIN athletes a ON a.partition_id = l.partition_id
+                  GROUP BY a.year_start, a.school, a.student_id)
+            GROUP BY year_start, school
+            ORDER BY year_start, school
+        """)
+
+    def transfers(self) -> pd.DataFrame:
+        """Athletes rostered at a different school the following school year."""
+        return self._query("""
+            SELECT DISTINCT cur.year_start, cur.student_id, cur.school AS from_school, nxt.school AS to_school
+            FROM latest l
+            JOIN athletes cur ON cur.partition_id = l.partition_id
+            JOIN latest ln ON ln.year_start = l.year_start + 1
+            JOIN athletes nxt ON nxt.student_id = cur.student_id AND nxt.partition_id = ln.partition_id
+            WHERE nxt.school <> cur.school
+            ORDER BY cur.year_start, from_school, to_school
+        """)
+
+    def close(self):
+        self.conn.close()
+
+DRIVE_FOLDER_MIME = "application/vnd.google-apps.folder"
+DRIVE_SHEET_MIME = "application/vnd.google-apps.spreadsheet"
+DRIVE_SHORTCUT_MIME = "application/vnd.google-apps.shortcut"
+DRIVE_FILE_FIELDS = "id, name, mimeType, modifiedTime, size, shortcutDetails(targetId, targetMimeType)"
+
+class DriveFile(NamedTuple):
+    id: str
+    name: str
+    modified_time: str
+    size: Optional[int]  # Drive reports no size for native Google Sheets
+
+class ListingFailure(NamedTuple):
+    """A subfolder page or shortcut target the crawl could not read: the id and name it was listed under, and why."""
+    id: str
+    name: str
+    error: str
+
+def _list_page(clients: GoogleClients, folder_id: str, page_token: Optional[str], limiter: TokenBucket, telemetry: Telemetry):
+    drive = clients.service("drive", "v3")
+    request = drive.files().list(
+        q=f"'{folder_id}' in parents and trashed=false and mimeType in ('{DRIVE_SHEET_MIME}', '{DRIVE_FOLDER_MIME}', '{DRIVE_SHORTCUT_MIME}')",
+        fields=f"nextPageToken, files({DRIVE_FILE_FIELDS})", pageSize=DRIVE_PAGE_SIZE, pageToken=page_token,
+        supportsAllDrives=True, includeItemsFromAllDrives=True,
+    )
+    with telemetry.span("drive.list"):
+        return folder_id, execute_with_retry(request, limiter, telemetry)
+
+def _get_file(clients: GoogleClients, file_id: str, limiter: TokenBucket, telemetry: Telemetry):
+    request = clients.service("drive", "v3").files().get(fileId=file_id, fields=DRIVE_FILE_FIELDS, supportsAllDrives=True)
+    with telemetry.span("drive.get_shortcut_target"):
+        return None, {"files": [execute_with_retry(request, limiter, telemetry)]}
+
+def crawl_folder(folder_id: str, limiter: TokenBucket, telemetry: Telemetry = NO_TELEMETRY, on_failure=None):
+    """Yield every spreadsheet under folder_id as soon as its listing page arrives: pages through nextPageToken,
+    walks subfolders on LIST_WORKERS threads, follows shortcuts (to spreadsheets and to folders) and yields each
+    spreadsheet once however many shortcuts point at it (a spreadsheet is only taken as seen once it is listed or
+    its shortcut target has been looked up). Works in shared drives.
+
+    A subfolder page or shortcut target that cannot be read (dangling shortcut, lost access) is passed to
+    on_failure as a ListingFailure and the rest of the tree is still crawled; without on_failure it raises. The
+    first page of folder_id itself always raises: without it there is nothing to crawl."""
+    clients = get_google_clients()
+    seen_folders, seen_files = {folder_id}, set()
+    lookups = set()  # spreadsheets whose shortcut target lookup is still pending
+    pool = get_list_pool()
+    pending = {}  # future -> (id, name) of the folder page or shortcut target it reads
+    def submit(fn, file_id: str, name: str, *args):
+        pending[pool.submit(fn, clients, file_id, *args, limiter, telemetry)] = (file_id, name)
+    submit(_list_page, folder_id, "", None)
+    root = next(iter(pending))
+    try:
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                source_id, source_name = pending.pop(future)
+                try:
+                    folder, page = future.result()
+                except Exception as e:
+                    if future is root or on_failure is None: raise
+                    lookups.discard(source_id)
+                    if source_id in seen_files: continue  # listed directly meanwhile: nothing is missing
+                    telemetry.count("listings_failed")
+                    on_failure(ListingFailure(source_id, source_name, f"{type(e).__name__}: {e}"))
+                    continue
+                if page.get("nextPageToken"):
+                    submit(_list_page, folder, source_name, page["nextPageToken"])
+                for f in page.get("files", []):
+                    mime, file_id = f.get("mimeType"), f["id"]
+                    if mime == DRIVE_SHORTCUT_MIME:
+                        target = f.get("shortcutDetails", {})
+                        mime, file_id = target.get("targetMimeType"), target.get("targetId")
+                        if mime == DRIVE_SHEET_MIME:
+                            if file_id in seen_files or file_id in lookups:
+                                telemetry.count("duplicates_skipped")
+                            else:
+                                # The shortcut's own name/modifiedTime are not the spreadsheet's: look the target up.
+                                lookups.add(file_id)
+                                telemetry.count("shortcuts_followed")
+                                submit(_get_file, file_id, f["name"])
+                            continue
+                    if mime == DRIVE_FOLDER_MIME:
+                        if file_id not in seen_folders:
+                            seen_folders.add(file_id)
+                            telemetry.count("folders_listed")
+                            submit(_list_page, file_id, f["name"], None)
+                        continue
+                    if mime != DRIVE_SHEET_MIME: continue
+                    if folder is None: lookups.discard(file_id)
+                    if file_id in seen_files:
+                        telemetry.count("duplicates_skipped")
+                        continue
+                    seen_files.add(file_id)
+                    yield DriveFile(file_id, f["name"], f.get("modifiedTime", ""), int(f["size"]) if f.get("size") else None)
+    finally:
+        for future in pending: future.cancel()  # crawl abandoned: drop listings that have not started
+
+class ScanUpdate(NamedTuple):
+    index: int    # position of the spreadsheet in discovery order
+    done: int
+    total: Optional[int]  # spreadsheets found; None while the folder crawl is still discovering more
+    school: str
+    roster: Optional[pd.DataFrame]  # None = fetch failed after retries
+
+class _Fetched(NamedTuple):
+    """What one fetch attempt produced: a parsed roster with per-tab stats, or the error that stopped it."""
+    roster: Optional[pd.DataFrame]
+    stats: list
+    error: Optional[str] = None
+
+def iter_deep_scan(folder_id: str, telemetry: Telemetry = NO_TELEMETRY):
+    """Yield one ScanUpdate per spreadsheet as it lands. Two overlapping stages: the folder crawl streams spreadsheets
+    into the fetch threads (FETCH_WORKERS), each of which downloads one spreadsheet and parses it while the others keep
+    their requests in flight.
+
+    Checkpoints: every discovered spreadsheet is answered from the disk cache at once when unchanged, and every parsed
+    one is written to the disk cache before it is yielded, so a scan that is abandoned midway (generator closed, process
+    restarted) resumes where it stopped; the crawl stops and pending fetches are cancelled. A spreadsheet whose fetch
+    fails goes to the retry queue (SCAN_RETRY_*), then to the dead letters, and its last good roster from the cache
+    (if any) stands in; a tab that fails to parse is dead-lettered while the rest of its spreadsheet is kept.
+    A subfolder or shortcut target that cannot be listed is dead-lettered too, and marks the listing incomplete: the
+    scan goes on without it, but dead letters are not pruned against a listing that may be missing spreadsheets."""
+    with telemetry.span("credentials"):
+        clients = get_google_clients()
+    connections_before, builds_before = clients.connections_opened, clients.services_built
+    limiter, drive_limiter = get_sheets_limiter(), get_drive_limiter()
+
+    def fetch(file: DriveFile):
+        try:
+            with telemetry.span("discovery"):
+                sheets = clients.service("sheets", "v4")
+            with telemetry.span("spreadsheet", school=file.name):
+                tabs = fetch_roster_tabs(sheets, file.id, file.name, limiter, telemetry, templates)
+        except Exception as e:
+            # Per-request retries exhausted or a non-retryable error: the scan loop decides whether to try again.
+            return _Fetched(None, [], f"{type(e).__name__}: {e}")
+        return _Fetched(*parse_roster_tabs(file.name, tabs))
+
+    # The crawl, the fetches and the retry timers report into one queue, consumed here (the disk cache is
+    # only touched on this thread).
+    events = queue.Queue()
+    stop = threading.Event()
+    def crawl():
+        try:
+            for file in crawl_folder(folder_id, drive_limiter, telemetry, lambda failure: events.put(("unlisted", failure))):
+                if stop.is_set(): return
+                events.put(("found", file))
+            events.put(("listed", None))
+        except Exception as e:
+            events.put(("listed", e))
+    threading.Thread(target=crawl, name="roster-crawl", daemon=True).start()
+
+    cache = ScanCache()
+    templates = cache.header_templates()
+    pool = get_fetch_pool()
+    files, futures, timers, attempts = [], [], [], Counter()
+    done, in_flight, retry_waiting, listed, complete, listing_complete = 0, 0, 0, False, False, True
+
+    def submit(i: int):
+        attempts[i] += 1
+        future = pool.submit(fetch, files[i])
+        future.add_done_callback(lambda fut: events.put(("fetched", (i, fut))))
+        futures.append(future)
+
+    try:
+        while not listed or in_flight:
+            kind, payload = events.get()
+            if kind == "listed":
+                if payload is not None: raise payload
+                listed = True
+                telemetry.count("spreadsheets_found", len(files))
+                continue
+            if kind == "unlisted":
+                listing_complete = False
+                cache.dead_letter(payload.id, payload.name, "", payload.error)
+                telemetry.event(event="listing_failed", name=payload.name, file_id=payload.id, error=payload.error)
+                continue
+            if kind == "retry":
+                retry_waiting -= 1
+                submit(payload)
+                continue
+            if kind == "found":
+                i = len(files)
+                files.append(payload)
+                with telemetry.span("cache_lookup"):
+                    roster = cache.get(payload.id, payload.name, payload.modified_time)
+                if roster is None:
+                    submit(i)
+                    in_flight += 1
+                    continue
+                telemetry.count("cache_hits")
+            else:
+                i, future = payload
+                result = future.result()
+                file = files[i]
+                if result.error is not None and attempts[i] <= SCAN_RETRY_ATTEMPTS and retry_waiting < SCAN_RETRY_QUEUE_MAX:
+                    telemetry.count("spreadsheet_retries")
+                    timer = threading.Timer(SCAN_RETRY_DELAY * attempts[i], events.put, args=(("retry", i),))
+                    timer.daemon = True
+                    timer.start()
+                    timers.append(timer)
+                    retry_waiting += 1
+                    continue
+                in_flight -= 1
+                if result.error is not None:
+                    roster = cache.get_previous(file.id)
+                    cache.dead_letter(file.id, file.name, file.modified_time, result.error, attempts[i])
+                    telemetry.count("spreadsheets_skipped")
+                    if roster is not None: telemetry.count("stale_rosters_kept")
+                    telemetry.event(event="spreadsheet_skipped", school=file.name, error=result.error, attempts=attempts[i], kept_previous=roster is not None)
+                else:
+                    roster = result.roster
+                    _record_parse(telemetry, file.name, result.stats)
+                    telemetry.count("spreadsheets_fetched")
+                    cache.put(file.id, file.name, file.modified_time, roster)
+                    cache.clear_dead_letters(file.id)
+                    for title, _, _, _, error in result.stats:
+                        if error is not None: cache.dead_letter(file.id, file.name, file.modified_time, error, tab=title)
+            done += 1
+            yield ScanUpdate(i, done, len(files) if listed else None, files[i].name, roster)
+        complete = True
+    finally:
+        stop.set()
+        for timer in timers: timer.cancel()
+        for future in futures: future.cancel()  # abandoned scan: drop fetches that have not started
+        if complete and listing_complete: cache.prune_dead_letters(f.id for f in files)
+        cache.save_header_templates(templates)
+        cache.close()
+        telemetry.count("http_connections", clients.connections_opened - connections_before)
+        telemetry.count("services_built", clients.services_built - builds_before)
+
+def collect_scan(updates) -> pd.DataFrame:
+    """ScanUpdates (any order) → typed roster in Drive listing order."""
+    updates = sorted((u for u in updates if u.roster is not None), key=lambda u: u.index)
+    return type_roster(concat_rosters(u.roster for u in updates))
+
+def deep_scan(folder_id: str, telemetry: Telemetry = NO_TELEMETRY) -> pd.DataFrame:
+    """Whole scan in one call → typed roster."""
+    return collect_scan(iter_deep_scan(folder_id, telemetry))
+
+# ---------------------------------------------------------------------------
+# Command Center metrics: one typed fact table per metric tab, keyed like the roster (School / Sport / Season)
+# ---------------------------------------------------------------------------
+class MetricField(NamedTuple):
+    """A Command Center column: its fact-table name, how its cells parse (METRIC_PARSERS), and the header spellings
+    that map to it (compared like roster headers: trimmed, case and spaces ignored)."""
+    name: str
+    kind: str  # "school", "sport", "season", "percent" or "count"
+    aliases: tuple
+
+class MetricSchema(NamedTuple):
+    """One metric tab, declared: the tab (regex on its title), its measure columns and the headline value. With
+    `ratio` (numerator, denominator), a blank value is computed from those counts, e.g. returning / prior coaches."""
+    key: str
+    label: str
+    tab: str
+    fields: tuple
+    value: str
+    ratio: Optional[tuple] = None
+
+    @property
+    def columns(self) -> list:
+        return METRIC_KEYS + [field.name for field in self.fields]
+
+METRIC_KEYS = ["School", "Sport", "Season"]  # "All" where a tab does not break down by Sport / Season
+METRIC_KEY_FIELDS = (
+    MetricField("School", "school", ("SCHOOL", "SITE", "SCHOOL SITE", "SCHOOL NAME", "MIDDLE SCHOOL")),
+    MetricField("Sport", "sport", ("SPORT", "SPORTS", "PROGRAM")),
+    MetricField("Season", "season", ("SEASON", "TERM")),
+)
+METRIC_SCHEMAS = [
+    MetricSchema("certification", "Certification completion %", r"CERTIF", (
+        MetricField("certification_pct", "percent", ("CERTIFICATION %", "CERTIFICATION COMPLETION %", "COMPLETION %", "% COMPLETE", "% CERTIFIED", "CERTIFIED %", "CERTIFICATION RATIO")),
+        MetricField("coaches_certified", "count", ("CERTIFIED", "# CERTIFIED", "COACHES CERTIFIED")),
+        MetricField("coaches", "count", ("COACHES", "# COACHES", "TOTAL COACHES")),
+    ), "certification_pct", ratio=("coaches_certified", "coaches")),
+    MetricSchema("forfeits", "Forfeit count", r"FORFEIT", (
+        MetricField("forfeits", "count", ("FORFEITS", "FORFEIT", "FORFEIT COUNT", "# FORFEITS")),
+    ), "forfeits"),
+    MetricSchema("game_compliance", "Game compliance rate", r"COMPLIAN", (
+        MetricField("compliance_pct", "percent", ("COMPLIANCE %", "COMPLIANCE RATE", "GAME COMPLIANCE", "GAME COMPLIANCE %", "COMPLIANT %", "COMPLIANCE RATIO")),
+        MetricField("games_compliant", "count", ("COMPLIANT GAMES", "GAMES COMPLIANT", "COMPLIANT")),
+        MetricField("games", "count", ("GAMES", "# GAMES", "GAMES PLAYED", "TOTAL GAMES")),
+    ), "compliance_pct", ratio=("games_compliant", "games")),
+    MetricSchema("coach_retention", "Coach retention rate", r"COACH.*(RETEN|RETURN)|(RETEN|RETURN).*COACH", (
+        MetricField("coach_retention_pct", "percent", ("RETENTION %", "RETENTION RATE", "COACH RETENTION", "COACH RETENTION %", "RETENTION RATIO")),
+        MetricField("coaches_returning", "count", ("RETURNING COACHES", "COACHES RETURNING", "RETAINED", "RETURNING")),
+        MetricField("coaches_prior", "count", ("PRIOR COACHES", "COACHES LAST YEAR", "PREVIOUS COACHES", "LAST YEAR")),
+    ), "coach_retention_pct", ratio=("coaches_returning", "coaches_prior")),
+    MetricSchema("student_return", "Student return rate", r"STUDENT.*RETURN|RETURN.*STUDENT|ATHLETE.*RETURN|RETURN.*ATHLETE", (
+        MetricField("return_pct", "percent", ("RETURN %", "RETURN RATE", "STUDENT RETURN", "STUDENT RETURN %", "RETURN RATIO")),
+        MetricField("students_returning", "count", ("RETURNING STUDENTS", "STUDENTS RETURNING", "RETURNING", "RETURNED")),
+        MetricField("students_prior", "count", ("PRIOR STUDENTS", "STUDENTS LAST YEAR", "PREVIOUS STUDENTS", "LAST YEAR")),
+    ), "return_pct", ratio=("students_returning", "students_prior")),
+]
+METRIC_PARSER_VERSION = 2  # bump when METRIC_PARSERS change meaning
+# Changes whenever the schemas or parsers do, so fact tables cached under older rules are re-parsed.
+METRIC_RULES_DIGEST = hashlib.sha1(json.dumps([METRIC_KEY_FIELDS, METRIC_SCHEMAS, METRIC_PARSER_VERSION]).encode()).hexdigest()[:12]
+
+_SEASON_WORDS = {"FALL": "Fall", "F": "Fall", "AUTUMN": "Fall", "WINTER": "Winter", "W": "Winter", "SPRING": "Spring", "S": "Spring"}
+_METRIC_SKIP_SCHOOLS = {"", "TOTAL", "TOTALS", "DISTRICT", "DISTRICT TOTAL", "ALL", "ALL SCHOOLS", "OAL"}  # summary rows
+
+def _metric_text(values: pd.Series) -> pd.Series:
+    return values.fillna("").astype(str).str.strip()
+
+def _map_distinct(values: pd.Series, fn) -> pd.Series:
+    """fn once per distinct cell (a few dozen schools or sports), not once per row."""
+    return values.map({v: fn(v) for v in values.unique()})
+
+def _metric_season(value: str) -> str:
+    words = re.findall(r"[A-Z]+", value.upper())
+    return _SEASON_WORDS.get(words[0], "Other") if words else "All"
+
+_FRACTION_HEADER_RE = re.compile(r"\bRATIO\b|\bFRACTION\b|\(\s*0\s*[-–]\s*1\s*\)")
+
+def _metric_percent(text: pd.Series, header: str) -> pd.Series:
+    """Percent cells as percents. "85%" and 85 are both 85; a cell is only read as a fraction (0.85 → 85) when its
+    column header says so (e.g. "Return Ratio"), so a 1 stays 1 rather than passing for 100%."""
+    number = pd.to_numeric(text.str.replace(",", "", regex=False).str.rstrip("%").str.strip(), errors="coerce")
+    if not _FRACTION_HEADER_RE.search(header.upper()): return number.astype("float64")
+    return number.where(text.str.endswith("%"), number * 100).astype("float64")
+
+# Field kind → parser of a column's trimmed cell text, given the column's header text.
+METRIC_PARSERS = {
+    "school": lambda text, header: _map_distinct(text, display_school_name),
+    "sport": lambda text, header: _map_distinct(text, lambda v: normalize_sport_name(v) if v else "All"),
+    "season": lambda text, header: _map_distinct(text, _metric_season),
+    "percent": _metric_percent,
+    "count": lambda text, header: pd.to_numeric(text.str.replace(",", "", regex=False), errors="coerce").round().astype("Int64"),
+}
+
+def _type_metric_facts(schema: MetricSchema, frame: pd.DataFrame) -> pd.DataFrame:
+    """Fact-table dtypes: keys categorical, percents float64, counts Int64 (missing = not reported)."""
+    typed = {key: frame[key].astype(str).astype("category") for key in METRIC_KEYS}
+    for field in schema.fields:
+        number = pd.to_numeric(frame[field.name], errors="coerce")
+        typed[field.name] = number.astype("float64") if field.kind == "percent" else number.round().astype("Int64")
+    return pd.DataFrame(typed, columns=schema.columns, index=frame.index)
+
+def _empty_metric_facts(schema: MetricSchema) -> pd.DataFrame:
+    return _type_metric_facts(schema, pd.DataFrame(columns=schema.columns))
+
+@lru_cache(maxsize=None)
+def _metric_aliases(schema: MetricSchema) -> dict:
+    return {_header_key(alias): field.name for field in METRIC_KEY_FIELDS + schema.fields for alias in field.aliases}
+
+def parse_metric_tab(schema: MetricSchema, rows) -> pd.DataFrame:
+    """A metric tab's cells (values().batchGet rows) → its typed fact table, one row per reported school (and sport /
+    season when the tab has those columns), parsed a column at a time. Blank and total rows are dropped; a measure
+    cell that is blank or not a number stays missing."""
+    aliases = _metric_aliases(schema)
+    for h_idx, row in enumerate(rows[:HEADER_SEARCH_MAX_ROWS]):
+        col_map = {}
+        for col_idx, cell in enumerate(row):
+            name = aliases.get(_header_key(cell))
+            if name is not None: col_map.setdefault(name, col_idx)  # leftmost matching column wins
+        if "School" in col_map and any(field.name in col_map for field in schema.fields): break
+    else:
+        raise ValueError(f"no header row with a school column and one of: {', '.join(field.name for field in schema.fields)}")
+    grid = pd.DataFrame(rows[h_idx + 1 :], dtype=object)
+    blank = pd.Series("", index=grid.index, dtype=object)
+    header = {name: normalize_val(rows[h_idx][col_idx]) for name, col_idx in col_map.items()}
+    facts = pd.DataFrame({
+        field.name: METRIC_PARSERS[field.kind](_metric_text(grid[col_map[field.name]]) if col_map.get(field.name) in grid.columns else blank,
+                                               header.get(field.name, ""))
+        for field in METRIC_KEY_FIELDS + schema.fields
+    }, index=grid.index)
+    facts = facts[~facts["School"].str.upper().isin(_METRIC_SKIP_SCHOOLS)] if len(facts) else facts
+    if schema.ratio:
+        numerator, denominator = (facts[name].astype("float64") for name in schema.ratio)
+        facts[schema.value] = facts[schema.value].fillna(numerator / denominator.where(denominator > 0) * 100)
+    return _type_metric_facts(schema, facts.reset_index(drop=True))
+
+class MetricFacts(NamedTuple):
+    """The Command Center fact tables as parsed from one copy of the spreadsheet."""
+    tables: dict        # schema key → typed fact table (METRIC_KEYS + the schema's fields)
+    tabs: dict          # schema key → source tab title ("" when the spreadsheet has no tab for it: empty table)
+    modified_time: str  # the spreadsheet's Drive modifiedTime when it was fetched
+    fetched_at: datetime
+
+    def freshness(self) -> pd.DataFrame:
+        """One row per metric: source tab, rows, coverage (share of rows reporting the value), last edit and fetch."""
+        rows = []
+        for schema in METRIC_SCHEMAS:
+            table = self.tables[schema.key]
+            rows.append({
+                "metric": schema.label, "tab": self.tabs[schema.key] or "(no tab)", "rows": len(table),
+                "reported": round(float(table[schema.value].notna().mean()), 3) if len(table) else 0.0,
+                "sheet edited": self.modified_time, "fetched": self.fetched_at.isoformat(timespec="seconds"),
+            })
+        return pd.DataFrame(rows)
+
+def find_command_center(clients: GoogleClients, limiter: TokenBucket, telemetry: Telemetry = NO_TELEMETRY) -> Optional[DriveFile]:
+    """The COMMAND_CENTER_NAME spreadsheet (the most recently edited, if there are copies) or None."""
+    name = COMMAND_CENTER_NAME.replace("\\", "\\\\").replace("'", "\\'")
+    request = clients.service("drive", "v3").files().list(
+        q=f"name = '{name}' and mimeType = '{DRIVE_SHEET_MIME}' and trashed = false", fields=f"files({DRIVE_FILE_FIELDS})",
+        pageSize=10, supportsAllDrives=True, includeItemsFromAllDrives=True,
+    )
+    with telemetry.span("drive.find_command_center"):
+        files = execute_with_retry(request, limiter, telemetry).get("files", [])
+    if not files: return None
+    f = max(files, key=lambda f: f.get("modifiedTime", ""))
+    return DriveFile(f["id"], f["name"], f.get("modifiedTime", ""), None)
+
+def fetch_metric_tabs(sheets, file_id: str, limiter: TokenBucket, telemetry: Telemetry = NO_TELEMETRY, schemas=None) -> dict:
+    """Tab titles, then one values().batchGet of every metric tab → schema key → (tab title, rows): two Sheets reads
+    however many schemas. Each schema takes the first tab matching it that an earlier schema did not (the tab
+    patterns name whose metric it is, e.g. coach vs student returns, so a tab cannot land in the wrong fact table);
+    schemas with no tab are left out."""
+    schemas = METRIC_SCHEMAS if schemas is None else schemas
+    with telemetry.span("sheets.get"):
+        meta = execute_with_retry(sheets.spreadsheets().get(spreadsheetId=file_id, fields="sheets(properties(title,gridProperties(rowCount,columnCount)))"), limiter, telemetry)
+    props = [s["properties"] for s in meta.get("sheets", [])]
+    chosen, taken = [], set()
+    for schema in schemas:
+        pattern = re.compile(schema.tab, re.IGNORECASE)
+        tab = next((p for p in props if p["title"] not in taken and pattern.search(p["title"])), None)
+        if tab is None: continue
+        taken.add(tab["title"])
+        grid = tab.get("gridProperties", {})
+        last_col, last_row = _col_letter(min(grid.get("columnCount", 26), 26) - 1), min(grid.get("rowCount", 1000), MAX_ROWS_PER_SHEET)
+        chosen.append((schema.key, tab["title"], f"'{tab['title'].replace(chr(39), chr(39) * 2)}'!A1:{last_col}{last_row}"))
+    if not chosen: return {}
+    with telemetry.span("sheets.metrics_batchGet"):
+        resp = execute_with_retry(sheets.spreadsheets().values().batchGet(spreadsheetId=file_id, ranges=[a1 for _, _, a1 in chosen], valueRenderOption="FORMATTED_VALUE"), limiter, telemetry)
+    value_ranges = iter(resp.get("valueRanges", []))
+    return {key: (title, next(value_ranges, {}).get("values", [])) for key, title, _ in chosen}
+
+def ingest_command_center(telemetry: Telemetry = NO_TELEMETRY, cache_path: str = SCAN_CACHE_PATH) -> Optional[MetricFacts]:
+    """Refresh the Command Center fact tables through the roster scan's clients, rate limiters and disk cache: one
+    Drive lookup for the spreadsheet's modifiedTime, and only when it changed since the cached parse, fetch_metric_tabs
+    (two Sheets reads for every metric) and a parse per schema. None when the service account cannot see the
+    spreadsheet. A tab that fails to parse is logged and left empty until the spreadsheet changes."""
+    clients = get_google_clients()
+    with telemetry.span("command_center"):
+        file = find_command_center(clients, get_drive_limiter(), telemetry)
+        if file is None:
+            telemetry.event(event="command_center_missing", name=COMMAND_CENTER_NAME)
+            return None
+        cache = ScanCache(cache_path)
+        try:
+            facts = cache.metric_facts(file.id, file.modified_time)
+            if facts is not None:
+                telemetry.count("metric_cache_hits")
+                return facts
+            grids = fetch_metric_tabs(clients.service("sheets", "v4"), file.id, get_sheets_limiter(), telemetry)
+            tables, tabs = {}, {}
+            for schema in METRIC_SCHEMAS:
+                tabs[schema.key], rows = grids.get(schema.key, ("", []))
+                tables[schema.key] = _empty_metric_facts(schema)
+                if not tabs[schema.key]:
+                    telemetry.event(event="metric_tab_missing", metric=schema.key)
+                    continue
+                try:
+                    with telemetry.span("parse_metric", metric=schema.key):
+                        tables[schema.key] = parse_metric_tab(schema, rows)
+                except Exception as e:
+                    telemetry.event(event="metric_tab_failed", metric=schema.key, tab=tabs[schema.key], error=f"{type(e).__name__}: {e}")
+            facts = MetricFacts(tables, tabs, file.modified_time, datetime.now(timezone.utc))
+            cache.put_metric_facts(file.id, facts)
+            telemetry.count("metric_tabs_fetched", len(grids))
+            return facts
+        finally:
+            cache.close()
+
+def command_center_metrics(path: str = SCAN_CACHE_PATH) -> Optional[MetricFacts]:
+    """The last ingested Command Center fact tables, from the scan cache (None before the first ingest)."""
+    cache = ScanCache(path)
+    try:
+        return cache.metric_facts()
+    finally:
+        cache.close()
+
+def join_metric(facts: pd.DataFrame, cube: pd.DataFrame) -> pd.DataFrame:
+    """A metric fact table beside the roster measures for the same keys: the cube rolls up to School plus whichever
+    of Sport / Season the table breaks down by, e.g. forfeits per school and sport next to athletes per school and
+    sport. A row left at "All" on a key that other rows break down by finds no roster match."""
+    keys = ["School"] + [key for key in ("Sport", "Season") if (facts[key].astype(str) != "All").any()]
+    roster = rollup(cube, ["School_Disp" if key == "School" else key for key in keys]).rename(columns={"School_Disp": "School"})
+    return facts.astype({key: str for key in keys}).merge(roster.astype({key: str for key in keys}), on=keys, how="left")
+
+class RosterSnapshot(NamedTuple):
+    """Immutable published roster: everything a dashboard rerun reads. Never mutated after publish."""
+    version: int
+    built_at: datetime
+    roster: pd.DataFrame
+    cube: pd.DataFrame
+    roster_index: FilterIndex
+    cube_index: FilterIndex
+    search: RosterSearchIndex
+    done: int   # spreadsheets included so far
+    total: Optional[int]  # spreadsheets in the folder (None: still being discovered)
+
+    @property
+    def partial(self) -> bool:
+        """First scan still streaming in."""
+        return self.total is None or self.done < self.total
+
+def build_snapshot(roster: pd.DataFrame, version: int, built_at: datetime, done: int, total: int) -> RosterSnapshot:
+    roster = roster[~((roster["First Name"].str.upper() == "LAMONT") & (roster["Last Name"].str.upper() == "ROBINSON"))].reset_index(drop=True)
+    cube = build_roster_cube(roster)
+    return RosterSnapshot(version, built_at, roster, cube, FilterIndex(roster), FilterIndex(cube), RosterSearchIndex(roster), done, total)
+
+class SnapshotStore:
+    """Process-wide roster snapshot shared by every session. A background thread rescans every
+    REFRESH_INTERVAL_SECONDS (or on request) and swaps in a new snapshot with a single reference assignment, so a
+    rerun that read `current` keeps a consistent version. Complete snapshots are persisted under SNAPSHOT_DIR as
+    uncompressed Arrow IPC files (roster-v<N>.arrow + a CURRENT pointer replaced atomically), so restarts start warm
+    and a headless writer (roster_etl.py, e.g. from cron) can feed the dashboard. Loading one reads the file through a
+    memory map into a pandas roster and rebuilds its cube and indexes (build_snapshot), as a scan would.
+    publish_partial=False skips the partial snapshots of a first scan (nothing shows them without a dashboard)."""
+    def __init__(self, folder_id: str, directory: str = SNAPSHOT_DIR, history_path: Optional[str] = HISTORY_DB_PATH,
+                 publish_partial: bool = True):
+        self.folder_id = folder_id
+        self.directory = directory
+        self.history_path = history_path  # None: don't record scans in the history store
+        self.publish_partial = publish_partial
+        self.current: Optional[RosterSnapshot] = None
+        self.scanning = False
+        self.progress = (0, 0)
+        self.error: Optional[str] = None
+        self.last_scan: Optional[Telemetry] = None  # diagnostics of the most recent finished scan
+        self._wake = threading.Event()
+        self._clear_cache = False
+        self._pointer_mtime = None
+        self._disk_version = 0  # newest version on disk this process has loaded or written
+        self._lock = threading.Lock()
+        self.load()
+
+    @property
+    def _pointer_path(self) -> str:
+        return os.path.join(self.directory, "CURRENT")
+
+    def load(self):
+        """Adopt the snapshot on disk if it was published since this process last loaded or wrote one (cheap stat when
+        nothing changed)."""
+        try:
+            mtime = os.stat(self._pointer_path).st_mtime
+        except FileNotFoundError:
+            return
+        if mtime == self._pointer_mtime: return
+        with self._lock:
+            self._load_locked()
+
+    def _load_locked(self):
+        try:
+            mtime = os.stat(self._pointer_path).st_mtime
+            with open(self._pointer_path) as f:
+                pointer = json.load(f)
+        except FileNotFoundError:
+            return
+        self._pointer_mtime = mtime
+        # Compare with the last persisted version, not `current`: an unpersisted partial can carry a higher number
+        # than a complete snapshot another process has written since.
+        if pointer["version"] <= self._disk_version: return
+        with pa.memory_map(os.path.join(self.directory, pointer["file"])) as source:
+            roster = pa.ipc.open_file(source).read_all().to_pandas()
+        self._disk_version = pointer["version"]
+        # Versions key the dashboard's caches, so they never go backwards in this process, even when the adopted
+        # snapshot is numbered below a partial shown before it.
+        version = max(pointer["version"], self.current.version + 1 if self.current is not None else 0)
+        self.current = build_snapshot(roster, version, datetime.fromisoformat(pointer["built_at"]), pointer["done"], pointer["total"])
+
+    def publish(self, roster: pd.DataFrame, done: int, total: int, persist: bool):
+        with self._lock:
+            self._load_locked()  # another process may have published since: continue its version sequence
+            version = max(self.current.version if self.current is not None else 0, self._disk_version) + 1
+            snapshot = build_snapshot(roster, version, datetime.now(timezone.utc), done, total)
+            if persist: self._persist(snapshot)
+            self.current = snapshot
+            return snapshot
+
+    def _persist(self, snapshot: RosterSnapshot):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"roster-v{snapshot.version}.arrow"
+        path = os.path.join(self.directory, name)
+        table = pa.Table.from_pandas(snapshot.roster, preserve_index=False)
+        with pa.OSFile(path + ".tmp", "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(path + ".tmp", path)
+        pointer = {"version": snapshot.version, "built_at": snapshot.built_at.isoformat(), "file": name, "done": snapshot.done, "total": snapshot.total}
+        with open(self._pointer_path + ".tmp", "w") as f:
+            json.dump(pointer, f)
+        os.replace(self._pointer_path + ".tmp", self._pointer_path)
+        self._pointer_mtime = os.stat(self._pointer_path).st_mtime
+        previous, self._disk_version = self._disk_version, snapshot.version
+        # Keep the previous version too: another process may have read the old pointer and not opened its file yet.
+        for old in os.listdir(self.directory):
+            m = re.fullmatch(r"roster-v(\d+)\.arrow", old)
+            if m and int(m.group(1)) < previous: os.remove(os.path.join(self.directory, old))
+
+    def seconds_until_stale(self) -> float:
+        """0 when there is no snapshot or only a partial one, else time left until it is REFRESH_INTERVAL_SECONDS old."""
+        self.load()
+        snapshot = self.current
+        if snapshot is None or snapshot.partial: return 0.0
+        return max(0.0, REFRESH_INTERVAL_SECONDS - (datetime.now(timezone.utc) - snapshot.built_at).total_seconds())
+
+    def request_refresh(self, clear_cache: bool = False):
+        if clear_cache: self._clear_cache = True
+        self._wake.set()
+
+    def refresh(self):
+        """One scan. While no complete snapshot exists yet, partial ones are published as spreadsheets land (unless
+        publish_partial is off)."""
+        if self._clear_cache:
+            self._clear_cache = False
+            clear_scan_cache()
+            reset_google_clients()
+        self.scanning, self.error, self.progress = True, None, (0, None)
+        telemetry = Telemetry("scan")
+        try:
+            updates, last_partial = [], 0.0
+            for update in iter_deep_scan(self.folder_id, telemetry):
+                updates.append(update)
+                self.progress = (update.done, update.total)
+                first_scan = self.current is None or self.current.partial
+                more_coming = update.total is None or update.done < update.total
+                if self.publish_partial and first_scan and more_coming and time.monotonic() - last_partial >= SCAN_PREVIEW_INTERVAL:
+                    with telemetry.span("publish_partial"):
+                        self.publish(collect_scan(updates), update.done, update.total, persist=False)
+                    last_partial = time.monotonic()
+            self._ingest_metrics(telemetry)  # before publishing, so the new version's reruns read the new metrics
+            with telemetry.span("publish"):
+                snapshot = self.publish(collect_scan(updates), len(updates), len(updates), persist=True)
+            self._record_history(snapshot, telemetry)
+        except Exception as e:
+            self.error = str(e)
+            telemetry.event(event="scan_failed", error=f"{type(e).__name__}: {e}")
+        finally:
+            self.scanning = False
+            self.last_scan = telemetry.finish()
+            telemetry.write_jsonl()
+
+    def _ingest_metrics(self, telemetry: Telemetry):
+        """Refresh the Command Center fact tables after each scan; a metrics failure never fails the scan."""
+        try:
+            ingest_command_center(telemetry)
+        except Exception as e:
+            telemetry.event(event="command_center_failed", error=f"{type(e).__name__}: {e}")
+
+    def _record_history(self, snapshot: RosterSnapshot, telemetry: Telemetry):
+        """Append a complete snapshot to the history store; a history failure never fails the scan. A scan that skipped a
+        spreadsheet with no previous roster to stand in is left out: its partition would replace the day's and the
+        history queries would silently lose that school."""
+        if not self.history_path: return
+        missing = telemetry.counters["spreadsheets_skipped"] - telemetry.counters["stale_rosters_kept"]
+        if missing:
+            telemetry.event(event="history_skipped", missing_spreadsheets=missing)
+            return
+        try:
+            with telemetry.span("history_append"):
+                history = RosterHistory(self.history_path)
+                try:
+                    history.append(snapshot.roster, snapshot.built_at.astimezone().date())
+                finally:
+                    history.close()
+        except Exception as e:
+            telemetry.event(event="history_failed", error=f"{type(e).__name__}: {e}")
+
+    def run_forever(self):
+        """Scan whenever the published snapshot goes stale (a fresher one written by roster_etl.py counts) or a
+        refresh is requested."""
+        requested = False
+        while True:
+            if requested or self.seconds_until_stale() == 0: self.refresh()
+            # Still stale right after a scan means it failed: retry on the regular schedule, not in a tight loop.
+            requested = self._wake.wait(self.seconds_until_stale() or REFRESH_INTERVAL_SECONDS)
+            self._wake.clear()
+
+    def start(self):
+        threading.Thread(target=self.run_forever, name="roster-refresher", daemon=True).start()
+        return self
+
@@ -0,0 +1,68 @@
+"""
+Headless roster scan: runs the same scan as the dashboard without Streamlit and publishes the snapshot the dashboard
+loads at startup (SNAPSHOT_DIR/CURRENT → roster-v<N>.arrow). Suitable for cron. Only the complete snapshot is built:
+the partial ones a first scan publishes for the dashboard are skipped.
+
+Credentials: GCP_SERVICE_ACCOUNT (service-account JSON) in the environment, else service_account_2.json.
+
+    python roster_etl.py                  # rescan; spreadsheets unchanged in Drive come from the disk cache
+    python roster_etl.py --full           # clear the disk cache first: re-download and re-parse everything
+    python roster_etl.py --folder ID --snapshot-dir DIR --csv roster.csv
+    python roster_etl.py --templates      # after the scan, list the roster header templates in use across schools
+    python roster_etl.py --fetch-workers 8   # download more spreadsheets at once
+    python roster_etl.py --metrics-dir metrics   # also write each Command Center fact table as metrics/<metric>.parquet
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import roster_engine
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Scan the roster folder and publish a dashboard snapshot.")
+    parser.add_argument("--folder", default=roster_engine.FOLDER_ID, help="Drive folder id (default: %(default)s)")
+    parser.add_argument("--snapshot-dir", default=roster_engine.SNAPSHOT_DIR, help="where the dashboard reads snapshots (default: %(default)s)")
+    parser.add_argument("--full", action="store_true", help="clear the scan cache before scanning")
+    parser.add_argument("--csv", default=None, help="also write the published roster to this CSV file")
+    parser.add_argument("--fetch-workers", type=int, default=roster_engine.FETCH_WORKERS, help="concurrent spreadsheet fetches (default: %(default)s)")
+    parser.add_argument("--metrics-dir", default=None, help="also write each Command Center metric fact table to DIR/<metric>.parquet")
+    parser.add_argument("--templates", action="store_true", help="print the header template inventory after the scan")
+    parser.add_argument("--quiet", action="store_true", help="only print errors")
+    args = parser.parse_args(argv)
+
+    roster_engine.FETCH_WORKERS = max(1, args.fetch_workers)
+    store = roster_engine.SnapshotStore(args.folder, args.snapshot_dir, publish_partial=False)
+    if args.full: store.request_refresh(clear_cache=True)
+    start = time.perf_counter()
+    store.refresh()
+    if store.error:
+        print(f"Scan failed: {store.error}", file=sys.stderr)
+        return 1
+    snapshot = store.current
+    counters = store.last_scan.summary()["counters"]
+    for _, dead in roster_engine.scan_dead_letters().iterrows():
+        where = f"{dead['school']} / {dead['tab']}" if dead["tab"] else dead["school"]
+        print(f"Not loaded: {where} ({dead['attempts']} attempts, last {dead['failed_at']}): {dead['error']}", file=sys.stderr)
+    metrics = roster_engine.command_center_metrics()
+    if metrics is not None:
+        for schema in roster_engine.METRIC_SCHEMAS:
+            if not metrics.tabs[schema.key]: print(f"Not loaded: {schema.label} (no matching tab in {roster_engine.COMMAND_CENTER_NAME})", file=sys.stderr)
+    if args.csv: snapshot.roster.to_csv(args.csv, index=False)
+    if args.metrics_dir and metrics is not None:
+        os.makedirs(args.metrics_dir, exist_ok=True)
+        for key, table in metrics.tables.items(): table.to_parquet(os.path.join(args.metrics_dir, f"{key}.parquet"), index=False)
+    if not args.quiet:
+        print(f"Published v{snapshot.version}: {len(snapshot.roster):,} athletes from {snapshot.done} spreadsheets "
+              f"({counters.get('cache_hits', 0)} cached, {counters.get('spreadsheets_fetched', 0)} fetched, "
+              f"{counters.get('spreadsheets_skipped', 0)} skipped) in {time.perf_counter() - start:.1f}s")
+        if metrics is not None:
+            print(f"Command Center: {sum(len(t) for t in metrics.tables.values()):,} metric rows from "
+                  f"{sum(1 for tab in metrics.tabs.values() if tab)}/{len(metrics.tabs)} tabs (sheet edited {metrics.modified_time})")
+    if args.templates:
+        print(roster_engine.header_template_inventory().to_string(index=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import roster_engine  # noqa: E402
+import google_standin  # noqa: E402
+
+@pytest.fixture
+def standin(tmp_path, monkeypatch):
+    """Run scans against the Google API stand-in from an empty working directory (the scan cache and snapshots live
+    at relative paths). Call it with a google_standin dataset; it returns the ReplayBackend."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(roster_engine, "SHEETS_READS_PER_MINUTE", 60_000)
+    monkeypatch.setattr(roster_engine, "SHEETS_READ_BURST", 1_000)
+    monkeypatch.setattr(roster_engine, "_get_creds", lambda: None)
+    roster_engine.reset_google_clients()
+    def install(dataset: dict, **kwargs) -> google_standin.ReplayBackend:
+        backend = google_standin.ReplayBackend(dataset, **kwargs)
+        monkeypatch.setattr(roster_engine, "build", lambda service_name, version, credentials=None, **kw: backend)
+        roster_engine.reset_google_clients()  # the pool threads keep their services: rebuild them on the new backend
+        return backend
+    yield install
+    roster_engine.reset_google_clients()
@@ -0,0 +1,60 @@
+import google_standin
+import roster_engine
+
+def _dangling_shortcut(dataset: dict, folder: str = "synthetic-folder-01") -> dict:
+    dataset["files"]["files"].append({
+        "id": "dangling-shortcut", "name": "Closed School (shortcut)", "mimeType": google_standin.SHORTCUT_MIME, "parents": [folder],
+        "shortcutDetails": {"targetId": "deleted-spreadsheet", "targetMimeType": google_standin.SHEET_MIME},
+    })
+    return dataset
+
+def test_broken_shortcut_is_dead_lettered_and_the_rest_of_the_folder_still_scans(standin):
+    standin(_dangling_shortcut(google_standin.generate(6, 20, subfolders=2)))
+    store = roster_engine.SnapshotStore("root", directory="snapshots", history_path=None)
+    store.refresh()
+
+    assert store.error is None
+    assert store.current is not None and not store.current.partial
+    assert store.current.done == 6
+    assert store.current.roster["School"].nunique() == 6
+    assert store.last_scan.counters["listings_failed"] == 1
+    dead = roster_engine.scan_dead_letters()
+    assert dead["file_id"].tolist() == ["deleted-spreadsheet"]
+    assert dead["school"].tolist() == ["Closed School (shortcut)"]
+    assert "404" in dead["error"].iloc[0]
+
+def test_incomplete_listing_keeps_dead_letters_of_spreadsheets_it_did_not_see(standin):
+    dataset = google_standin.generate(3, 10, subfolders=1)
+    standin(dataset)
+    cache = roster_engine.ScanCache()
+    cache.dead_letter("unreachable-spreadsheet", "Behind A Broken Folder", "", "HttpError 500")
+    cache.close()
+
+    standin(_dangling_shortcut(google_standin.generate(3, 10, subfolders=1), folder="synthetic-folder-00"))
+    roster_engine.collect_scan(roster_engine.iter_deep_scan("root"))
+    assert set(roster_engine.scan_dead_letters()["file_id"]) == {"unreachable-spreadsheet", "deleted-spreadsheet"}
+
+    standin(dataset)  # the shortcut is gone and every listing succeeds: stale dead letters are pruned
+    roster_engine.collect_scan(roster_engine.iter_deep_scan("root"))
+    assert roster_engine.scan_dead_letters().empty
+
+def test_failing_root_listing_fails_the_scan(standin, monkeypatch):
+    backend = standin(google_standin.generate(2, 10), fail_rate=1.0)
+    monkeypatch.setattr(roster_engine, "QUOTA_MAX_RETRIES", 0)
+    store = roster_engine.SnapshotStore("root", directory="snapshots", history_path=None)
+    store.refresh()
+    assert store.current is None and "429" in store.error
+    assert backend.calls == 1
+
+def test_failed_shortcut_lookup_does_not_drop_the_spreadsheet_it_points_at(standin, monkeypatch):
+    # The root lists shortcuts to School 000-002 before the subfolder pages that list those spreadsheets directly.
+    standin(google_standin.generate(6, 20, subfolders=2))
+    def unreachable(clients, file_id, limiter, telemetry):
+        raise RuntimeError(f"lookup of {file_id} failed")
+    monkeypatch.setattr(roster_engine, "_get_file", unreachable)
+    store = roster_engine.SnapshotStore("root", directory="snapshots", history_path=None)
+    store.refresh()
+
+    assert store.error is None
+    assert store.current.done == 6 and store.current.roster["School"].nunique() == 6
+    assert roster_engine.scan_dead_letters().empty
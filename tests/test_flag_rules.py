@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+import roster_engine
+
+BY = ["School_Disp", "Sport", "Level"]
+
+def _roster(n: int = 2_000, seed: int = 1) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    school = rng.integers(0, 5, n)
+    return roster_engine.type_roster(pd.DataFrame({
+        "School": [f"School {i} Middle Official Sports Roster '24-25" for i in school],
+        "Sport": rng.choice(["Soccer", "Basketball", "Futsal"], n), "Level": rng.choice(["6th Grade", "7th/8th Grade"], n),
+        "Season": rng.choice(["Fall", "Winter"], n), "Team": rng.choice(["—", "Red", "1"], n),
+        "STUDENT ID": rng.integers(100000, 999999, n).astype(str), "Last Name": "Lee", "First Name": "Ann",
+        # skewed per school, so some groups cross the 50% threshold and others don't
+        "Gender": np.where(rng.random(n) < np.array([0.05, 0.2, 0.5, 0.8, 0.95])[school], "Other", rng.choice(["Boys", "Girls"], n)),
+        "GPA": rng.choice(["", "n/a", "3.2", "2.75", "4"], n),
+        "PHYSICAL": rng.choice(["Yes", "yes ", "APPROVED 9/1", "Cleared", "", "Pending", "No", None], n),
+    }))
+
+def _old_flags(roster: pd.DataFrame) -> pd.DataFrame:
+    """The Flags tab's per-row checks before the rule registry."""
+    return pd.DataFrame({
+        "missing_gender": roster["Gender"].astype(str) == "Other",
+        "missing_gpa": roster["GPA"].isna(),
+        "incomplete_physical": roster["PHYSICAL"].apply(roster_engine.physical_status) != "YES",
+    })
+
+def _old_pct_cell(n, total):
+    pct = int(round(n / total * 100, 0)) if total else 0
+    return pct, bool(total and n / total > 0.5)
+
+def test_flag_mask_bits_match_the_per_row_checks():
+    roster = _roster()
+    mask = roster_engine.flag_mask(roster)
+    old = _old_flags(roster)
+    for bit, rule in enumerate(roster_engine.FLAG_RULES):
+        assert (((mask >> np.uint64(bit)) & np.uint64(1)).astype(bool) == old[rule.key].to_numpy()).all(), rule.key
+
+def test_flag_summary_matches_per_row_percentages_and_thresholds():
+    roster = _roster()
+    summary = roster_engine.flag_summary(roster_engine.build_roster_cube(roster), BY)
+    old = pd.concat([roster[BY], _old_flags(roster)], axis=1).groupby(BY, observed=True, as_index=False).agg(
+        athletes=("missing_gender", "size"), **{key: (key, "sum") for key in _old_flags(roster).columns})
+    merged = summary.merge(old, on=BY, suffixes=("", "_old"), validate="one_to_one")
+    assert len(merged) == len(old) and (merged["athletes"] == merged["athletes_old"]).all()
+    for rule in roster_engine.FLAG_RULES:
+        expected = [_old_pct_cell(n, total) for n, total in zip(merged[rule.key], merged["athletes"])]
+        assert (merged[f"{rule.key}_n"] == merged[rule.key]).all(), rule.key
+        assert list(zip(merged[f"{rule.key}_pct"], merged[f"{rule.key}_over"])) == expected, rule.key
+    assert summary["missing_gender_over"].any() and not summary["missing_gender_over"].all()
+
+def test_registered_rule_adds_a_cube_measure(monkeypatch):
+    monkeypatch.setattr(roster_engine, "FLAG_RULES", list(roster_engine.FLAG_RULES))
+    monkeypatch.setattr(roster_engine, "CUBE_MEASURES", list(roster_engine.CUBE_MEASURES))
+    roster = _roster()
+    before = roster_engine.build_roster_cube(roster)
+    rule = roster_engine.FlagRule("even_id", "Even ID", lambda r: r["STUDENT ID"].str[-1].isin(list("02468")), "", "", threshold=0.9)
+    roster_engine.register_flag_rule(rule)
+    cube = roster_engine.build_roster_cube(roster)
+
+    assert "flag_even_id" not in before.columns and "flag_even_id_n" not in roster_engine.flag_summary(before, BY)
+    summary = roster_engine.flag_summary(cube, BY)
+    even = roster["STUDENT ID"].str[-1].isin(list("02468"))
+    assert summary["even_id_n"].sum() == even.sum() and not summary["even_id_over"].any()
+    assert summary["missing_gpa_n"].sum() == roster["GPA"].isna().sum()  # the built-in rules are unchanged
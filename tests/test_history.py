@@ -0,0 +1,33 @@
+import google_standin
+import roster_engine
+
+def _partitions(path: str) -> int:
+    history = roster_engine.RosterHistory(path)
+    try:
+        return len(history.partitions())
+    finally:
+        history.close()
+
+def test_scan_that_lost_a_school_is_not_recorded_in_history(standin, monkeypatch):
+    monkeypatch.setattr(roster_engine, "SCAN_RETRY_ATTEMPTS", 0)
+    dataset = google_standin.generate(4, 20)
+    unreadable = dataset["spreadsheets"].pop("synthetic-0001")
+    standin(dataset)
+    store = roster_engine.SnapshotStore("root", directory="snapshots", history_path="history.sqlite3")
+    store.refresh()
+    assert store.current.roster["School"].nunique() == 3
+    assert store.last_scan.counters["spreadsheets_skipped"] == 1
+    assert _partitions("history.sqlite3") == 0
+    assert any(e.get("event") == "history_skipped" for e in store.last_scan.events)
+
+    dataset["spreadsheets"]["synthetic-0001"] = unreadable
+    store.refresh()
+    assert _partitions("history.sqlite3") == 1
+
+    # Failing again, but its last good roster stands in: the school is still there, so the scan is recorded.
+    dataset["spreadsheets"].pop("synthetic-0001")
+    dataset["files"]["files"][1]["modifiedTime"] = "2024-10-01T12:00:00.000Z"
+    store.refresh()
+    assert store.last_scan.counters["stale_rosters_kept"] == 1
+    assert store.current.roster["School"].nunique() == 4
+    assert not any(e.get("event") == "history_skipped" for e in store.last_scan.events)
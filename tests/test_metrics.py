@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+
+import roster_engine
+
+SCHEMAS = {schema.key: schema for schema in roster_engine.METRIC_SCHEMAS}
+
+def fetch_book(standin, grids: dict) -> dict:
+    """fetch_metric_tabs against a Command Center spreadsheet holding these tabs (title → rows)."""
+    book = {"spreadsheet": {"sheets": [{"properties": {"title": title, "gridProperties": {"rowCount": 50, "columnCount": 6}}} for title in grids]},
+            "grids": grids}
+    standin({"files": {"files": []}, "spreadsheets": {"command-center": book}})
+    sheets = roster_engine.get_google_clients().service("sheets", "v4")
+    return roster_engine.fetch_metric_tabs(sheets, "command-center", roster_engine.get_sheets_limiter())
+
+@pytest.mark.parametrize("titles, expected", [
+    (["Certification Completion", "Forfeits", "Game Compliance", "Coach Retention", "Student Return Rate"],
+     {"certification": "Certification Completion", "forfeits": "Forfeits", "game_compliance": "Game Compliance",
+      "coach_retention": "Coach Retention", "student_return": "Student Return Rate"}),
+    (["Returning Coaches", "Notes"], {"coach_retention": "Returning Coaches"}),
+    (["Notes", "Returning Coaches", "Returning Students"], {"coach_retention": "Returning Coaches", "student_return": "Returning Students"}),
+    (["Return Rate", "Returning", "Schedule"], {}),
+])
+def test_metric_tabs_route_to_their_own_schema(standin, titles, expected):
+    grids = fetch_book(standin, {title: [["School"]] for title in titles})
+    assert {key: title for key, (title, _) in grids.items()} == expected
+
+def test_coach_returns_never_land_in_the_student_table(standin):
+    grids = fetch_book(standin, {
+        "Returning Coaches": [["School", "Coaches Last Year", "Returning Coaches"], ["Bret Harte", "4", "3"]],
+        "Student Return Rate": [["School", "Return Rate"], ["Bret Harte", "70%"]],
+    })
+    coaches = roster_engine.parse_metric_tab(SCHEMAS["coach_retention"], grids["coach_retention"][1])
+    students = roster_engine.parse_metric_tab(SCHEMAS["student_return"], grids["student_return"][1])
+    assert coaches["coach_retention_pct"].tolist() == [75.0]
+    assert students["return_pct"].tolist() == [70.0]
+
+@pytest.mark.parametrize("header, cells, expected", [
+    ("Certification %", ["85%", "85", "1", "0.85", "", "n/a"], [85.0, 85.0, 1.0, 0.85, None, None]),
+    ("Return Rate", ["1", "100%", "1,000"], [1.0, 100.0, 1000.0]),
+    ("Return Ratio", ["0.85", "1", "85%", ""], [85.0, 100.0, 85.0, None]),
+    ("Compliance Rate (0-1)", ["0.5"], [50.0]),
+])
+def test_percent_cells_are_only_scaled_when_the_header_says_fraction(header, cells, expected):
+    field = next(f for schema in roster_engine.METRIC_SCHEMAS for f in schema.fields if f.kind == "percent")
+    parsed = roster_engine.METRIC_PARSERS[field.kind](roster_engine._metric_text(pd.Series(cells, dtype=object)), header)
+    assert parsed.dtype == "float64"
+    assert [None if pd.isna(v) else v for v in parsed] == expected
+
+def test_a_count_of_one_is_not_read_as_a_ratio():
+    rows = [["School", "Certification %", "Certified", "Coaches"], ["Bret Harte", "1", "1", "1"], ["Frick", "", "1", "2"]]
+    facts = roster_engine.parse_metric_tab(SCHEMAS["certification"], rows)
+    assert facts["certification_pct"].tolist() == [1.0, 50.0]  # as written; a blank value comes from the counts
+    assert facts["coaches_certified"].tolist() == [1, 1]
+
+def test_join_metric_lines_facts_up_with_rostered_athletes_on_the_keys_the_tab_has():
+    raw = pd.DataFrame([
+        ["School 001 Middle Official Sports Roster '24-25", "Soccer", "Varsity", "Fall", "—", str(100000 + i), "Lee", "Ann", "Girls", "3.0", "Yes"]
+        for i in range(3)
+    ] + [
+        ["School 001 Middle Official Sports Roster '24-25", "Basketball", "Varsity", "Winter", "—", "200001", "Tran", "Bao", "Boys", "", ""],
+        ["School 002 Middle Official Sports Roster '24-25", "Soccer", "Varsity", "Fall", "—", "300001", "Diaz", "Eli", "Boys", "", ""],
+    ], columns=roster_engine.ROSTER_COLUMNS)
+    cube = roster_engine.build_roster_cube(roster_engine.type_roster(raw))
+    forfeits = roster_engine.parse_metric_tab(SCHEMAS["forfeits"], [
+        ["School", "Sport", "Forfeits"], ["School 001 Middle", "Soccer", "2"], ["School 001 Middle", "Track", "1"], ["School 002 Middle", "Soccer", ""]])
+    retention = roster_engine.parse_metric_tab(SCHEMAS["coach_retention"], [
+        ["School", "Coaches Last Year", "Returning Coaches"], ["School 001 Middle", "4", "3"], ["School 003 Middle", "2", "2"]])
+
+    joined = roster_engine.join_metric(forfeits, cube)
+    assert joined[["School", "Sport", "forfeits", "athletes"]].astype(object).where(joined.notna(), None).values.tolist() == [
+        ["School 001 Middle", "Soccer", 2, 3], ["School 001 Middle", "Track & Field", 1, None], ["School 002 Middle", "Soccer", None, 1]]
+    joined = roster_engine.join_metric(retention, cube)
+    assert joined["athletes"].astype(object).where(joined["athletes"].notna(), None).tolist() == [4, None]
@@ -0,0 +1,52 @@
+import pandas as pd
+
+import roster_engine
+
+HEADER = ["#", "Student ID", "Notes", "Last name", "First Name", "Gender", "Parent Phone", "GPA", "Physical Clearance"]
+ROWS = [
+    ["1", "100001", "", " Nguyen ", "Bao", "m", "", "3.5", "Yes"],
+    ["2", " 100002 ", "late", "Lee", "Ann", " Girl ", "555", "", "APPROVED 9/1"],
+    ["3", "N/A", "", "Garcia", "Eli", "F"],          # no usable ID
+    ["4", "12", "", "Lopez", "Kai", "F"],            # ID too short
+    ["5", "100005", "", "", "Luz", "F"],             # no last name
+    ["6", "100006", "", "Tran", "Hana"],             # ragged: the API drops trailing empty cells
+    [],
+    ["8", 100008, "", "Smith", "Gus", "X", "", 3.0, "pending"],  # non-string cells
+    ["9", "100009"],
+]
+
+def fetched(title: str, header, rows) -> roster_engine.RosterTab:
+    """What fetch_roster_tabs hands the parser: only the mapped columns, one value grid per contiguous run, each
+    trimmed the way the API trims a range (trailing empty cells and rows dropped)."""
+    col_map = roster_engine.map_header_to_target(header)
+    runs = roster_engine._column_runs(col_map.values())
+    run_values = []
+    for first, last in runs:
+        values = [row[first:last + 1] for row in rows]
+        for row in values:
+            while row and row[-1] in ("", None): row.pop()
+        while values and not values[-1]: values.pop()
+        run_values.append(values)
+    stitched = [c for first, last in runs for c in range(first, last + 1)]
+    return roster_engine.RosterTab(title, run_values, runs, {t: stitched.index(c) for t, c in col_map.items()})
+
+def test_parse_roster_tabs_matches_the_column_at_a_time_parser():
+    tabs = [fetched("(W) BASKETBALL - GIRLS RED JV", HEADER, ROWS), fetched("(F) CROSS COUNTRY", HEADER, ROWS[::-1])]
+    roster, stats = roster_engine.parse_roster_tabs("Bench Middle", tabs)
+
+    expected = roster_engine.concat_rosters(
+        roster_engine.parse_sheet_values([HEADER] + rows, "Bench Middle", title) for title, rows in
+        (("(W) BASKETBALL - GIRLS RED JV", ROWS), ("(F) CROSS COUNTRY", ROWS[::-1])))
+    pd.testing.assert_frame_equal(roster.astype(object), expected.astype(object))
+    assert roster["STUDENT ID"].tolist()[:4] == ["100001", "100002", "100006", "100008"]
+    assert roster["Gender"].tolist()[:4] == ["Boys", "Girls", "Other", "Other"]
+    assert roster["GPA"].tolist()[:4] == ["3.5", "", "", "3.0"]
+    assert [(title, kept, rejected, error) for title, kept, rejected, _, error in stats] == [
+        ("(W) BASKETBALL - GIRLS RED JV", 4, 5, None), ("(F) CROSS COUNTRY", 4, 5, None)]
+
+def test_a_tab_that_fails_to_parse_is_left_out_with_its_error():
+    good = fetched("(S) TRACK", HEADER, ROWS)
+    broken = good._replace(title="(S) SOFTBALL", run_values=[])  # a grid missing for one of its column runs
+    roster, stats = roster_engine.parse_roster_tabs("Bench Middle", [broken, good])
+    assert set(roster["Sport"]) == {"Track & Field"} and len(roster) == 4
+    assert stats[0][0] == "(S) SOFTBALL" and stats[0][4].startswith("IndexError")
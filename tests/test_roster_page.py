@@ -0,0 +1,99 @@
+import io
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import google_standin
+import roster_engine
+
+APP = os.path.join(os.path.dirname(os.path.abspath(roster_engine.__file__)), "app.py")
+
+@pytest.fixture
+def detailed_data(standin, monkeypatch):
+    """The dashboard on the Detailed Data tab, serving a snapshot of a stand-in district (no background refresher)."""
+    standin(google_standin.generate(4, 60))
+    monkeypatch.setattr(roster_engine.SnapshotStore, "start", lambda self: self)
+    store = roster_engine.SnapshotStore(roster_engine.FOLDER_ID, history_path=None, publish_partial=False)
+    store.refresh()
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    return rerun(AppTest.from_file(APP, default_timeout=60).run()), store.current.roster
+
+def rerun(at: AppTest) -> AppTest:
+    """Rerun on the Detailed Data tab (AppTest does not send the open tab back with the other widget states)."""
+    at.session_state["main_tabs"] = "📋 DETAILED DATA"
+    return at.run()
+
+def widget(widgets, label: str):
+    return next(w for w in widgets if w.label.startswith(label))
+
+def test_last_page_is_bounded_by_the_filtered_roster(detailed_data):
+    at, roster = detailed_data
+    widget(at.selectbox, "Rows per page").set_value(50)
+    rerun(at)
+    pages = -(-len(roster) // 50)
+    page = widget(at.number_input, "Page")
+    assert page.label == f"Page (of {pages})" and page.max == pages
+    page.set_value(pages)
+    rerun(at)
+
+    assert not at.exception
+    shown = at.main.dataframe[0].value
+    assert len(shown) == len(roster) - (pages - 1) * 50
+    assert at.main.caption[-1].value == f"Rows {(pages - 1) * 50 + 1}–{len(roster)} of {len(roster)}"
+
+def test_sorted_page_is_the_slice_of_the_sorted_roster(detailed_data):
+    at, roster = detailed_data
+    widget(at.selectbox, "Sort by").set_value("GPA")
+    widget(at.selectbox, "Rows per page").set_value(50)
+    rerun(at)  # Order is enabled once a sort column is picked
+    widget(at.selectbox, "Order").set_value("Descending")
+    widget(at.number_input, "Page").set_value(2)
+    rerun(at)
+
+    expected = roster.sort_values("GPA", ascending=False, kind="stable", na_position="last").iloc[50:100]
+    shown = at.main.dataframe[0].value
+    assert shown["STUDENT ID"].tolist() == expected["STUDENT ID"].tolist()
+    assert shown["GPA"].tolist() == expected["GPA"].astype("float64").round(4).tolist()
+
+def test_export_is_built_only_when_asked_for(detailed_data, monkeypatch):
+    at, roster = detailed_data
+    built = []
+    export_roster = roster_engine.export_roster
+    monkeypatch.setattr(roster_engine, "export_roster", lambda frame, fmt: built.append((fmt, len(frame))) or export_roster(frame, fmt))
+    rerun(at)
+    assert built == [] and not at.get("download_button")
+    widget(at.button, "📦 Prepare CSV").click()
+    rerun(at)
+    assert built == [("CSV", len(roster))]  # the whole filtered roster, not the page
+    assert at.get("download_button")[0].label.startswith("📥 Export CSV")
+    rerun(at)  # cached per filter and format
+    assert len(built) == 1
+
+@pytest.mark.parametrize("rows", [0, 1, 25])
+def test_csv_export_matches_the_frame_across_chunks(monkeypatch, rows):
+    monkeypatch.setattr(roster_engine, "EXPORT_CHUNK_ROWS", 10)
+    frame = _frame(rows)
+    assert roster_engine.export_roster(frame, "CSV") == frame.to_csv(index=False).encode("utf-8")
+
+def test_parquet_export_round_trips_in_row_groups(monkeypatch):
+    monkeypatch.setattr(roster_engine, "EXPORT_CHUNK_ROWS", 10)
+    frame = _frame(25)
+    data = roster_engine.export_roster(frame, "Parquet")
+    parquet = pq.ParquetFile(io.BytesIO(data))
+    assert parquet.metadata.num_row_groups == 3
+    pd.testing.assert_frame_equal(parquet.read().to_pandas(), frame)
+
+def test_unknown_export_format_is_rejected():
+    with pytest.raises(ValueError, match="unknown export format"):
+        roster_engine.export_roster(_frame(1), "PDF")
+
+def _frame(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "School": pd.Categorical(["Frick", "Westlake"] * rows)[:rows], "STUDENT ID": [str(100000 + i) for i in range(rows)],
+        "Last Name": ["O'Brien, Jr."] * rows, "GPA": [3.25 if i % 3 else None for i in range(rows)],
+    })
@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+import roster_engine
+
+ATHLETES = [  # STUDENT ID, Last Name, First Name, [(School, Sport)]: one roster row per team
+    ("102345", "Nguyen", "Mai", [("Bret Harte", "Soccer"), ("Bret Harte", "Futsal"), ("Edna Brewer", "Track & Field")]),
+    ("102399", "Nguyenson", "Tuan", [("Frick", "Basketball")]),
+    ("204551", "Tran", "Mai", [("Frick", "Soccer")]),
+    ("204552", "De La Cruz", "Rosa", [("Westlake", "Volleyball")]),
+    ("310077", "O'Brien", "Al", [("Westlake", "Soccer"), ("Madison Park", "Soccer")]),
+    ("310078", "Alvarez", "Lin", [("Roosevelt", "Futsal")]),
+]
+
+@pytest.fixture(scope="module")
+def index() -> roster_engine.RosterSearchIndex:
+    rows = [(school, sport, "7th/8th Grade", "Fall", "—", sid, last, first, "Girls", "3.1", "Yes")
+            for sid, last, first, teams in ATHLETES for school, sport in teams]
+    return roster_engine.RosterSearchIndex(roster_engine.type_roster(pd.DataFrame(rows, columns=roster_engine.ROSTER_COLUMNS)))
+
+def ids(frame: pd.DataFrame) -> list:
+    return frame["STUDENT ID"].drop_duplicates().tolist()
+
+@pytest.mark.parametrize("query, expected", [
+    ("1023", ["102345", "102399"]),  # ID prefix
+    ("102345", ["102345"]),
+    ("2045", ["204552", "204551"]),  # sorted by name: De La Cruz before Tran
+    ("9", []),
+    ("nguy", ["102345", "102399"]),  # name substring (trigrams)
+    ("yens", ["102399"]),
+    ("guyen mai", ["102345"]),  # every word must match
+    ("mai", ["102345", "204551"]),  # first names too
+    ("al", ["310078", "310077"]),  # short word: prefix of any name word
+    ("la", ["204552"]),
+    ("o'br", ["310077"]),
+    ("cruz, rosa", ["204552"]),
+    ("rosa 3100", []),
+    ("", []),
+])
+def test_search_matches_id_prefixes_and_name_substrings(index, query, expected):
+    assert ids(index.search(query)) == expected
+
+def test_search_returns_every_team_of_a_matched_student(index):
+    hits = index.search("102345")
+    assert sorted(zip(hits["School"], hits["Sport"])) == [("Bret Harte", "Futsal"), ("Bret Harte", "Soccer"), ("Edna Brewer", "Track & Field")]
+    assert len(index.search("o'brien")) == 2
+
+def test_search_limits_students_not_rows(index):
+    hits = index.search("1", limit=1)
+    assert ids(hits) == ["102345"] and len(hits) == 3
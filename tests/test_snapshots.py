@@ -0,0 +1,48 @@
+import os
+
+import google_standin
+import roster_engine
+
+def _published(store: roster_engine.SnapshotStore) -> list:
+    """Record the persist flag of every snapshot the store publishes."""
+    calls, publish = [], store.publish
+    def record(roster, done, total, persist):
+        calls.append(persist)
+        return publish(roster, done, total, persist)
+    store.publish = record
+    return calls
+
+def test_first_scan_publishes_partial_snapshots(standin, monkeypatch):
+    standin(google_standin.generate(6, 20))
+    monkeypatch.setattr(roster_engine, "SCAN_PREVIEW_INTERVAL", 0)
+    store = roster_engine.SnapshotStore("root", directory="snapshots", history_path=None)
+    published = _published(store)
+    store.refresh()
+    assert published[-1] is True and False in published
+
+def test_headless_store_publishes_only_the_complete_snapshot(standin, monkeypatch):
+    standin(google_standin.generate(6, 20))
+    monkeypatch.setattr(roster_engine, "SCAN_PREVIEW_INTERVAL", 0)
+    store = roster_engine.SnapshotStore("root", directory="snapshots", history_path=None, publish_partial=False)
+    published = _published(store)
+    store.refresh()
+    assert published == [True]
+    assert store.current.version == 1 and not store.current.partial
+    assert roster_engine.SnapshotStore("root", directory="snapshots", history_path=None).current.done == 6
+
+def test_complete_snapshot_on_disk_replaces_a_higher_numbered_partial(standin):
+    standin(google_standin.generate(6, 20))
+    roster = roster_engine.collect_scan(roster_engine.iter_deep_scan("root"))
+    dashboard = roster_engine.SnapshotStore("root", directory="snapshots", history_path=None)
+    for done in range(1, 4):  # a first scan still in progress: partials v1-v3, none on disk
+        dashboard.publish(roster, done, 6, persist=False)
+    etl = roster_engine.SnapshotStore("root", directory="snapshots", history_path=None, publish_partial=False)
+    etl.refresh()
+    assert etl.current.version == 1
+
+    dashboard.load()
+    assert not dashboard.current.partial and dashboard.current.done == 6
+    assert dashboard.current.version == 4  # never reuses a number already shown in this process
+    assert dashboard.publish(roster, 6, 6, persist=True).version == 5
+    etl.load()
+    assert etl.current.version == 5 and sorted(os.listdir("snapshots")) == ["CURRENT", "roster-v1.arrow", "roster-v5.arrow"]
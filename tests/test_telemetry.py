@@ -0,0 +1,15 @@
+import json
+
+import roster_engine
+
+def test_telemetry_log_rotates_past_its_size_cap(tmp_path, monkeypatch):
+    monkeypatch.setattr(roster_engine, "TELEMETRY_LOG_MAX_BYTES", 2_000)
+    path = str(tmp_path / "telemetry.jsonl")
+    for _ in range(40):
+        telemetry = roster_engine.Telemetry("scan")
+        telemetry.count("api_calls", 3)
+        telemetry.finish().write_jsonl(path)
+
+    current, rotated = open(path).read(), open(path + ".1").read()
+    assert len(current) < 2_000 + 400 and len(rotated) >= 2_000
+    assert all(json.loads(line)["type"] == "summary" for line in (current + rotated).splitlines())